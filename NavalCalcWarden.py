@@ -1,310 +1,65 @@
 import streamlit as st
-import numpy as np
+import functools
 import math
-import pyperclip
+import os
+import time
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from naval_core import SHIP_TYPES, calculate_firing_solution, calculate_wind_parameters
+from naval_metrics import METRICS
+from naval_startup import mark_first_solution, start_prewarm
+
+# The main menu needs no NumPy, so the modules built on it are imported by the sections that use them;
+# the prewarm thread loads them in the background meanwhile (see naval_startup.py)
+start_prewarm()
 
 # Set the page title
 st.set_page_config(page_title="Naval Artillery Calculator", layout="wide")
 
+# Rerun timing and active sessions for the metrics (see naval_metrics.py)
+rerun_start = time.perf_counter()
+script_run_context = get_script_run_ctx()
+if script_run_context is not None:
+    METRICS.touch_session(script_run_context.session_id)
+
+# Query parameter value that opens the hidden metrics view (?admin=<key>); the view is off unless NAVAL_ADMIN_KEY is set
+ADMIN_KEY = os.environ.get("NAVAL_ADMIN_KEY")
+
 # Initialize session state for navigation
 if 'calculator_type' not in st.session_state:
     st.session_state.calculator_type = "main_menu"
 
-# Function to convert degrees to radians
-def to_radians(degrees):
-    return degrees * math.pi / 180
+# Seconds between refreshes of the shared region wind section
+REGION_WIND_REFRESH = 5
 
-# Function to convert radians to degrees
-def to_degrees(radians):
-    return radians * 180 / math.pi
+# Decorator to run a page section as a Streamlit fragment
+# A widget inside a fragment only reruns that fragment, not the whole script; each fragment rerun is
+# recorded in the metrics under the section's name. With run_every the fragment also reruns on a timer.
+def fragment(function=None, run_every=None):
+    if function is None:
+        return functools.partial(fragment, run_every=run_every)
 
-# Function to calculate artillery coordinates
-def calculate_artillery_coordinates(ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
-    # Step 1: Calculate target coordinates with wind adjustment
-    x0 = 1000 + (math.cos(to_radians(commander_azimuth)) * commander_distance) - (math.cos(to_radians(wind_azimuth)) * wind_strength)
-    y0 = 1000 + (math.sin(to_radians(commander_azimuth)) * commander_distance) - (math.sin(to_radians(wind_azimuth)) * wind_strength)
-    
-    # Step 2: Calculate gun positions based on ship azimuth
-    # First gun
-    x1 = 1000 + (-1 * (math.cos(to_radians(ship_azimuth)) * 6.4))
-    y1 = 1000 + (-1 * (math.sin(to_radians(ship_azimuth)) * 6.4))
-    
-    # Second gun
-    x2 = 1000 + (-1 * (math.cos(to_radians(ship_azimuth)) * 19.8))
-    y2 = 1000 + (-1 * (math.sin(to_radians(ship_azimuth)) * 19.8))
-    
-    # Step 3: Calculate differences between guns and target
-    dx1 = x0 - x1
-    dy1 = y0 - y1
-    dx2 = x0 - x2
-    dy2 = y0 - y2
-    
-    # Step 4: Calculate bearing (rumb) for each gun
-    # First gun bearing
-    if dx1 != 0:  # Prevent division by zero
-        angle1 = to_degrees(math.atan(dy1 / dx1))
-        r1 = abs(angle1) if angle1 >= 0 else abs(angle1)
-    else:
-        r1 = 90 if dy1 > 0 else 270
-    
-    # Second gun bearing
-    if dx2 != 0:  # Prevent division by zero
-        angle2 = to_degrees(math.atan(dy2 / dx2))
-        r2 = abs(angle2) if angle2 >= 0 else abs(angle2)
-    else:
-        r2 = 90 if dy2 > 0 else 270
-    
-    # Step 5: Calculate final azimuth for each gun
-    # First gun azimuth
-    if dy1 > 0 and dx1 > 0:
-        A1 = r1
-    elif dy1 > 0 and dx1 < 0:
-        A1 = 180 - r1
-    elif dy1 < 0 and dx1 < 0:
-        A1 = 180 + r1
-    else:  # dy1 < 0 and dx1 > 0
-        A1 = 360 - r1
-    
-    # Second gun azimuth
-    if dy2 > 0 and dx2 > 0:
-        A2 = r2
-    elif dy2 > 0 and dx2 < 0:
-        A2 = 180 - r2
-    elif dy2 < 0 and dx2 < 0:
-        A2 = 180 + r2
-    else:  # dy2 < 0 and dx2 > 0
-        A2 = 360 - r2
-    
-    # Step 6: Calculate distance for each gun
-    d1 = math.sqrt(dx1**2 + dy1**2)
-    d2 = math.sqrt(dx2**2 + dy2**2)
-    
-    # Step 7: Check if gun 1 can fire (firing angle constraints)
-    left = ship_azimuth - 30
-    if left < 0:
-        left = ship_azimuth + 330
-    
-    right = ship_azimuth + 30
-    if right > 360:
-        right = ship_azimuth - 330
-    
-    # Determine if gun 1 can fire
-    if left < right:
-        s1 = 0 if (A1 > left and A1 < right) else 1
-    else:
-        s1 = 1 if (A1 < left and A1 > right) else 0
-    
-    # If s1 = 0, set A1 to "No angle"
-    if s1 == 0:
-        A1_display = "No angle"
-    else:
-        A1_display = round(A1, 1)
-        
-    # Round results to one decimal place
-    d1 = round(d1, 1)
-    A2 = round(A2, 1)
-    d2 = round(d2, 1)
-    
-    return A1_display, d1, A2, d2
+    @st.fragment(run_every=run_every)
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        if script_run_context is not None:
+            METRICS.touch_session(script_run_context.session_id)
+        function(*args, **kwargs)
+        METRICS.observe_rerun(function.__name__, time.perf_counter() - start)
+    return wrapper
 
-# Function to calculate artillery coordinates for CalahanBS
-def calculate_calahan_artillery_coordinates(ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
-    # Step 1: Calculate target coordinates with wind adjustment
-    x0 = 1000 + (math.cos(to_radians(commander_azimuth)) * commander_distance) - (math.cos(to_radians(wind_azimuth)) * wind_strength)
-    y0 = 1000 + (math.sin(to_radians(commander_azimuth)) * commander_distance) - (math.sin(to_radians(wind_azimuth)) * wind_strength)
-    
-    # Step 2: Calculate gun positions based on ship azimuth
-    # Front gun
-    x1 = 1000 + (math.cos(to_radians(ship_azimuth)) * 11)
-    y1 = 1000 + (math.sin(to_radians(ship_azimuth)) * 11)
-    
-    # Middle gun
-    x2 = 1000 + (-1 * (math.cos(to_radians(ship_azimuth)) * 11))
-    y2 = 1000 + (-1 * (math.sin(to_radians(ship_azimuth)) * 11))
-    
-    # Rear gun
-    x3 = 1000 + (-1 * (math.cos(to_radians(ship_azimuth)) * 26))
-    y3 = 1000 + (-1 * (math.sin(to_radians(ship_azimuth)) * 26))
-    
-    # Step 3: Calculate differences between guns and target
-    dx1 = x0 - x1
-    dy1 = y0 - y1
-    dx2 = x0 - x2
-    dy2 = y0 - y2
-    dx3 = x0 - x3
-    dy3 = y0 - y3
-    
-    # Step 4: Calculate bearing (rumb) for each gun
-    # Front gun bearing
-    if dx1 != 0:  # Prevent division by zero
-        angle1 = to_degrees(math.atan(dy1 / dx1))
-        r1 = abs(angle1) if angle1 >= 0 else abs(angle1)
-    else:
-        r1 = 90 if dy1 > 0 else 270
-    
-    # Middle gun bearing
-    if dx2 != 0:  # Prevent division by zero
-        angle2 = to_degrees(math.atan(dy2 / dx2))
-        r2 = abs(angle2) if angle2 >= 0 else abs(angle2)
-    else:
-        r2 = 90 if dy2 > 0 else 270
-    
-    # Rear gun bearing
-    if dx3 != 0:  # Prevent division by zero
-        angle3 = to_degrees(math.atan(dy3 / dx3))
-        r3 = abs(angle3) if angle3 >= 0 else abs(angle3)
-    else:
-        r3 = 90 if dy3 > 0 else 270
-    
-    # Step 5: Calculate final azimuth for each gun
-    # Front gun azimuth
-    if dy1 > 0 and dx1 > 0:
-        A1 = r1
-    elif dy1 > 0 and dx1 < 0:
-        A1 = 180 - r1
-    elif dy1 < 0 and dx1 < 0:
-        A1 = 180 + r1
-    else:  # dy1 < 0 and dx1 > 0
-        A1 = 360 - r1
-    
-    # Middle gun azimuth
-    if dy2 > 0 and dx2 > 0:
-        A2 = r2
-    elif dy2 > 0 and dx2 < 0:
-        A2 = 180 - r2
-    elif dy2 < 0 and dx2 < 0:
-        A2 = 180 + r2
-    else:  # dy2 < 0 and dx2 > 0
-        A2 = 360 - r2
-    
-    # Rear gun azimuth
-    if dy3 > 0 and dx3 > 0:
-        A3 = r3
-    elif dy3 > 0 and dx3 < 0:
-        A3 = 180 - r3
-    elif dy3 < 0 and dx3 < 0:
-        A3 = 180 + r3
-    else:  # dy3 < 0 and dx3 > 0
-        A3 = 360 - r3
-    
-    # Step 6: Calculate distance for each gun
-    d1 = math.sqrt(dx1**2 + dy1**2)
-    d2 = math.sqrt(dx2**2 + dy2**2)
-    d3 = math.sqrt(dx3**2 + dy3**2)
-    
-    # Step 7: Check firing angle constraints for each gun
-    # Front gun constraints
-    left1 = ship_azimuth - 135
-    if left1 < 0:
-        left1 = ship_azimuth + 225
-    
-    right1 = ship_azimuth + 135
-    if right1 > 360:
-        right1 = ship_azimuth - 225
-    
-    # Middle and Rear gun constraints (they are the same)
-    left2 = ship_azimuth - 45
-    if left2 < 0:
-        left2 = ship_azimuth + 315
-    
-    right2 = ship_azimuth + 45
-    if right2 > 360:
-        right2 = ship_azimuth - 315
-    
-    # Determine if guns can fire based on angle constraints
-    # Front gun
-    if left1 < right1:
-        s1 = 1 if (A1 > left1 and A1 < right1) else 0
-    else:
-        s1 = 0 if (A1 < left1 and A1 > right1) else 1
-    
-    # Middle gun - проверяем, попадает ли азимут в диапазон ограничений
-    if left2 < right2:
-        s2 = 0 if (A2 >= left2 and A2 <= right2) else 1
-    else:
-        s2 = 0 if (A2 >= left2 or A2 <= right2) else 1
-    
-    # Rear gun - проверяем, попадает ли азимут в диапазон ограничений
-    if left2 < right2:
-        s3 = 0 if (A3 >= left2 and A3 <= right2) else 1
-    else:
-        s3 = 0 if (A3 >= left2 or A3 <= right2) else 1
-    
-    # Apply "No angle" if gun can't fire
-    if s1 == 0:
-        A1_display = "No angle"
-    else:
-        A1_display = round(A1, 1)
-        
-    if s2 == 0:
-        A2_display = "No angle"
-    else:
-        A2_display = round(A2, 1)
-        
-    if s3 == 0:
-        A3_display = "No angle"
-    else:
-        A3_display = round(A3, 1)
-    
-    # Round distances to one decimal place
-    d1 = round(d1, 1)
-    d2 = round(d2, 1)
-    d3 = round(d3, 1)
-    
-    return A1_display, d1, A2_display, d2, A3_display, d3
-
-# Function to calculate wind parameters based on shell landing point
-def calculate_wind_parameters(ship_azimuth, commander_azimuth, commander_distance, 
-                              explosion_azimuth, explosion_distance):
-    # For Frigate, we use gun 2 as reference
-    # For CalahanBS, we should use the middle gun (gun 2) as reference
-    # Since the calculation is the same principle, we'll use the same function for both
-    
-    # Calculate gun position (using gun 2 as a reference)
-    if st.session_state.calculator_type == "frigate":
-        # For Frigate, gun 2 is at -19.8 distance
-        x2 = 1000 + (-1 * (math.cos(to_radians(ship_azimuth)) * 19.8))
-        y2 = 1000 + (-1 * (math.sin(to_radians(ship_azimuth)) * 19.8))
-    else:
-        # For CalahanBS, the middle gun (gun 2) is at -11 distance
-        x2 = 1000 + (-1 * (math.cos(to_radians(ship_azimuth)) * 11))
-        y2 = 1000 + (-1 * (math.sin(to_radians(ship_azimuth)) * 11))
-    
-    # Calculate expected shell landing coordinates
-    xm = x2 + (math.cos(to_radians(commander_azimuth)) * commander_distance)
-    ym = y2 + (math.sin(to_radians(commander_azimuth)) * commander_distance)
-    
-    # Calculate actual shell landing coordinates
-    xf = 1000 + (math.cos(to_radians(explosion_azimuth)) * explosion_distance)
-    yf = 1000 + (math.sin(to_radians(explosion_azimuth)) * explosion_distance)
-    
-    # Calculate difference
-    dxv = xf - xm
-    dyv = yf - ym
-    
-    # Calculate wind azimuth
-    if dxv != 0:  # Prevent division by zero
-        angle_v = to_degrees(math.atan(dyv / dxv))
-        rv = abs(angle_v) if angle_v >= 0 else abs(angle_v)
-    else:
-        rv = 90 if dyv > 0 else 270
-    
-    # Calculate final wind azimuth
-    if dyv > 0 and dxv > 0:
-        Av = rv
-    elif dyv > 0 and dxv < 0:
-        Av = 180 - rv
-    elif dyv < 0 and dxv < 0:
-        Av = 180 + rv
-    else:  # dyv < 0 and dxv > 0
-        Av = 360 - rv
-    
-    # Calculate wind strength
-    dv = math.sqrt(dxv**2 + dyv**2)
-    # Round wind strength to nearest 10
-    dv = round(dv / 10) * 10
-    
-    return Av, dv
+# Function to format a firing solution as the result lines of the calculators
+def format_solution_lines(solution):
+    lines = []
+    for number, (gun_name, A, d, can_fire) in enumerate(zip(
+        SHIP_TYPES[solution.ship_type].gun_names, solution.azimuths, solution.distances, solution.can_fire
+    ), start=1):
+        if can_fire:
+            lines.append(f"{gun_name}: Azimuth (A{number}): {A}°, Distance (d{number}): {d}")
+        else:
+            lines.append(f"{gun_name}: Azimuth (A{number}): No angle, Distance (d{number}): {d}")
+    return lines
 
 # Function to display the main menu
 def show_main_menu():
@@ -334,114 +89,360 @@ def show_main_menu():
     If you use this calculator correctly, you can save time and shells, and you will be sniping targets.
     """)
 
-# Function to display the CalahanBS calculator
-def show_calahan_calculator():
-    st.title("CalahanBS Artillery Calculator")
-    
-    # Add a back button at the top
-    if st.button("Back to Main Menu"):
-        st.session_state.calculator_type = "main_menu"
-        st.rerun()
-    
-    st.write("This application calculates artillery coordinates for CalahanBS ship guns based on ship position, commander inputs, and wind conditions.")
-    
+# Function to display the hidden metrics view for server admins
+def show_admin_view():
+    st.title("Server Metrics")
+    snapshot = METRICS.snapshot()
+    st.metric("Active Sessions", snapshot["active_sessions"])
+
+    st.subheader("Script Reruns")
+    st.dataframe([{"page": page, **values} for page, values in sorted(snapshot["reruns"].items())], use_container_width=True)
+
+    st.subheader("Functions")
+    st.caption(f"Every call is counted, one call in {METRICS.sample_every} is timed.")
+    st.dataframe([{"function": name, **values} for name, values in sorted(snapshot["functions"].items())], use_container_width=True)
+
+    st.subheader("Caches")
+    caches = {}
+    for name, _, _, labels, value in snapshot["extra"]:
+        if "cache" in labels:
+            caches.setdefault(labels["cache"], {"cache": labels["cache"]})[name.replace("naval_cache_", "")] = value
+    st.dataframe(list(caches.values()), use_container_width=True)
+
+    with st.expander("Prometheus Text"):
+        st.code(METRICS.render_prometheus(), language="text")
+
+# Function to display the firing-arc coverage map shared by both calculators
+# The map follows the ship azimuth and wind inputs live; maps are cached per heading and wind
+def show_coverage_map(ship_type, key_prefix, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    if not st.toggle("Show Firing Arc Coverage", key=f"{key_prefix}coverage_toggle"):
+        return
+    from naval_coverage import coverage_map, render_coverage
+
+    ship = SHIP_TYPES[ship_type]
+    coverage = coverage_map(ship_type, ship_azimuth, wind_azimuth, wind_strength)
+
+    map_col, info_col = st.columns([2, 1])
+    with map_col:
+        st.image(render_coverage(coverage), caption=f"Up is azimuth 0, rings out to {coverage.commander_distances[-1]:g}. "
+                 "Green: every gun bears, amber: some guns bear, grey: no gun bears. The white line is the ship.")
+    with info_col:
+        for gun_name, fraction in zip(ship.gun_names, coverage.coverage_fractions()):
+            st.write(f"{gun_name}: bears on {round(fraction * 100)}% of the map")
+        # Aim of the map cell nearest to the commander target
+        azimuth_index, distance_index = coverage.cell(commander_azimuth, commander_distance)
+        st.write(f"At the map cell {coverage.commander_azimuths[azimuth_index]:g}° / {coverage.commander_distances[distance_index]:g} "
+                 "nearest the commander target:")
+        for gun_name, (azimuth, distance) in zip(ship.gun_names, coverage.aim(commander_azimuth, commander_distance)):
+            st.write(f"{gun_name}: {'No angle' if azimuth is None else f'{azimuth}°'} / {distance}")
+
+# Function to display the ship headings from which 1, 2 or all guns bear on the commander target
+# The heading sweep is cached per target and wind, so only the ranking reruns while the heading changes
+def show_best_headings(ship_type, key_prefix, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    if not st.toggle("Show Best Headings", key=f"{key_prefix}heading_toggle"):
+        return
+    from naval_heading import best_headings
+
+    gun_count = len(SHIP_TYPES[ship_type].guns)
+    options = best_headings(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+
+    lines = []
+    for count in range(gun_count, 0, -1):
+        label = "All guns" if count == gun_count else f"{count} gun{'s' if count > 1 else ''}"
+        if not options[count]:
+            lines.append(f"{label}: no heading")
+            continue
+        for option in options[count][:3]:
+            span = "any heading" if option["width"] >= 360 else f"headings {option['first']}° to {option['last']}°"
+            if option["turn"] == 0:
+                turn = "no turn needed"
+            else:
+                turn = f"turn {abs(option['turn'])}° to {'starboard' if option['turn'] > 0 else 'port'} to {option['heading']}°"
+            lines.append(f"{label}: {turn} ({span}, {', '.join(option['guns'])})")
+    st.text_area("Best Headings:", value="\n".join(lines), height=max(100, 25 * len(lines)), key=f"{key_prefix}heading_result")
+
+# Function to display the Monte Carlo dispersion of every gun's solution
+# The error model defaults to DEFAULT_ERRORS; reports are cached per input set, so revisiting one is instant
+def show_dispersion_report(ship_type, key_prefix, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    if not st.toggle("Show Dispersion Report", key=f"{key_prefix}dispersion_toggle"):
+        return
+    from naval_dispersion import DEFAULT_ERRORS, DEFAULT_RADIUS, dispersion_report, format_dispersion
+
+    labels = {
+        "ship_azimuth": "Ship Azimuth Error",
+        "commander_distance": "Commander Distance Error",
+        "commander_azimuth": "Commander Azimuth Error",
+        "wind_azimuth": "Wind Azimuth Error",
+        "wind_strength": "Wind Strength Error",
+    }
+    errors = {}
+    with st.expander("Error Model"):
+        st.write("Normal errors are given as a standard deviation, uniform errors as a half width.")
+        error_cols = st.columns(len(labels) + 1)
+        for column, (name, label) in zip(error_cols, labels.items()):
+            distribution, scale = DEFAULT_ERRORS[name]
+            with column:
+                errors[name] = (distribution, st.number_input(f"{label} ({distribution})", min_value=0.0, value=scale, step=0.1,
+                                                              format="%.1f", key=f"{key_prefix}dispersion_{name}"))
+        with error_cols[-1]:
+            radius = st.number_input("Hit Radius", min_value=0.1, value=DEFAULT_RADIUS, step=0.5, format="%.1f", key=f"{key_prefix}dispersion_radius")
+
+    report = dispersion_report(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength, errors, radius=radius)
+    lines = format_dispersion(report)
+    st.text_area(f"Dispersion ({report.samples} samples):", value="\n".join(lines), height=max(100, 45 * len(lines)), key=f"{key_prefix}dispersion_result")
+
+# Function to display the multi-target fire planner shared by both calculators
+# The crew lists targets as "distance azimuth" lines; the planner picks a gun for each and orders the salvo.
+# Runs as a fragment; ship azimuth and wind are read from the main inputs' session state.
+@fragment
+def show_fire_planner(ship_type, key_prefix):
+    st.markdown("---")
+    st.subheader("Multi-Target Fire Plan")
+    targets_text = st.text_area("Targets (one per line: Commander Distance, Commander Azimuth)", value="", height=120, key=f"{key_prefix}plan_targets")
+
+    if st.button("Plan Fire", key=f"{key_prefix}plan_button"):
+        from naval_export import iter_csv
+        from naval_planner import plan_fire
+
+        try:
+            targets = [[float(value) for value in line.replace(",", " ").split()] for line in targets_text.splitlines() if line.strip()]
+            if any(len(target) != 2 for target in targets):
+                raise ValueError("every target line needs a distance and an azimuth")
+            plan = plan_fire(ship_type, st.session_state[f"{key_prefix}ship_azimuth"], targets,
+                             st.session_state[f"{key_prefix}wind_azimuth_input"], st.session_state[f"{key_prefix}wind_strength_input"])
+
+            lines = [f"{number}. {entry['gun_name']}: {entry['azimuth']}° / {entry['distance']} (target {entry['target'] + 1}, at {entry['time']} s)"
+                     for number, entry in enumerate(plan["order"], start=1)]
+            lines += [f"Target {target + 1}: No angle for any gun" for target in plan["unassigned"]]
+            st.text_area("Firing Order:", value="\n".join(lines), height=max(100, 25 * len(lines)), key=f"{key_prefix}plan_result")
+            if plan["order"]:
+                st.write(f"First round after {plan['first_round_time']} s, total turret traverse {plan['total_traverse']}°")
+
+            # Every gun's solution for every target, for spreadsheets
+            missions = [[st.session_state[f"{key_prefix}ship_azimuth"], distance, azimuth,
+                         st.session_state[f"{key_prefix}wind_azimuth_input"], st.session_state[f"{key_prefix}wind_strength_input"]]
+                        for distance, azimuth in targets]
+            st.download_button("Download Solutions (CSV)", data="".join(iter_csv(ship_type, missions)),
+                               file_name=f"{ship_type}_fire_plan.csv", mime="text/csv", key=f"{key_prefix}plan_csv")
+        except Exception as e:
+            st.error(f"An error occurred during planning: {str(e)}")
+            st.error("Please check your target list and try again.")
+
+# Function to display the multi-splash wind fit shared by both calculators
+# Any gun can log a splash with the azimuth and distance it actually fired with; the explosion inputs above
+# are the commander's reading of where it landed. Older splashes fade out as the wind changes.
+# Runs as a fragment; the ship and explosion values are read from session state.
+@fragment
+def show_wind_fit(ship_type, key_prefix):
+    from naval_log import MISSION_LOG
+    from wind_estimator import WindEstimator
+
+    ship = SHIP_TYPES[ship_type]
+    estimator_key = f"{key_prefix}wind_estimator"
+    if estimator_key not in st.session_state:
+        st.session_state[estimator_key] = WindEstimator()
+    estimator = st.session_state[estimator_key]
+
+    st.markdown("---")
+    st.subheader("Wind Fit From Several Splashes")
+
+    fit_col1, fit_col2 = st.columns(2)
+    with fit_col1:
+        gun = st.selectbox("Gun That Fired", range(len(ship.gun_names)), index=ship.wind_reference_gun,
+                           format_func=lambda index: ship.gun_names[index], key=f"{key_prefix}fit_gun")
+        gun_azimuth = st.number_input("Gun Azimuth Fired", min_value=0.0, max_value=360.0, value=0.0, step=0.1, format="%.1f", key=f"{key_prefix}fit_gun_azimuth")
+        gun_distance = st.number_input("Gun Distance Fired", min_value=0.0, value=100.0, step=0.1, format="%.1f", key=f"{key_prefix}fit_gun_distance")
+
+    with fit_col2:
+        if st.button("Add Splash", key=f"{key_prefix}fit_add_button"):
+            estimator.add_splash(ship_type, st.session_state[f"{key_prefix}ship_azimuth"], gun, gun_azimuth, gun_distance,
+                                 st.session_state[f"{key_prefix}explosion_azimuth"], st.session_state[f"{key_prefix}explosion_distance"])
+            if MISSION_LOG is not None:
+                # The commander target of the main inputs is the target the splash was aimed at
+                MISSION_LOG.log_splash(ship_type, st.session_state[f"{key_prefix}ship_azimuth"], gun, gun_azimuth, gun_distance,
+                                       st.session_state[f"{key_prefix}explosion_azimuth"], st.session_state[f"{key_prefix}explosion_distance"],
+                                       *estimator.wind(), st.session_state[f"{key_prefix}commander_distance"], st.session_state[f"{key_prefix}commander_azimuth"])
+        fitted_azimuth, fitted_strength = estimator.wind()
+        if st.button("Use Fitted Wind", key=f"{key_prefix}fit_use_button", disabled=estimator.count == 0,
+                     on_click=transfer_wind, args=(key_prefix, round(fitted_azimuth, 1) % 360, round(fitted_strength, 1))):
+            st.rerun()
+        if st.button("Reset Wind Fit", key=f"{key_prefix}fit_reset_button"):
+            estimator.reset()
+
+    if estimator.count:
+        fitted_azimuth, fitted_strength = estimator.wind()
+        uncertainty = estimator.uncertainty()
+        spread = "n/a" if math.isinf(uncertainty) else f"±{round(uncertainty, 1)}"
+        st.write(f"Fitted Wind Azimuth: {round(fitted_azimuth, 1) % 360}°, Wind Strength: {round(fitted_strength, 1)} ({spread}, "
+                 f"{estimator.count} splashes, {round(estimator.effective_count(), 1)} effective)")
+
+# Function to display the inputs and firing solution of a calculator
+# Runs as a fragment, so editing an input only reruns this section (and the coverage map that follows it)
+@fragment
+def show_main_solution(ship_type, key_prefix):
     # Create two columns for input fields in the main section
     col1, col2 = st.columns(2)
-    
+
     # Input fields for main calculation
     with col1:
         st.subheader("Ship and Commander Parameters")
-        ship_azimuth = st.number_input("Ship Azimuth", min_value=0.0, max_value=360.0, value=0.0, step=0.1, format="%.1f", key="calahan_ship_azimuth")
-        commander_distance = st.number_input("Commander Distance", min_value=0.0, value=100.0, step=0.1, format="%.1f", key="calahan_commander_distance")
-        commander_azimuth = st.number_input("Commander Azimuth", min_value=0.0, max_value=360.0, value=0.0, step=0.1, format="%.1f", key="calahan_commander_azimuth")
-    
+        ship_azimuth = st.number_input("Ship Azimuth", min_value=0.0, max_value=360.0, value=0.0, step=0.1, format="%.1f", key=f"{key_prefix}ship_azimuth")
+        commander_distance = st.number_input("Commander Distance", min_value=0.0, value=100.0, step=0.1, format="%.1f", key=f"{key_prefix}commander_distance")
+        commander_azimuth = st.number_input("Commander Azimuth", min_value=0.0, max_value=360.0, value=0.0, step=0.1, format="%.1f", key=f"{key_prefix}commander_azimuth")
+
     with col2:
         st.subheader("Wind Parameters")
         st.markdown("<div style='height: 35px;'></div>", unsafe_allow_html=True)  # Small vertical space
-        wind_azimuth = st.number_input("Wind Azimuth", min_value=0.0, max_value=360.0, value=0.0, step=0.1, format="%.1f", key="calahan_wind_azimuth_input")
-        wind_strength = st.number_input("Wind Strength", min_value=0.0, value=0.0, step=0.1, format="%.1f", key="calahan_wind_strength_input")
-    
+        wind_azimuth = st.number_input("Wind Azimuth", min_value=0.0, max_value=360.0, value=0.0, step=0.1, format="%.1f", key=f"{key_prefix}wind_azimuth_input")
+        wind_strength = st.number_input("Wind Strength", min_value=0.0, value=0.0, step=0.1, format="%.1f", key=f"{key_prefix}wind_strength_input")
+
     # Add a button to trigger calculation
-    if st.button("Calculate Artillery Coordinates", key="calahan_calculate_button"):
+    if st.button("Calculate Artillery Coordinates", key=f"{key_prefix}calculate_button"):
+        from naval_log import MISSION_LOG
+
         try:
-            # Calculate coordinates
-            A1, d1, A2, d2, A3, d3 = calculate_calahan_artillery_coordinates(
-                ship_azimuth, 
-                commander_distance, 
-                commander_azimuth, 
-                wind_azimuth, 
-                wind_strength
-            )
-            
+            # Calculate coordinates (azimuth and distance for each gun)
+            solution = calculate_firing_solution(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+            mark_first_solution()
+            if MISSION_LOG is not None:
+                MISSION_LOG.log_fire(ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength, solution)
+
             # Display results
             st.subheader("Results")
-            
-            # Format results for each gun
-            if A1 == "No angle":
-                gun1_str = f"Front Gun: Azimuth (A1): {A1}, Distance (d1): {d1}"
-            else:
-                gun1_str = f"Front Gun: Azimuth (A1): {A1}°, Distance (d1): {d1}"
-            
-            if A2 == "No angle":
-                gun2_str = f"Middle Gun: Azimuth (A2): {A2}, Distance (d2): {d2}"
-            else:
-                gun2_str = f"Middle Gun: Azimuth (A2): {A2}°, Distance (d2): {d2}"
-            
-            if A3 == "No angle":
-                gun3_str = f"Rear Gun: Azimuth (A3): {A3}, Distance (d3): {d3}"
-            else:
-                gun3_str = f"Rear Gun: Azimuth (A3): {A3}°, Distance (d3): {d3}"
-            
-            # Combined results in one text area
-            combined_result = f"{gun1_str}\n{gun2_str}\n{gun3_str}"
-            result_container = st.text_area("Calculation Results:", value=combined_result, height=100)
-                
+
+            # Combined results for each gun in one text area
+            st.text_area("Calculation Results:", value="\n".join(format_solution_lines(solution)), height=100)
+
         except Exception as e:
             st.error(f"An error occurred during calculation: {str(e)}")
             st.error("Please check your input values and try again.")
-    
+
+    show_best_headings(ship_type, key_prefix, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+    show_dispersion_report(ship_type, key_prefix, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+    show_coverage_map(ship_type, key_prefix, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+
+# Function to copy a calculated or fitted wind into the main wind inputs
+# Used as an on_click callback, so the values are in place before the inputs are drawn again
+def transfer_wind(key_prefix, wind_azimuth, wind_strength):
+    st.session_state[f"{key_prefix}wind_azimuth_input"] = wind_azimuth
+    st.session_state[f"{key_prefix}wind_strength_input"] = wind_strength
+    st.session_state[f"{key_prefix}wind_transferred"] = True
+
+# Function to display the single-splash wind calculation and the transfer to the main inputs
+# Runs as a fragment; the ship and commander values are read from the main inputs' session state
+@fragment
+def show_wind_calculation(ship_type, key_prefix):
     # Add a separator
     st.markdown("---")
     st.subheader("Wind Direction and Strength Calculation")
-    
+
     # Create two columns for wind calculation input fields
     wind_col1, wind_col2 = st.columns(2)
-    
+
     with wind_col1:
-        explosion_azimuth = st.number_input("Commander Azimuth to Explosion (Av)", min_value=0.0, max_value=360.0, value=0.0, step=0.1, format="%.1f", key="calahan_explosion_azimuth")
-        explosion_distance = st.number_input("Commander Distance to Explosion (dv)", min_value=0.0, value=100.0, step=0.1, format="%.1f", key="calahan_explosion_distance")
-    
+        explosion_azimuth = st.number_input("Commander Azimuth to Explosion (Av)", min_value=0.0, max_value=360.0, value=0.0, step=0.1, format="%.1f", key=f"{key_prefix}explosion_azimuth")
+        explosion_distance = st.number_input("Commander Distance to Explosion (dv)", min_value=0.0, value=100.0, step=0.1, format="%.1f", key=f"{key_prefix}explosion_distance")
+
     # Button to calculate wind parameters
-    if st.button("Calculate Wind", key="calahan_calculate_wind_button"):
+    result_key = f"{key_prefix}wind_calculation"
+    if st.button("Calculate Wind", key=f"{key_prefix}calculate_wind_button"):
+        from naval_log import MISSION_LOG
+
         try:
-            # Calculate wind parameters (same function as for Frigate calculator)
+            # Calculate wind parameters with the ship's wind reference gun
             wind_azimuth_calc, wind_strength_calc = calculate_wind_parameters(
-                ship_azimuth,
-                commander_azimuth,
-                commander_distance,
+                ship_type,
+                st.session_state[f"{key_prefix}ship_azimuth"],
+                st.session_state[f"{key_prefix}commander_azimuth"],
+                st.session_state[f"{key_prefix}commander_distance"],
                 explosion_azimuth,
                 explosion_distance
             )
-            
+
             # Round to 1 decimal place
-            wind_azimuth_calc = round(wind_azimuth_calc, 1)
-            
-            # Display results
-            st.subheader("Wind Calculation Results")
-            wind_result = f"Wind Azimuth: {wind_azimuth_calc}°, Wind Strength: {wind_strength_calc}"
-            st.text_area("Wind Parameters:", value=wind_result, height=80, key="calahan_wind_result")
-            
-            # Button to transfer wind parameters to main calculation
-            if st.button("Transfer Data", key="calahan_transfer_data_button"):
-                st.session_state.calahan_wind_azimuth_input = wind_azimuth_calc
-                st.session_state.calahan_wind_strength_input = wind_strength_calc
-                st.success("Wind data transferred to main calculation!")
-                st.rerun()
-                
+            st.session_state[result_key] = (round(wind_azimuth_calc, 1), wind_strength_calc)
+            if MISSION_LOG is not None:
+                MISSION_LOG.log_wind(ship_type, st.session_state[f"{key_prefix}ship_azimuth"], st.session_state[f"{key_prefix}commander_azimuth"],
+                                     st.session_state[f"{key_prefix}commander_distance"], explosion_azimuth, explosion_distance,
+                                     wind_azimuth_calc, wind_strength_calc)
+
         except Exception as e:
+            st.session_state.pop(result_key, None)
             st.error(f"An error occurred during wind calculation: {str(e)}")
             st.error("Please check your input values and try again.")
 
+    # Results stay until the next calculation, so the transfer button is not nested in the calculate branch
+    if result_key in st.session_state:
+        wind_azimuth_calc, wind_strength_calc = st.session_state[result_key]
+
+        # Display results
+        st.subheader("Wind Calculation Results")
+        wind_result = f"Wind Azimuth: {wind_azimuth_calc}°, Wind Strength: {wind_strength_calc}"
+        st.text_area("Wind Parameters:", value=wind_result, height=80, key=f"{key_prefix}wind_result")
+
+        # Button to transfer wind parameters to main calculation
+        # The callback sets the inputs, then the whole page reruns so the main section shows them
+        if st.button("Transfer Data", key=f"{key_prefix}transfer_data_button",
+                     on_click=transfer_wind, args=(key_prefix, wind_azimuth_calc, wind_strength_calc)):
+            st.rerun()
+
+    if st.session_state.pop(f"{key_prefix}wind_transferred", False):
+        st.success("Wind data transferred to main calculation!")
+
+# Function to display the wind shared by every ship in a region or grid square (see naval_windstore.py)
+# Refreshes on a timer, so estimates published by other sessions show up without rerunning the whole page
+@fragment(run_every=REGION_WIND_REFRESH)
+def show_shared_wind(ship_type, key_prefix):
+    st.markdown("---")
+    st.subheader("Shared Region Wind")
+    region = st.text_input("Region / Grid Square", key=f"{key_prefix}wind_region", placeholder="e.g. Deadlands C4")
+    if not region.strip():
+        st.write("Enter a region to share wind estimates with the other ships there.")
+        return
+    from naval_windstore import WIND_STORE
+
+    source = f"{script_run_context.session_id if script_run_context is not None else 'local'}:{ship_type}"
+
+    share_col, region_col = st.columns(2)
+    with share_col:
+        calculated = st.session_state.get(f"{key_prefix}wind_calculation")
+        if st.button("Share Calculated Wind", key=f"{key_prefix}share_calculated_button", disabled=calculated is None):
+            WIND_STORE.publish(region, source, *calculated)
+        estimator = st.session_state.get(f"{key_prefix}wind_estimator")
+        if st.button("Share Fitted Wind", key=f"{key_prefix}share_fitted_button", disabled=estimator is None or estimator.count == 0):
+            # A fit of several splashes counts for as many reports
+            WIND_STORE.publish(region, source, *estimator.wind(), weight=estimator.effective_count())
+
+    estimate = WIND_STORE.current(region)
+    with region_col:
+        if estimate is None:
+            st.write("No live wind report for this region.")
+        else:
+            st.write(f"Region Wind Azimuth: {estimate['wind_azimuth']}°, Wind Strength: {estimate['wind_strength']} "
+                     f"(±{estimate['spread']}, {estimate['reports']} report{'s' if estimate['reports'] > 1 else ''}, "
+                     f"{round(estimate['age'] / 60)} min old)")
+            if st.button("Use Region Wind", key=f"{key_prefix}use_region_wind_button",
+                         on_click=transfer_wind, args=(key_prefix, estimate["wind_azimuth"], estimate["wind_strength"])):
+                st.rerun()
+
+# Function to display the CalahanBS calculator
+def show_calahan_calculator():
+    st.title("CalahanBS Artillery Calculator")
+    
+    # Add a back button at the top
+    if st.button("Back to Main Menu"):
+        st.session_state.calculator_type = "main_menu"
+        st.rerun()
+    
+    st.write("This application calculates artillery coordinates for CalahanBS ship guns based on ship position, commander inputs, and wind conditions.")
+
+    # Each section reruns on its own when its widgets change
+    show_main_solution("calahan", "calahan_")
+    show_fire_planner("calahan", "calahan_")
+    show_wind_calculation("calahan", "calahan_")
+    show_wind_fit("calahan", "calahan_")
+    show_shared_wind("calahan", "calahan_")
+
 # Function to display the Frigate calculator
 def show_frigate_calculator():
     st.title("Frigate Artillery Calculator")
@@ -452,101 +453,20 @@ def show_frigate_calculator():
         st.rerun()
     
     st.write("This application calculates artillery coordinates based on ship position, commander inputs, and wind conditions.")
-    
-    # Create two columns for input fields in the main section
-    col1, col2 = st.columns(2)
-    
-    # Input fields for main calculation
-    with col1:
-        st.subheader("Ship and Commander Parameters")
-        ship_azimuth = st.number_input("Ship Azimuth", min_value=0.0, max_value=360.0, value=0.0, step=0.1, format="%.1f")
-        commander_distance = st.number_input("Commander Distance", min_value=0.0, value=100.0, step=0.1, format="%.1f")
-        commander_azimuth = st.number_input("Commander Azimuth", min_value=0.0, max_value=360.0, value=0.0, step=0.1, format="%.1f")
-    
-    with col2:
-        st.subheader("Wind Parameters")
-        st.markdown("<div style='height: 35px;'></div>", unsafe_allow_html=True)  # Small vertical space
-        wind_azimuth = st.number_input("Wind Azimuth", min_value=0.0, max_value=360.0, value=0.0, step=0.1, format="%.1f", key="wind_azimuth_input")
-        wind_strength = st.number_input("Wind Strength", min_value=0.0, value=0.0, step=0.1, format="%.1f", key="wind_strength_input")
-    
-    # Add a button to trigger calculation
-    if st.button("Calculate Artillery Coordinates"):
-        try:
-            # Calculate coordinates
-            A1, d1, A2, d2 = calculate_artillery_coordinates(
-                ship_azimuth, 
-                commander_distance, 
-                commander_azimuth, 
-                wind_azimuth, 
-                wind_strength
-            )
-            
-            # Display results
-            st.subheader("Results")
-            
-            # Format results for each gun
-            if A1 == "No angle":
-                gun1_str = f"Middle Gun: Azimuth (A1): {A1}, Distance (d1): {d1}"
-            else:
-                gun1_str = f"Middle Gun: Azimuth (A1): {A1}°, Distance (d1): {d1}"
-                
-            if A2 == "No angle":
-                gun2_str = f"Rear Gun: Azimuth (A2): {A2}, Distance (d2): {d2}"
-            else:
-                gun2_str = f"Rear Gun: Azimuth (A2): {A2}°, Distance (d2): {d2}"
-            
-            # Combined results in one text area
-            combined_result = f"{gun1_str}\n{gun2_str}"
-            result_container = st.text_area("Calculation Results:", value=combined_result, height=100)
-                
-        except Exception as e:
-            st.error(f"An error occurred during calculation: {str(e)}")
-            st.error("Please check your input values and try again.")
-    
-    # Add a separator
-    st.markdown("---")
-    st.subheader("Wind Direction and Strength Calculation")
-    
-    # Create two columns for wind calculation input fields
-    wind_col1, wind_col2 = st.columns(2)
-    
-    with wind_col1:
-        explosion_azimuth = st.number_input("Commander Azimuth to Explosion (Av)", min_value=0.0, max_value=360.0, value=0.0, step=0.1, format="%.1f")
-        explosion_distance = st.number_input("Commander Distance to Explosion (dv)", min_value=0.0, value=100.0, step=0.1, format="%.1f")
-    
-    # Button to calculate wind parameters
-    if st.button("Calculate Wind"):
-        try:
-            # Calculate wind parameters
-            wind_azimuth_calc, wind_strength_calc = calculate_wind_parameters(
-                ship_azimuth,
-                commander_azimuth,
-                commander_distance,
-                explosion_azimuth,
-                explosion_distance
-            )
-            
-            # Round to 1 decimal place
-            wind_azimuth_calc = round(wind_azimuth_calc, 1)
-            
-            # Display results
-            st.subheader("Wind Calculation Results")
-            wind_result = f"Wind Azimuth: {wind_azimuth_calc}°, Wind Strength: {wind_strength_calc}"
-            st.text_area("Wind Parameters:", value=wind_result, height=80)
-            
-            # Button to transfer wind parameters to main calculation
-            if st.button("Transfer Data"):
-                st.session_state.wind_azimuth_input = wind_azimuth_calc
-                st.session_state.wind_strength_input = wind_strength_calc
-                st.success("Wind data transferred to main calculation!")
-                st.rerun()
-                
-        except Exception as e:
-            st.error(f"An error occurred during wind calculation: {str(e)}")
-            st.error("Please check your input values and try again.")
+
+    # Each section reruns on its own when its widgets change
+    show_main_solution("frigate", "frigate_")
+    show_fire_planner("frigate", "frigate_")
+    show_wind_calculation("frigate", "frigate_")
+    show_wind_fit("frigate", "frigate_")
+    show_shared_wind("frigate", "frigate_")
 
 # Display the appropriate calculator based on the session state
-if st.session_state.calculator_type == "main_menu":
+page = st.session_state.calculator_type
+if ADMIN_KEY and st.query_params.get("admin") == ADMIN_KEY:
+    page = "admin"
+    show_admin_view()
+elif st.session_state.calculator_type == "main_menu":
     show_main_menu()
 elif st.session_state.calculator_type == "frigate":
     show_frigate_calculator()
@@ -555,4 +475,8 @@ elif st.session_state.calculator_type == "calahan":
 
 # Add footer information
 st.markdown("---")
-st.markdown("Naval Artillery Calculator - For simulation purposes only")
\ No newline at end of file
+st.markdown("Naval Artillery Calculator - For simulation purposes only")
+
+# Record the rerun and refresh the metrics file if one is configured
+METRICS.observe_rerun(page, time.perf_counter() - rerun_start)
+METRICS.write_file()
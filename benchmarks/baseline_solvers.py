@@ -0,0 +1,308 @@
+# Baseline solvers: the three original functions of NavalCalcWarden.py (commit 3f87b18), kept as the
+# oracle of benchmarks/fuzz_solvers.py. They are copied as they were; the only change is that
+# calculate_wind_parameters takes the calculator type ("frigate" or "calahan") as its first argument
+# instead of reading st.session_state.calculator_type. Do not fix or tidy this code: the fuzzer checks
+# the current solvers against exactly this behaviour, and the documented divergences are listed there.
+import math
+
+# Function to convert degrees to radians
+def to_radians(degrees):
+    return degrees * math.pi / 180
+
+# Function to convert radians to degrees
+def to_degrees(radians):
+    return radians * 180 / math.pi
+
+# Function to calculate artillery coordinates
+def calculate_artillery_coordinates(ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    # Step 1: Calculate target coordinates with wind adjustment
+    x0 = 1000 + (math.cos(to_radians(commander_azimuth)) * commander_distance) - (math.cos(to_radians(wind_azimuth)) * wind_strength)
+    y0 = 1000 + (math.sin(to_radians(commander_azimuth)) * commander_distance) - (math.sin(to_radians(wind_azimuth)) * wind_strength)
+    
+    # Step 2: Calculate gun positions based on ship azimuth
+    # First gun
+    x1 = 1000 + (-1 * (math.cos(to_radians(ship_azimuth)) * 6.4))
+    y1 = 1000 + (-1 * (math.sin(to_radians(ship_azimuth)) * 6.4))
+    
+    # Second gun
+    x2 = 1000 + (-1 * (math.cos(to_radians(ship_azimuth)) * 19.8))
+    y2 = 1000 + (-1 * (math.sin(to_radians(ship_azimuth)) * 19.8))
+    
+    # Step 3: Calculate differences between guns and target
+    dx1 = x0 - x1
+    dy1 = y0 - y1
+    dx2 = x0 - x2
+    dy2 = y0 - y2
+    
+    # Step 4: Calculate bearing (rumb) for each gun
+    # First gun bearing
+    if dx1 != 0:  # Prevent division by zero
+        angle1 = to_degrees(math.atan(dy1 / dx1))
+        r1 = abs(angle1) if angle1 >= 0 else abs(angle1)
+    else:
+        r1 = 90 if dy1 > 0 else 270
+    
+    # Second gun bearing
+    if dx2 != 0:  # Prevent division by zero
+        angle2 = to_degrees(math.atan(dy2 / dx2))
+        r2 = abs(angle2) if angle2 >= 0 else abs(angle2)
+    else:
+        r2 = 90 if dy2 > 0 else 270
+    
+    # Step 5: Calculate final azimuth for each gun
+    # First gun azimuth
+    if dy1 > 0 and dx1 > 0:
+        A1 = r1
+    elif dy1 > 0 and dx1 < 0:
+        A1 = 180 - r1
+    elif dy1 < 0 and dx1 < 0:
+        A1 = 180 + r1
+    else:  # dy1 < 0 and dx1 > 0
+        A1 = 360 - r1
+    
+    # Second gun azimuth
+    if dy2 > 0 and dx2 > 0:
+        A2 = r2
+    elif dy2 > 0 and dx2 < 0:
+        A2 = 180 - r2
+    elif dy2 < 0 and dx2 < 0:
+        A2 = 180 + r2
+    else:  # dy2 < 0 and dx2 > 0
+        A2 = 360 - r2
+    
+    # Step 6: Calculate distance for each gun
+    d1 = math.sqrt(dx1**2 + dy1**2)
+    d2 = math.sqrt(dx2**2 + dy2**2)
+    
+    # Step 7: Check if gun 1 can fire (firing angle constraints)
+    left = ship_azimuth - 30
+    if left < 0:
+        left = ship_azimuth + 330
+    
+    right = ship_azimuth + 30
+    if right > 360:
+        right = ship_azimuth - 330
+    
+    # Determine if gun 1 can fire
+    if left < right:
+        s1 = 0 if (A1 > left and A1 < right) else 1
+    else:
+        s1 = 1 if (A1 < left and A1 > right) else 0
+    
+    # If s1 = 0, set A1 to "No angle"
+    if s1 == 0:
+        A1_display = "No angle"
+    else:
+        A1_display = round(A1, 1)
+        
+    # Round results to one decimal place
+    d1 = round(d1, 1)
+    A2 = round(A2, 1)
+    d2 = round(d2, 1)
+    
+    return A1_display, d1, A2, d2
+
+# Function to calculate artillery coordinates for CalahanBS
+def calculate_calahan_artillery_coordinates(ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    # Step 1: Calculate target coordinates with wind adjustment
+    x0 = 1000 + (math.cos(to_radians(commander_azimuth)) * commander_distance) - (math.cos(to_radians(wind_azimuth)) * wind_strength)
+    y0 = 1000 + (math.sin(to_radians(commander_azimuth)) * commander_distance) - (math.sin(to_radians(wind_azimuth)) * wind_strength)
+    
+    # Step 2: Calculate gun positions based on ship azimuth
+    # Front gun
+    x1 = 1000 + (math.cos(to_radians(ship_azimuth)) * 11)
+    y1 = 1000 + (math.sin(to_radians(ship_azimuth)) * 11)
+    
+    # Middle gun
+    x2 = 1000 + (-1 * (math.cos(to_radians(ship_azimuth)) * 11))
+    y2 = 1000 + (-1 * (math.sin(to_radians(ship_azimuth)) * 11))
+    
+    # Rear gun
+    x3 = 1000 + (-1 * (math.cos(to_radians(ship_azimuth)) * 26))
+    y3 = 1000 + (-1 * (math.sin(to_radians(ship_azimuth)) * 26))
+    
+    # Step 3: Calculate differences between guns and target
+    dx1 = x0 - x1
+    dy1 = y0 - y1
+    dx2 = x0 - x2
+    dy2 = y0 - y2
+    dx3 = x0 - x3
+    dy3 = y0 - y3
+    
+    # Step 4: Calculate bearing (rumb) for each gun
+    # Front gun bearing
+    if dx1 != 0:  # Prevent division by zero
+        angle1 = to_degrees(math.atan(dy1 / dx1))
+        r1 = abs(angle1) if angle1 >= 0 else abs(angle1)
+    else:
+        r1 = 90 if dy1 > 0 else 270
+    
+    # Middle gun bearing
+    if dx2 != 0:  # Prevent division by zero
+        angle2 = to_degrees(math.atan(dy2 / dx2))
+        r2 = abs(angle2) if angle2 >= 0 else abs(angle2)
+    else:
+        r2 = 90 if dy2 > 0 else 270
+    
+    # Rear gun bearing
+    if dx3 != 0:  # Prevent division by zero
+        angle3 = to_degrees(math.atan(dy3 / dx3))
+        r3 = abs(angle3) if angle3 >= 0 else abs(angle3)
+    else:
+        r3 = 90 if dy3 > 0 else 270
+    
+    # Step 5: Calculate final azimuth for each gun
+    # Front gun azimuth
+    if dy1 > 0 and dx1 > 0:
+        A1 = r1
+    elif dy1 > 0 and dx1 < 0:
+        A1 = 180 - r1
+    elif dy1 < 0 and dx1 < 0:
+        A1 = 180 + r1
+    else:  # dy1 < 0 and dx1 > 0
+        A1 = 360 - r1
+    
+    # Middle gun azimuth
+    if dy2 > 0 and dx2 > 0:
+        A2 = r2
+    elif dy2 > 0 and dx2 < 0:
+        A2 = 180 - r2
+    elif dy2 < 0 and dx2 < 0:
+        A2 = 180 + r2
+    else:  # dy2 < 0 and dx2 > 0
+        A2 = 360 - r2
+    
+    # Rear gun azimuth
+    if dy3 > 0 and dx3 > 0:
+        A3 = r3
+    elif dy3 > 0 and dx3 < 0:
+        A3 = 180 - r3
+    elif dy3 < 0 and dx3 < 0:
+        A3 = 180 + r3
+    else:  # dy3 < 0 and dx3 > 0
+        A3 = 360 - r3
+    
+    # Step 6: Calculate distance for each gun
+    d1 = math.sqrt(dx1**2 + dy1**2)
+    d2 = math.sqrt(dx2**2 + dy2**2)
+    d3 = math.sqrt(dx3**2 + dy3**2)
+    
+    # Step 7: Check firing angle constraints for each gun
+    # Front gun constraints
+    left1 = ship_azimuth - 135
+    if left1 < 0:
+        left1 = ship_azimuth + 225
+    
+    right1 = ship_azimuth + 135
+    if right1 > 360:
+        right1 = ship_azimuth - 225
+    
+    # Middle and Rear gun constraints (they are the same)
+    left2 = ship_azimuth - 45
+    if left2 < 0:
+        left2 = ship_azimuth + 315
+    
+    right2 = ship_azimuth + 45
+    if right2 > 360:
+        right2 = ship_azimuth - 315
+    
+    # Determine if guns can fire based on angle constraints
+    # Front gun
+    if left1 < right1:
+        s1 = 1 if (A1 > left1 and A1 < right1) else 0
+    else:
+        s1 = 0 if (A1 < left1 and A1 > right1) else 1
+    
+    # Middle gun - проверяем, попадает ли азимут в диапазон ограничений
+    if left2 < right2:
+        s2 = 0 if (A2 >= left2 and A2 <= right2) else 1
+    else:
+        s2 = 0 if (A2 >= left2 or A2 <= right2) else 1
+    
+    # Rear gun - проверяем, попадает ли азимут в диапазон ограничений
+    if left2 < right2:
+        s3 = 0 if (A3 >= left2 and A3 <= right2) else 1
+    else:
+        s3 = 0 if (A3 >= left2 or A3 <= right2) else 1
+    
+    # Apply "No angle" if gun can't fire
+    if s1 == 0:
+        A1_display = "No angle"
+    else:
+        A1_display = round(A1, 1)
+        
+    if s2 == 0:
+        A2_display = "No angle"
+    else:
+        A2_display = round(A2, 1)
+        
+    if s3 == 0:
+        A3_display = "No angle"
+    else:
+        A3_display = round(A3, 1)
+    
+    # Round distances to one decimal place
+    d1 = round(d1, 1)
+    d2 = round(d2, 1)
+    d3 = round(d3, 1)
+    
+    return A1_display, d1, A2_display, d2, A3_display, d3
+
+# Function to calculate wind parameters based on shell landing point
+def calculate_wind_parameters(calculator_type, ship_azimuth, commander_azimuth, commander_distance, 
+                              explosion_azimuth, explosion_distance):
+    # For Frigate, we use gun 2 as reference
+    # For CalahanBS, we should use the middle gun (gun 2) as reference
+    # Since the calculation is the same principle, we'll use the same function for both
+    
+    # Calculate gun position (using gun 2 as a reference)
+    if calculator_type == "frigate":
+        # For Frigate, gun 2 is at -19.8 distance
+        x2 = 1000 + (-1 * (math.cos(to_radians(ship_azimuth)) * 19.8))
+        y2 = 1000 + (-1 * (math.sin(to_radians(ship_azimuth)) * 19.8))
+    else:
+        # For CalahanBS, the middle gun (gun 2) is at -11 distance
+        x2 = 1000 + (-1 * (math.cos(to_radians(ship_azimuth)) * 11))
+        y2 = 1000 + (-1 * (math.sin(to_radians(ship_azimuth)) * 11))
+    
+    # Calculate expected shell landing coordinates
+    xm = x2 + (math.cos(to_radians(commander_azimuth)) * commander_distance)
+    ym = y2 + (math.sin(to_radians(commander_azimuth)) * commander_distance)
+    
+    # Calculate actual shell landing coordinates
+    xf = 1000 + (math.cos(to_radians(explosion_azimuth)) * explosion_distance)
+    yf = 1000 + (math.sin(to_radians(explosion_azimuth)) * explosion_distance)
+    
+    # Calculate difference
+    dxv = xf - xm
+    dyv = yf - ym
+    
+    # Calculate wind azimuth
+    if dxv != 0:  # Prevent division by zero
+        angle_v = to_degrees(math.atan(dyv / dxv))
+        rv = abs(angle_v) if angle_v >= 0 else abs(angle_v)
+    else:
+        rv = 90 if dyv > 0 else 270
+    
+    # Calculate final wind azimuth
+    if dyv > 0 and dxv > 0:
+        Av = rv
+    elif dyv > 0 and dxv < 0:
+        Av = 180 - rv
+    elif dyv < 0 and dxv < 0:
+        Av = 180 + rv
+    else:  # dyv < 0 and dxv > 0
+        Av = 360 - rv
+    
+    # Calculate wind strength
+    dv = math.sqrt(dxv**2 + dyv**2)
+    # Round wind strength to nearest 10
+    dv = round(dv / 10) * 10
+    
+    return Av, dv
+
+# Baseline solver of each ship type, returning the display tuple (azimuth or "No angle", distance) per gun
+BASELINE_SOLVERS = {
+    "frigate": calculate_artillery_coordinates,
+    "calahan": calculate_calahan_artillery_coordinates,
+}
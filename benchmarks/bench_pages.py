@@ -0,0 +1,43 @@
+# End-to-end timings of full script reruns for each screen, using Streamlit's headless app-testing harness
+import os
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.timing import measure
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NavalCalcWarden.py")
+# Screens by the calculator_type value that selects them
+SCREENS = {
+    "show_main_menu": "main_menu",
+    "show_frigate_calculator": "frigate",
+    "show_calahan_calculator": "calahan",
+}
+
+# Function to open the app on one screen
+def open_screen(calculator_type):
+    app = AppTest.from_file(APP_PATH, default_timeout=30)
+    app.run()
+    app.session_state.calculator_type = calculator_type
+    app.run()
+    return app
+
+# Function to click a button by its label and rerun the script
+def click(app, label):
+    next(button for button in app.button if button.label == label).click().run()
+
+# Function to run every page benchmark
+def run(quick=False):
+    results = {}
+    number = 3 if quick else 10
+    repeat = 3 if quick else 5
+    for screen, calculator_type in SCREENS.items():
+        app = open_screen(calculator_type)
+        results[f"page.{screen}.rerun"] = measure(app.run, number=number, repeat=repeat)
+        if calculator_type != "main_menu":
+            results[f"page.{screen}.calculate"] = measure(
+                lambda: click(app, "Calculate Artillery Coordinates"), number=number, repeat=repeat
+            )
+            results[f"page.{screen}.calculate_wind"] = measure(
+                lambda: click(app, "Calculate Wind"), number=number, repeat=repeat
+            )
+    return results
@@ -0,0 +1,175 @@
+# Micro-benchmarks for the scalar solvers, the batch engine and the lookup tables
+# Inputs follow what crews enter: 0.1 degree headings and bearings, commander distances of 50-350
+# and winds of up to 50, all on the 0.1 step of the number inputs.
+import inspect
+import math
+import os
+import random
+import tempfile
+
+import numpy as np
+
+from benchmarks.timing import measure
+from naval_core import SHIP_TYPES, calculate_artillery_coordinates, calculate_azimuth, calculate_calahan_artillery_coordinates, calculate_firing_solution, calculate_wind_parameters, to_radians
+from naval_dispersion import DEFAULT_ERRORS, DEFAULT_RADIUS, DEFAULT_SAMPLES, DispersionReport
+from naval_engine import solve_guns_batch
+from naval_fleet import Fleet, fleet_chat_lines, solve_fleet
+from naval_heading import HeadingSweep, best_headings
+from naval_log import MissionLog, analyze_log, read_log
+from naval_coverage import CoverageMap, render_coverage
+from naval_planner import plan_fire
+from naval_stream import stream_solutions
+from naval_tables import FiringTable, build_table
+from wind_estimator import WindEstimator, fit_wind, splash_drifts_batch
+
+SCALAR_MISSIONS = 2000
+BATCH_SIZE = 100_000
+
+# Function to draw one input on the 0.1 step grid
+def draw(rng, low, high):
+    return round(rng.uniform(low, high), 1)
+
+# Function to generate realistic scalar fire missions
+def scalar_missions(count, seed=1):
+    rng = random.Random(seed)
+    return [
+        (draw(rng, 0, 360), draw(rng, 50, 350), draw(rng, 0, 360), draw(rng, 0, 360), draw(rng, 0, 50))
+        for _ in range(count)
+    ]
+
+# Function to generate realistic batch inputs for one ship heading
+def batch_inputs(size, seed=1):
+    rng = np.random.default_rng(seed)
+    return (
+        np.round(rng.uniform(50, 350, size), 1),
+        np.round(rng.uniform(0, 360, size), 1),
+        np.round(rng.uniform(0, 360, size), 1),
+        np.round(rng.uniform(0, 50, size), 1),
+    )
+
+# Function to run every solver benchmark
+def run(quick=False):
+    results = {}
+    missions = scalar_missions(SCALAR_MISSIONS // 10 if quick else SCALAR_MISSIONS)
+    repeat = 3 if quick else 5
+
+    # Scalar solvers without the solution cache (the raw cost of one rerun's solve)
+    scalar_functions = {
+        "frigate": calculate_artillery_coordinates,
+        "calahan": calculate_calahan_artillery_coordinates,
+    }
+    solve = inspect.unwrap(calculate_firing_solution)
+    for ship_type, function in scalar_functions.items():
+        results[f"scalar.{ship_type}"] = measure(
+            lambda: [solve(ship_type, *mission) for mission in missions], repeat=repeat, items=len(missions)
+        )
+        # Cached path, every mission already in the cache
+        results[f"scalar.{ship_type}.cached"] = measure(
+            lambda: [function(*mission) for mission in missions], repeat=repeat, items=len(missions)
+        )
+
+    wind = inspect.unwrap(calculate_wind_parameters)
+    for ship_type in scalar_functions:
+        splashes = [(ship_type, sa, ca, cd, wa, cd + ws) for sa, cd, ca, wa, ws in missions]
+        results[f"wind.{ship_type}"] = measure(
+            lambda: [wind(*splash) for splash in splashes], repeat=repeat, items=len(splashes)
+        )
+
+    # Multi-splash wind estimator, one session's splashes under one wind read with spotting noise:
+    # one O(1) update per splash, and one robust refit of all splashes
+    spot_rng = random.Random(2)
+    offset = SHIP_TYPES["calahan"].guns[1][0]
+    splashes = []
+    for sa, cd, ca, _, _ in missions:
+        x = math.cos(to_radians(sa)) * offset + math.cos(to_radians(ca)) * cd + 20.0 + spot_rng.gauss(0, 3)
+        y = math.sin(to_radians(sa)) * offset + math.sin(to_radians(ca)) * cd + 10.0 + spot_rng.gauss(0, 3)
+        splashes.append((sa, 1, ca, cd, calculate_azimuth(x, y), math.hypot(x, y)))
+    estimator = WindEstimator()
+
+    def add_splashes():
+        estimator.reset()
+        return [estimator.add_splash("calahan", *splash, timestamp=index) for index, splash in enumerate(splashes)]
+
+    results["wind.estimator.add"] = measure(add_splashes, repeat=repeat, items=len(splashes))
+    drifts = splash_drifts_batch("calahan", *(np.array(column) for column in zip(*splashes)))
+    results["wind.estimator.fit"] = measure(lambda: fit_wind(drifts), repeat=repeat, items=len(drifts))
+
+    # Streaming re-solve of one target while the ship turns 0.01 degree per update
+    updates = [(index, (index * 0.01) % 360) for index in range(len(missions) * 10)]
+    for ship_type in scalar_functions:
+        results[f"stream.{ship_type}"] = measure(
+            lambda: list(stream_solutions(ship_type, updates, 150.0, 75.5, 210.0, 20.0)), repeat=repeat, items=len(updates)
+        )
+
+    # Batch engine, one ship heading against many commander/wind tuples
+    size = BATCH_SIZE // 10 if quick else BATCH_SIZE
+    commander_distance, commander_azimuth, wind_azimuth, wind_strength = batch_inputs(size)
+    for ship_type in scalar_functions:
+        results[f"batch.{ship_type}"] = measure(
+            lambda: solve_guns_batch(ship_type, 123.4, commander_distance, commander_azimuth, wind_azimuth, wind_strength, decimals=1),
+            repeat=repeat, items=size,
+        )
+
+    # Full 3600 x 60 coverage map of one heading (uncached) and its rendering
+    for ship_type in scalar_functions:
+        results[f"coverage.{ship_type}"] = measure(
+            lambda: CoverageMap(ship_type, 123.4, 210.0, 20.0, 300.0, 5.0), repeat=repeat, items=1,
+        )
+        coverage = CoverageMap(ship_type, 123.4, 210.0, 20.0, 300.0, 5.0)
+        results[f"coverage.{ship_type}.render"] = measure(lambda: render_coverage(coverage), repeat=repeat, items=1)
+
+    # Best-heading sweep of one target over all 3600 headings (uncached), and the ranking that reruns per heading
+    for ship_type in scalar_functions:
+        results[f"heading.{ship_type}"] = measure(lambda: HeadingSweep(ship_type, 150.0, 75.5, 210.0, 20.0), repeat=repeat, items=1)
+        results[f"heading.{ship_type}.rank"] = measure(
+            lambda: [best_headings(ship_type, sa, 150.0, 75.5, 210.0, 20.0) for sa, _, _, _, _ in missions[:100]], repeat=repeat, items=100
+        )
+
+    # Monte Carlo dispersion report of one input set (uncached)
+    for ship_type in scalar_functions:
+        results[f"dispersion.{ship_type}"] = measure(
+            lambda: DispersionReport(ship_type, (123.4, 150.0, 75.5, 210.0, 20.0), DEFAULT_ERRORS, DEFAULT_SAMPLES, DEFAULT_RADIUS, 0),
+            repeat=repeat, items=DEFAULT_SAMPLES,
+        )
+
+    # Multi-target fire plan of 50 targets
+    targets = [(cd, ca) for _, cd, ca, _, _ in missions[:50]]
+    for ship_type in scalar_functions:
+        results[f"planner.{ship_type}.50"] = measure(lambda: plan_fire(ship_type, 123.4, targets, 210.0, 20.0), repeat=repeat, items=1)
+
+    # Fleet fire call: 8 ships of both types, 50 targets from two spotters, solved and turned into chat lines
+    fleet = Fleet(
+        [{"ship": ship_type, "heading": sa, "x": cd, "y": -ca} for ship_type, (sa, cd, ca, _, _) in zip(list(scalar_functions) * 4, missions[50:58])],
+        {"alpha": (0.0, 0.0), "bravo": (250.0, -40.0)},
+    )
+    fleet_targets = [("alpha" if number % 2 else "bravo", cd, ca) for number, (cd, ca) in enumerate(targets)]
+    results["fleet.8x50"] = measure(lambda: fleet_chat_lines(solve_fleet(fleet, fleet_targets, 210.0, 20.0)), repeat=repeat, items=1)
+
+    # Lookup tables, built into a temporary directory on the default grid the calculators use (0.1 degree bearings,
+    # 0.5 distances up to 400) so the 0.1-grid missions are answered from the table rather than falling back
+    with tempfile.TemporaryDirectory() as directory:
+        for ship_type in scalar_functions:
+            build_table(ship_type, directory, bearing_step=0.1, distance_step=0.5, max_distance=400.0)
+            table = FiringTable(ship_type, directory)
+            results[f"table.{ship_type}.scalar"] = measure(
+                lambda: [table.lookup_display_values(sa, cd, ca, 0.0, 0.0) for sa, cd, ca, _, _ in missions],
+                repeat=repeat, items=len(missions),
+            )
+            results[f"table.{ship_type}.batch"] = measure(
+                lambda: table.lookup_batch(123.4, commander_distance, commander_azimuth, wind_azimuth, wind_strength),
+                repeat=repeat, items=size,
+            )
+            del table
+
+        # Mission log: one appended record per scalar mission, then a scan of everything appended
+        log_path = os.path.join(directory, "missions.log")
+        mission_log = MissionLog(log_path)
+        solution = calculate_firing_solution("calahan", *missions[0])
+        results["log.append"] = measure(
+            lambda: [mission_log.log_fire(*mission, solution) for mission in missions], repeat=repeat, items=len(missions)
+        )
+        mission_log.close()
+        record_count = len(read_log(log_path))
+        results["log.scan"] = measure(lambda: analyze_log(read_log(log_path)), repeat=repeat, items=record_count)
+
+    return results
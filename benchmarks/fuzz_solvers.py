@@ -0,0 +1,588 @@
+# Differential fuzzing of every fast solver path against the original baseline solvers
+# The oracle is benchmarks/baseline_solvers.py: calculate_artillery_coordinates,
+# calculate_calahan_artillery_coordinates and calculate_wind_parameters exactly as NavalCalcWarden.py had them
+# (commit 3f87b18). Every faster path, including the current scalar solvers, solves the same generated inputs
+# in the same run and each result is compared with the baseline's displayed values (azimuths and distances to
+# one decimal, "No angle" where a gun cannot fire; 360.0 equals 0.0 on the circle). Per path the report counts
+# rows that match exactly, rows within the rounding tolerance (a value on a 0.05 rounding edge may round the
+# other way), documented edge rows and mismatches, and records the path's throughput next to the baseline's,
+# so a speed-up cannot silently change firing solutions.
+#
+# Edge rows are the known divergences from the baseline, and nothing else:
+#     axis     the gun-to-target vector has dx == 0 or dy == 0; the baseline quadrant code then returns a
+#              wrong azimuth (dy == 0 behind the gun gives 360 for 180, dx == 0 gives 270 for 90 and 90 for
+#              270) and tests the firing arc with it, where the current solvers use atan2
+#     arc      can-fire of a bearing within ARC_TOLERANCE of an arc edge; the baseline tests some edges
+#              strictly and some inclusively, the current solvers test the arc projection
+#     on_gun   a target on the gun itself (under ON_GUN_DISTANCE), where any azimuth aims at it
+# Any other difference, and any distance beyond the rounding tolerance, is a mismatch.
+#
+# Inputs are random (on the 0.1 input grid and off it) plus boundary-focused sets per ship:
+#     axes       headings and bearings of 0, 90, 180, 270 and 360, targets on the guns (dx == 0 or dy == 0)
+#     wrap       headings and bearings around 0/360, so gun azimuths cross the wrap
+#     abeam      targets straight abeam, ahead or astern of each gun (dx == 0 in the ship frame)
+#     arc-edge   targets on and just inside/outside every firing arc edge
+#     table      wind-free targets on the lookup table grid
+#     sweep      targets over all 3600 headings (heading optimizer)
+#     coverage   coverage map grids
+# Only ship types with a baseline solver (BASELINE_SOLVERS) are fuzzed.
+#
+# Usage: python -m benchmarks.fuzz_solvers [--count 1000000] [--scalar-limit 100000] [--seed 1] [--ship frigate] [--output fuzz.json]
+# The exit status is 1 when any path has a mismatch.
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks import baseline_solvers
+from naval_core import SHIP_TYPES, calculate_firing_solution, calculate_wind_parameters, solve_firing_solution, solve_guns, to_radians
+from naval_coverage import DEFAULT_DISTANCE_STEP, DEFAULT_MAX_DISTANCE, COVERAGE_AZIMUTHS, CoverageMap
+from naval_engine import solve_guns_batch, solve_solutions_batch
+from naval_export import iter_chat_batches, iter_csv
+from naval_fleet import Fleet, solve_fleet
+from naval_heading import SWEEP_HEADINGS, HeadingSweep
+from naval_log import MissionLog, read_log
+from naval_stream import StreamingSolver
+from naval_tables import FiringTable, build_table
+from solution_cache import SOLUTION_CACHE
+from wind_estimator import splash_drifts_batch
+
+DEFAULT_COUNT = 1_000_000
+# Per-call Python paths only see this many inputs per ship (boundary sets first)
+DEFAULT_SCALAR_LIMIT = 100_000
+# Largest difference of a displayed azimuth or distance that still counts as rounding (one 0.1 step)
+ROUNDING_TOLERANCE = 0.1 + 1e-6
+# Largest difference of wind azimuths, which the baseline does not round
+WIND_TOLERANCE = 1e-6
+# Degrees from an arc edge within which floating point may decide can-fire either way
+ARC_TOLERANCE = 1e-6
+# Distance below which a target is on the gun (shown as 0.0); any azimuth aims at it
+ON_GUN_DISTANCE = 0.05
+# Rows per fleet fire call in the fleet path
+FLEET_CHUNK = 16
+# Mismatching rows kept as examples per path
+EXAMPLE_COUNT = 5
+FIELDS = ["ship_azimuth", "commander_distance", "commander_azimuth", "wind_azimuth", "wind_strength"]
+
+# Function to draw values on a grid of step between low and high (inclusive)
+def grid(rng, low, high, size, step=0.1):
+    return np.round(rng.integers(round(low / step), round(high / step) + 1, size) * step, 1)
+
+# Function to stack input columns into (n, 5) rows of FIELDS
+def rows(ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    return np.column_stack(np.broadcast_arrays(*(np.asarray(value, dtype=np.float64) for value in (
+        ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength))))
+
+# Function to turn targets given in a ship's frame (gun axis along x) into commander inputs with a wind
+def ship_frame_rows(ship_azimuth, along, across, wind_azimuth, wind_strength):
+    ship_radians = to_radians(ship_azimuth)
+    wind_radians = to_radians(wind_azimuth)
+    # The commander sees the target plus the wind drift the solvers take off again
+    x = along * np.cos(ship_radians) - across * np.sin(ship_radians) + np.cos(wind_radians) * wind_strength
+    y = along * np.sin(ship_radians) + across * np.cos(ship_radians) + np.sin(wind_radians) * wind_strength
+    return rows(ship_azimuth, np.hypot(x, y), np.degrees(np.arctan2(y, x)) % 360, wind_azimuth, wind_strength)
+
+# Function to generate the named input sets of one ship type
+# Returns (name, tags, rows) tuples; "grid" rows lie on the 0.1 input grid, "table" rows also on the lookup
+# table grid, "sweep" and "coverage" rows are laid out for the heading optimizer and the coverage map
+def make_input_sets(ship_type, rng, count):
+    ship = SHIP_TYPES[ship_type]
+    sets = []
+
+    # Axis-aligned headings, bearings and winds, with targets at the guns' own offsets
+    headings = np.array([0.0, 0.1, 90.0, 180.0, 270.0, 359.9, 360.0])
+    bearings = np.array([0.0, 0.1, 90.0, 180.0, 270.0, 359.9])
+    distances = np.unique(np.round([0.0, 0.1, 50.0, 100.0, 399.9] + [abs(offset) for offset, _, _, _ in ship.guns], 1))
+    winds = np.array([[0.0, 0.0], [0.0, 10.0], [90.0, 10.0], [180.0, 25.0], [270.0, 5.0]])
+    sa, cd, ca, wind = (axis.ravel() for axis in np.meshgrid(headings, distances, bearings, np.arange(len(winds)), indexing="ij"))
+    sets.append(("axes", {"grid"}, rows(sa, cd, ca, winds[wind, 0], winds[wind, 1])))
+
+    # Headings and bearings around the 0/360 wrap
+    size = max(count // 50, 1000)
+    near_wrap = lambda: np.round((grid(rng, -2, 2, size) + 360) % 360, 1)
+    sets.append(("wrap", {"grid"}, rows(near_wrap(), grid(rng, 0, 400, size), near_wrap(), near_wrap(), grid(rng, 0, 50, size))))
+
+    # Targets abeam of each gun (dx == 0) and straight ahead or astern of it (across == 0)
+    size = max(count // 200, 200)
+    for offset, _, _, _ in ship.guns:
+        for along, across in ((offset, rng.uniform(-400, 400, size)), (offset + rng.uniform(-400, 400, size), 0.0)):
+            sets.append(("abeam", set(), ship_frame_rows(grid(rng, 0, 360, size), along, across, grid(rng, 0, 360, size), grid(rng, 0, 50, size))))
+
+    # Targets on the arc edges of every gun with a limited arc, and just inside and outside them
+    for offset, arc_cos, arc_sin, arc_limit in ship.guns:
+        if arc_limit == -math.inf:
+            continue
+        center = math.degrees(math.atan2(arc_sin, arc_cos))
+        half_width = math.degrees(math.acos(arc_limit))
+        for edge in (center - half_width, center + half_width):
+            for delta in (-0.05, -1e-7, 0.0, 1e-7, 0.05):
+                bearing = np.radians(edge + delta)
+                reach = rng.uniform(1, 400, size)
+                sets.append(("arc-edge", set(), ship_frame_rows(
+                    grid(rng, 0, 360, size), offset + reach * np.cos(bearing), reach * np.sin(bearing), grid(rng, 0, 360, size), grid(rng, 0, 50, size)
+                )))
+
+    # Wind-free targets on the lookup table grid (0.1 degree bearings, 0.5 distances)
+    size = max(count // 4, 1000)
+    sets.append(("table", {"grid", "table"}, rows(grid(rng, 0, 360, size), grid(rng, 0, 400, size, 0.5), grid(rng, 0, 360, size), 0.0, 0.0)))
+
+    # Heading sweeps: every heading for a few targets
+    for _ in range(max(count // 100_000, 2)):
+        target = (grid(rng, 0, 400, 1)[0], grid(rng, 0, 360, 1)[0], grid(rng, 0, 360, 1)[0], grid(rng, 0, 50, 1)[0])
+        sets.append(("sweep", {"grid", "sweep"}, rows(SWEEP_HEADINGS, *target)))
+
+    # Coverage maps: every bearing and distance of the map grid for a heading and wind
+    commander_distances = np.arange(1, math.floor(DEFAULT_MAX_DISTANCE / DEFAULT_DISTANCE_STEP) + 1) * DEFAULT_DISTANCE_STEP
+    for _ in range(max(count // 500_000, 1)):
+        ship_azimuth, wind_azimuth, wind_strength = grid(rng, 0, 360, 1)[0], grid(rng, 0, 360, 1)[0], grid(rng, 0, 50, 1)[0]
+        ca, cd = (axis.ravel() for axis in np.meshgrid(COVERAGE_AZIMUTHS, commander_distances, indexing="ij"))
+        sets.append(("coverage", {"grid", "coverage"}, rows(ship_azimuth, cd, ca, wind_azimuth, wind_strength)))
+
+    # Random missions on the input grid and off it
+    sets.append(("random", {"grid"}, rows(grid(rng, 0, 360, count), grid(rng, 0, 400, count), grid(rng, 0, 360, count), grid(rng, 0, 360, count), grid(rng, 0, 50, count))))
+    size = max(count // 4, 1000)
+    sets.append(("offgrid", set(), rows(rng.uniform(0, 360, size), rng.uniform(0, 400, size), rng.uniform(0, 360, size), rng.uniform(0, 360, size), rng.uniform(0, 50, size))))
+    return sets
+
+# Function to solve rows with the baseline solver of a ship type
+# Returns the displayed azimuths (NaN for "No angle"), distances and can-fire flags of shape (row, gun) and the seconds it took
+def reference(ship_type, inputs):
+    solver = baseline_solvers.BASELINE_SOLVERS[ship_type]
+    rows_list = inputs.tolist()
+    start = time.perf_counter()
+    solutions = [solver(*row) for row in rows_list]
+    seconds = time.perf_counter() - start
+    azimuths = np.array([[math.nan if azimuth == "No angle" else azimuth for azimuth in solution[0::2]] for solution in solutions], dtype=np.float64)
+    distances = np.array([solution[1::2] for solution in solutions], dtype=np.float64)
+    return azimuths, distances, ~np.isnan(azimuths), seconds
+
+# Function to mark the documented edge cases of the baseline per (row, gun) (untimed)
+# The gun-to-target vector is recomputed with the baseline's own arithmetic (map origin at 1000, 1000) so that
+# dx == 0 and dy == 0 are exactly the cases its quadrant code gets wrong.
+# Returns {"axis": mask, "arc": mask, "on_gun": mask}
+def baseline_edges(ship_type, inputs):
+    guns = SHIP_TYPES[ship_type].guns
+    axis = np.zeros((len(inputs), len(guns)), dtype=bool)
+    bearings = np.zeros(axis.shape)
+    distances = np.zeros(axis.shape)
+    radians = baseline_solvers.to_radians
+    for row, (sa, cd, ca, wa, ws) in enumerate(inputs.tolist()):
+        x0 = 1000 + (math.cos(radians(ca)) * cd) - (math.cos(radians(wa)) * ws)
+        y0 = 1000 + (math.sin(radians(ca)) * cd) - (math.sin(radians(wa)) * ws)
+        for gun, (offset, _, _, _) in enumerate(guns):
+            # -1 * (cos * 6.4) is exactly cos * -6.4, so the gun positions match the baseline bit for bit
+            dx = x0 - (1000 + math.cos(radians(sa)) * offset)
+            dy = y0 - (1000 + math.sin(radians(sa)) * offset)
+            axis[row, gun] = dx == 0 or dy == 0
+            bearings[row, gun] = math.degrees(math.atan2(dy, dx)) - sa
+            distances[row, gun] = math.hypot(dx, dy)
+
+    arc = np.zeros(axis.shape, dtype=bool)
+    for gun, (_, arc_cos, arc_sin, arc_limit) in enumerate(guns):
+        if arc_limit == -math.inf:
+            continue
+        center = math.degrees(math.atan2(arc_sin, arc_cos))
+        half_width = math.degrees(math.acos(arc_limit))
+        deviation = np.abs((bearings[:, gun] - center + 180) % 360 - 180)
+        arc[:, gun] = np.abs(deviation - half_width) < ARC_TOLERANCE
+    return {"axis": axis, "arc": arc, "on_gun": distances < ON_GUN_DISTANCE}
+
+# Function to turn FiringSolution objects into (row, gun) arrays
+def solution_arrays(solutions):
+    return (
+        np.array([solution.azimuths for solution in solutions], dtype=np.float64),
+        np.array([solution.distances for solution in solutions], dtype=np.float64),
+        np.array([solution.can_fire for solution in solutions], dtype=bool),
+    )
+
+# Fast paths: each takes (ship_type, inputs) and returns azimuths (NaN or any value where a gun cannot fire),
+# distances and can-fire flags of shape (row, gun), plus the seconds the path itself took (without parsing)
+
+def core_path(ship_type, inputs):
+    rows_list = inputs.tolist()
+    start = time.perf_counter()
+    solutions = [solve_guns(ship_type, *row) for row in rows_list]
+    seconds = time.perf_counter() - start
+    values = np.array(solutions, dtype=np.float64).reshape(len(rows_list), -1, 3)
+    return np.round(values[:, :, 0], 1) % 360, np.round(values[:, :, 1], 1), values[:, :, 2] != 0, seconds
+
+def scalar_path(ship_type, inputs):
+    rows_list = inputs.tolist()
+    start = time.perf_counter()
+    solutions = [solve_firing_solution(ship_type, *row) for row in rows_list]
+    return (*solution_arrays(solutions), time.perf_counter() - start)
+
+def cache_miss_path(ship_type, inputs):
+    rows_list = inputs.tolist()
+    SOLUTION_CACHE.clear()
+    start = time.perf_counter()
+    solutions = [calculate_firing_solution(ship_type, *row) for row in rows_list]
+    return (*solution_arrays(solutions), time.perf_counter() - start)
+
+def cache_hit_path(ship_type, inputs):
+    rows_list = inputs.tolist()
+    maxsize = SOLUTION_CACHE.maxsize
+    SOLUTION_CACHE.resize(maxsize + len(rows_list))
+    try:
+        for row in rows_list:
+            calculate_firing_solution(ship_type, *row)
+        start = time.perf_counter()
+        solutions = [calculate_firing_solution(ship_type, *row) for row in rows_list]
+        seconds = time.perf_counter() - start
+    finally:
+        SOLUTION_CACHE.resize(maxsize)
+    return (*solution_arrays(solutions), seconds)
+
+def stream_path(ship_type, inputs):
+    rows_list = inputs.tolist()
+    start = time.perf_counter()
+    solver = StreamingSolver(ship_type, *rows_list[0][1:])
+    solutions = []
+    for ship_azimuth, *target in rows_list:
+        solver.set_target(*target)
+        solutions.append(solver.solve(ship_azimuth))
+    return (*solution_arrays(solutions), time.perf_counter() - start)
+
+def batch_path(ship_type, inputs):
+    start = time.perf_counter()
+    azimuths, distances, can_fire = solve_guns_batch(ship_type, *inputs.T, decimals=1)
+    return azimuths, distances, can_fire, time.perf_counter() - start
+
+# The unrounded engine math, rounded to the displayed decimal outside the timing
+def batch_unrounded_path(ship_type, inputs):
+    start = time.perf_counter()
+    azimuths, distances, can_fire = solve_guns_batch(ship_type, *inputs.T)
+    seconds = time.perf_counter() - start
+    return np.round(azimuths, 1) % 360, np.round(distances, 1), can_fire, seconds
+
+def solutions_batch_path(ship_type, inputs):
+    start = time.perf_counter()
+    solutions = solve_solutions_batch(ship_type, *inputs.T)
+    seconds = time.perf_counter() - start
+    return solutions["azimuth"], solutions["distance"], solutions["can_fire"], seconds
+
+def fleet_path(ship_type, inputs):
+    azimuths, distances, can_fire = (np.empty((len(inputs), len(SHIP_TYPES[ship_type].guns)), dtype=dtype) for dtype in (np.float64, np.float64, bool))
+    start = time.perf_counter()
+    for first in range(0, len(inputs), FLEET_CHUNK):
+        chunk = inputs[first:first + FLEET_CHUNK].tolist()
+        # One ship per row at the origin; each row's spotter stands off by minus its wind, so the fleet's
+        # shared (zero) wind leaves every row with its own wind-adjusted target
+        ships = [{"name": str(row), "ship": ship_type, "heading": sa, "x": 0.0, "y": 0.0} for row, (sa, _, _, _, _) in enumerate(chunk)]
+        spotters = {str(row): (-math.cos(to_radians(wa)) * ws, -math.sin(to_radians(wa)) * ws) for row, (_, _, _, wa, ws) in enumerate(chunk)}
+        solution = solve_fleet(Fleet(ships, spotters), [(str(row), cd, ca) for row, (_, cd, ca, _, _) in enumerate(chunk)])
+        for row in range(len(chunk)):
+            for values, output in zip(solution.solutions[str(row)], (azimuths, distances, can_fire)):
+                output[first + row] = values[row]
+    return azimuths, distances, can_fire, time.perf_counter() - start
+
+def csv_path(ship_type, inputs):
+    start = time.perf_counter()
+    text = "".join(iter_csv(ship_type, inputs))
+    seconds = time.perf_counter() - start
+    records = list(csv.reader(io.StringIO(text)))[1:]
+    gun_columns = np.array([record[6:] for record in records], dtype=object).reshape(len(records), -1, 3)
+    azimuths = np.array([[float(value) if value else math.nan for value in row] for row in gun_columns[:, :, 0]])
+    return azimuths, gun_columns[:, :, 1].astype(np.float64), gun_columns[:, :, 2].astype(np.int8) == 1, seconds
+
+def chat_path(ship_type, inputs):
+    start = time.perf_counter()
+    messages = list(iter_chat_batches(ship_type, inputs))
+    seconds = time.perf_counter() - start
+    azimuths, distances = [], []
+    for line in " ; ".join(messages).split(" ; "):
+        solutions = [token.split("/") for token in line.split()[2::2]]
+        azimuths.append([math.nan if azimuth == "-" else float(azimuth) for azimuth, _ in solutions])
+        distances.append([float(distance) for _, distance in solutions])
+    azimuths = np.array(azimuths)
+    return azimuths, np.array(distances), ~np.isnan(azimuths), seconds
+
+def arrow_path(ship_type, inputs):
+    import pyarrow as pa
+
+    from naval_export import solution_columns, write_arrow
+
+    sink = io.BytesIO()
+    start = time.perf_counter()
+    write_arrow(sink, ship_type, inputs)
+    seconds = time.perf_counter() - start
+    table = pa.ipc.open_file(pa.BufferReader(sink.getvalue())).read_all()
+    columns = [table.column(name).to_numpy(zero_copy_only=False) for name in solution_columns(ship_type)[6:]]
+    azimuths, distances, can_fire = (np.column_stack(columns[field::3]) for field in range(3))
+    return azimuths.astype(np.float64), distances.astype(np.float64), can_fire.astype(bool), seconds
+
+def log_path(ship_type, inputs):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "fuzz.navlog")
+        start = time.perf_counter()
+        mission_log = MissionLog(path)
+        mission_log.log_fire_batch(ship_type, inputs, *solve_guns_batch(ship_type, *inputs.T, decimals=1))
+        mission_log.close()
+        records = read_log(path)
+        gun_count = len(SHIP_TYPES[ship_type].guns)
+        # Solutions are stored as float32; one decimal brings back the value that was logged
+        azimuths = np.round(records["gun_azimuth"][:, :gun_count].astype(np.float64), 1)
+        distances = np.round(records["gun_distance"][:, :gun_count].astype(np.float64), 1)
+        can_fire = (records["can_fire"][:, None] >> np.arange(gun_count)) & 1 == 1
+        seconds = time.perf_counter() - start
+        del records
+    return azimuths, distances, can_fire, seconds
+
+# Function to build the lookup tables of the table paths once per ship type (untimed)
+TABLES = {}
+def fuzz_table(ship_type):
+    if ship_type not in TABLES:
+        directory = tempfile.mkdtemp(prefix="naval-fuzz-")
+        build_table(ship_type, directory, bearing_step=0.1, distance_step=0.5, max_distance=400.0)
+        TABLES[ship_type] = FiringTable(ship_type, directory)
+    return TABLES[ship_type]
+
+def table_scalar_path(ship_type, inputs):
+    table = fuzz_table(ship_type)
+    rows_list = inputs.tolist()
+    gun_count = len(SHIP_TYPES[ship_type].guns)
+    start = time.perf_counter()
+    solutions = [table.lookup_solution(*row) for row in rows_list]
+    seconds = time.perf_counter() - start
+    # A grid input the table does not answer keeps NaN distances, which count as a mismatch
+    azimuths = np.full((len(rows_list), gun_count), math.nan)
+    distances = np.full((len(rows_list), gun_count), math.nan)
+    can_fire = np.zeros((len(rows_list), gun_count), dtype=bool)
+    for index, solution in enumerate(solutions):
+        if solution is not None:
+            azimuths[index], distances[index], can_fire[index] = solution.azimuths, solution.distances, solution.can_fire
+    return azimuths, distances, can_fire, seconds
+
+def table_batch_path(ship_type, inputs):
+    table = fuzz_table(ship_type)
+    start = time.perf_counter()
+    azimuths, distances, can_fire = table.lookup_batch(*inputs.T)
+    return azimuths, distances, can_fire, time.perf_counter() - start
+
+def heading_path(ship_type, inputs):
+    blocks = len(inputs) // len(SWEEP_HEADINGS)
+    start = time.perf_counter()
+    can_fire = [HeadingSweep(ship_type, *inputs[block * len(SWEEP_HEADINGS), 1:]).can_fire for block in range(blocks)]
+    return None, None, np.concatenate(can_fire), time.perf_counter() - start
+
+def coverage_path(ship_type, inputs):
+    block_size = len(COVERAGE_AZIMUTHS) * math.floor(DEFAULT_MAX_DISTANCE / DEFAULT_DISTANCE_STEP)
+    azimuths, distances, can_fire = [], [], []
+    start = time.perf_counter()
+    for first in range(0, len(inputs), block_size):
+        ship_azimuth, _, _, wind_azimuth, wind_strength = inputs[first]
+        coverage = CoverageMap(ship_type, ship_azimuth, wind_azimuth, wind_strength, DEFAULT_MAX_DISTANCE, DEFAULT_DISTANCE_STEP)
+        for output, values in zip((azimuths, distances, can_fire), (coverage.azimuths, coverage.distances, coverage.can_fire)):
+            output.append(values.reshape(block_size, -1))
+    seconds = time.perf_counter() - start
+    # The aim is stored as float32; one decimal brings back the value that was solved
+    azimuths, distances = (np.round(np.concatenate(values).astype(np.float64), 1) for values in (azimuths, distances))
+    return azimuths, distances, np.concatenate(can_fire), seconds
+
+# Every fast path: (name, input tags it needs, per-call Python path limited to the scalar limit, function)
+# Paths that quantize inputs to the 0.1 grid (cache, stream, tables, sweeps) only get grid inputs
+PATHS = [
+    ("core.solve_guns", set(), True, core_path),
+    ("scalar.solve_firing_solution", set(), True, scalar_path),
+    ("cache.miss", {"grid"}, True, cache_miss_path),
+    ("cache.hit", {"grid"}, True, cache_hit_path),
+    ("stream", {"grid"}, True, stream_path),
+    ("table.scalar", {"table"}, True, table_scalar_path),
+    ("batch", set(), False, batch_path),
+    ("batch.unrounded", set(), False, batch_unrounded_path),
+    ("solutions_batch", set(), False, solutions_batch_path),
+    ("table.batch", {"table"}, False, table_batch_path),
+    ("fleet", set(), True, fleet_path),
+    ("export.csv", set(), False, csv_path),
+    ("export.chat", set(), False, chat_path),
+    ("export.arrow", set(), False, arrow_path),
+    ("log", set(), False, log_path),
+    ("heading", {"sweep"}, False, heading_path),
+    ("coverage", {"coverage"}, False, coverage_path),
+]
+
+# Function to compare a path's results with the baseline, row by row
+# Returns counts of exact, rounding-only, edge-only and mismatching rows (with the edge rows per edge class)
+# and the mismatching row indices
+def compare(inputs, expected, results):
+    ref_azimuths, ref_distances, ref_can_fire, edges = expected
+    azimuths, distances, can_fire = results
+    # Can-fire may differ on every edge class, the azimuth only where the baseline's own azimuth is off
+    fire_edge = edges["axis"] | edges["arc"] | edges["on_gun"]
+    azimuth_edge = edges["axis"] | edges["on_gun"]
+
+    fire_differs = can_fire != ref_can_fire
+    azimuth_differs = np.zeros(fire_differs.shape, dtype=bool)
+    wrong = fire_differs & ~fire_edge
+    exact = ~fire_differs
+    if azimuths is not None:
+        # Azimuths only count where both sides fire; they compare on the circle (360.0 equals 0.0)
+        both_fire = can_fire & ref_can_fire
+        azimuth_error = np.where(both_fire, np.abs((np.nan_to_num(azimuths) - ref_azimuths + 180) % 360 - 180), 0.0)
+        distance_error = np.abs(distances - ref_distances)
+        distance_error[np.isnan(distance_error)] = math.inf
+        exact &= (azimuth_error < 1e-9) & (distance_error == 0)
+        azimuth_differs = azimuth_error > ROUNDING_TOLERANCE
+        wrong |= (azimuth_differs & ~azimuth_edge) | (distance_error > ROUNDING_TOLERANCE)
+    edge = (fire_differs & fire_edge) | (azimuth_differs & azimuth_edge)
+
+    wrong_rows = wrong.any(axis=1)
+    edge_rows = edge.any(axis=1) & ~wrong_rows
+    exact_rows = exact.all(axis=1)
+    differs = fire_differs | azimuth_differs
+    return {
+        "rows": len(inputs),
+        "exact": int(exact_rows.sum()),
+        "rounding": int((~exact_rows & ~edge_rows & ~wrong_rows).sum()),
+        "edge": int(edge_rows.sum()),
+        "mismatch": int(wrong_rows.sum()),
+        "edge_reasons": {name: int(((differs & mask).any(axis=1) & edge_rows).sum()) for name, mask in edges.items()},
+    }, np.flatnonzero(wrong_rows)
+
+# Function to compare the single-splash wind paths with the baseline calculate_wind_parameters
+# Both work on the ship's wind reference gun. The baseline's wind azimuth is not rounded and its strength is
+# rounded to the nearest 10: azimuths must agree within WIND_TOLERANCE unless the baseline drift lies on an
+# axis (its quadrant code again) or is under ON_GUN_DISTANCE long, and strengths must agree unless the drift
+# sits on a 5 rounding tie.
+def compare_wind(ship_type, rng, count):
+    size = max(count // 10, 1000)
+    splashes = np.column_stack([
+        np.concatenate([grid(rng, 0, 360, size), [0.0, 90.0, 180.0, 270.0]]),
+        np.concatenate([grid(rng, 0, 360, size), [0.0, 0.0, 90.0, 180.0]]),
+        np.concatenate([grid(rng, 0, 400, size), [100.0, 100.0, 100.0, 100.0]]),
+        np.concatenate([grid(rng, 0, 360, size), [0.0, 180.0, 90.0, 180.0]]),
+        np.concatenate([grid(rng, 0, 400, size), [100.0, 120.0, 90.0, 80.0]]),
+    ])
+    rows_list = splashes.tolist()
+    reference_gun = SHIP_TYPES[ship_type].wind_reference_gun
+
+    start = time.perf_counter()
+    expected = np.array([baseline_solvers.calculate_wind_parameters(ship_type, *row) for row in rows_list])
+    reference_seconds = time.perf_counter() - start
+
+    # The baseline drift vectors, recomputed with its own arithmetic (untimed)
+    offset = SHIP_TYPES[ship_type].guns[reference_gun][0]
+    radians = baseline_solvers.to_radians
+    drifts = []
+    for sa, ca, cd, ea, ed in rows_list:
+        xm = 1000 + math.cos(radians(sa)) * offset + (math.cos(radians(ca)) * cd)
+        ym = 1000 + math.sin(radians(sa)) * offset + (math.sin(radians(ca)) * cd)
+        drifts.append((1000 + (math.cos(radians(ea)) * ed) - xm, 1000 + (math.sin(radians(ea)) * ed) - ym))
+    drifts = np.array(drifts)
+    edges = {"axis": (drifts[:, 0] == 0) | (drifts[:, 1] == 0), "on_gun": np.hypot(*drifts.T) < ON_GUN_DISTANCE}
+    edge = edges["axis"] | edges["on_gun"]
+    strength_tie = np.abs(np.hypot(*drifts.T) / 10 % 1 - 0.5) < 1e-6
+
+    start = time.perf_counter()
+    winds = np.array([calculate_wind_parameters(ship_type, *row) for row in rows_list])
+    wind_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = splash_drifts_batch(ship_type, splashes[:, 0], reference_gun, *splashes[:, 1:].T)
+    batch = np.column_stack([np.degrees(np.arctan2(batch[:, 1], batch[:, 0])) % 360, np.round(np.hypot(batch[:, 0], batch[:, 1]) / 10) * 10])
+    batch_seconds = time.perf_counter() - start
+
+    results = {"wind.baseline": {"rows": len(rows_list), "exact": len(rows_list), "rounding": 0, "edge": 0, "mismatch": 0,
+                                 "rows_per_second": len(rows_list) / reference_seconds}}
+    for name, values, seconds in (("wind.parameters", winds, wind_seconds), ("wind.drift_batch", batch, batch_seconds)):
+        azimuth_differs = np.abs((values[:, 0] - expected[:, 0] + 180) % 360 - 180) > WIND_TOLERANCE
+        strength_differs = values[:, 1] != expected[:, 1]
+        wrong = (azimuth_differs & ~edge) | (strength_differs & ~strength_tie)
+        edge_rows = azimuth_differs & edge & ~wrong
+        rounding = strength_differs & ~wrong & ~edge_rows
+        results[name] = {
+            "rows": len(rows_list),
+            "exact": int((~azimuth_differs & ~strength_differs).sum()),
+            "rounding": int(rounding.sum()),
+            "edge": int(edge_rows.sum()),
+            "mismatch": int(wrong.sum()),
+            "edge_reasons": {reason: int((edge_rows & mask).sum()) for reason, mask in edges.items()},
+            "rows_per_second": len(rows_list) / seconds,
+            "examples": [{"inputs": dict(zip(["ship_azimuth", "commander_azimuth", "commander_distance", "explosion_azimuth", "explosion_distance"], rows_list[row])),
+                          "baseline": expected[row].tolist(), "path": values[row].tolist()} for row in np.flatnonzero(wrong)[:EXAMPLE_COUNT]],
+        }
+    return results
+
+# Function to fuzz every path for one ship type
+# Returns {path name: counts, throughput and mismatch examples}
+def fuzz_ship(ship_type, count, scalar_limit, seed):
+    rng = np.random.default_rng(seed)
+    input_sets = make_input_sets(ship_type, rng, count)
+
+    # The baseline solves every input once; each path is compared with its share of the rows
+    all_inputs = np.concatenate([inputs for _, _, inputs in input_sets])
+    ref_azimuths, ref_distances, ref_can_fire, reference_seconds = reference(ship_type, all_inputs)
+    edges = baseline_edges(ship_type, all_inputs)
+    results = {"baseline": {"rows": len(all_inputs), "exact": len(all_inputs), "rounding": 0, "edge": 0, "mismatch": 0,
+                            "rows_per_second": len(all_inputs) / reference_seconds}}
+    starts = np.cumsum([0] + [len(inputs) for _, _, inputs in input_sets])
+
+    for name, tags_needed, scalar, function in PATHS:
+        indices = np.concatenate([np.arange(start, start + len(inputs)) for start, (_, tags, inputs) in zip(starts, input_sets) if tags_needed <= tags])
+        if scalar:
+            indices = indices[:scalar_limit]
+        inputs = all_inputs[indices]
+        try:
+            *values, seconds = function(ship_type, inputs)
+        except ImportError as e:
+            results[name] = {"skipped": str(e)}
+            continue
+        expected = (ref_azimuths[indices], ref_distances[indices], ref_can_fire[indices], {reason: mask[indices] for reason, mask in edges.items()})
+        counts, wrong_rows = compare(inputs, expected, values)
+        counts["rows_per_second"] = len(inputs) / seconds if seconds > 0 else None
+        counts["examples"] = [
+            {"inputs": dict(zip(FIELDS, inputs[row].tolist())),
+             "baseline": {"azimuths": expected[0][row].tolist(), "distances": expected[1][row].tolist(), "can_fire": expected[2][row].tolist()},
+             "path": {"azimuths": None if values[0] is None else values[0][row].tolist(), "distances": None if values[1] is None else values[1][row].tolist(), "can_fire": values[2][row].tolist()}}
+            for row in wrong_rows[:EXAMPLE_COUNT]
+        ]
+        results[name] = counts
+    results.update(compare_wind(ship_type, rng, count))
+    return results
+
+# Function to print a fuzzing report, returning the number of mismatching rows
+def print_report(report):
+    mismatches = 0
+    for ship_type, results in report["ships"].items():
+        print(f"{SHIP_TYPES[ship_type].name}:")
+        print(f"    {'path':30s}{'rows':>10s}{'exact':>10s}{'rounding':>10s}{'edge':>10s}{'mismatch':>10s}{'rows/s':>14s}")
+        for name, result in results.items():
+            if "skipped" in result:
+                print(f"    {name:30s} skipped: {result['skipped']}")
+                continue
+            rate = "" if result["rows_per_second"] is None else f"{result['rows_per_second']:14,.0f}"
+            print(f"    {name:30s}{result['rows']:10d}{result['exact']:10d}{result['rounding']:10d}{result['edge']:10d}{result['mismatch']:10d}{rate:>14s}")
+            if result["edge"]:
+                print(f"        edge: {', '.join(f'{reason} {rows}' for reason, rows in result['edge_reasons'].items() if rows)}")
+            mismatches += result["mismatch"]
+            for example in result.get("examples", []):
+                print(f"        MISMATCH {json.dumps(example)}")
+    return mismatches
+
+# Function to run the harness from the command line
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fuzz every fast solver path against the original baseline solvers and report throughput.")
+    parser.add_argument("--count", type=int, default=DEFAULT_COUNT, help=f"random missions per ship; boundary sets scale with it (default: {DEFAULT_COUNT})")
+    parser.add_argument("--scalar-limit", type=int, default=DEFAULT_SCALAR_LIMIT, help=f"inputs per ship for per-call Python paths (default: {DEFAULT_SCALAR_LIMIT})")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    parser.add_argument("--ship", action="append", choices=sorted(baseline_solvers.BASELINE_SOLVERS), help="ship type to fuzz (default: all with a baseline)")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = {"count": args.count, "scalar_limit": args.scalar_limit, "seed": args.seed, "ships": {}}
+    for ship_type in args.ship or sorted(baseline_solvers.BASELINE_SOLVERS):
+        report["ships"][ship_type] = fuzz_ship(ship_type, args.count, args.scalar_limit, args.seed)
+    mismatches = print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+# Benchmark suite entry point
+# Writes machine-readable results that can be compared between commits:
+#     python -m benchmarks.run_benchmarks --output bench.json
+#     python -m benchmarks.run_benchmarks --output new.json --compare bench.json --threshold 0.2
+# With --compare, any benchmark whose median got slower by more than the threshold is reported
+# and the exit status is 1.
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks import bench_pages, bench_solvers
+
+SUITES = {"solvers": bench_solvers, "pages": bench_pages}
+
+# Function to read the current git commit, if any
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Function to compare two result sets, returning (name, old median, new median, change) for regressions
+def find_regressions(baseline, current, threshold):
+    regressions = []
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None or old["median_us"] <= 0:
+            continue
+        change = result["median_us"] / old["median_us"] - 1
+        if change > threshold:
+            regressions.append((name, old["median_us"], result["median_us"], change))
+    return regressions
+
+# Function to run the benchmark suite from the command line
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Naval Artillery Calculator benchmarks.")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="suite to run (default: all)")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs and fewer repeats")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "commit": current_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": {},
+    }
+    for suite in args.suite or sorted(SUITES):
+        report["results"].update(SUITES[suite].run(quick=args.quick))
+
+    for name, result in report["results"].items():
+        print(f"{name:45s} {result['median_us']:12.3f} us (min {result['min_us']:.3f})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = find_regressions(baseline, report, args.threshold)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:.3f} us -> {new:.3f} us (+{change:.0%})")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
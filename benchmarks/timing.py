@@ -0,0 +1,22 @@
+# Timing helpers shared by the benchmark modules
+import statistics
+import time
+
+# Function to time a callable and summarize the per-call cost in microseconds
+# Runs `number` calls per sample and takes `repeat` samples; items scales the result to a per-item cost
+def measure(function, number=1, repeat=5, items=1):
+    function()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - start) / (number * items) * 1e6)
+    return {
+        "min_us": min(samples),
+        "median_us": statistics.median(samples),
+        "max_us": max(samples),
+        "number": number,
+        "repeat": repeat,
+        "items": items,
+    }
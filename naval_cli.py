@@ -0,0 +1,153 @@
+# Command-line front end for the headless ballistics core
+# Reads one fire mission per line from a file or stdin and writes one solution per line to stdout,
+# so chat bots can call it per message without starting the web server.
+#
+# Plain missions (whitespace or comma separated, wind optional):
+#     <ship> <ship_azimuth> <commander_distance> <commander_azimuth> [<wind_azimuth> <wind_strength>]
+#     calahan 90 150 75.5 210 20
+# Wind missions from a splash of the wind reference gun:
+#     wind <ship> <ship_azimuth> <commander_azimuth> <commander_distance> <explosion_azimuth> <explosion_distance>
+# JSON missions use the same names as keys, with "type": "wind" for wind missions:
+#     {"ship": "frigate", "ship_azimuth": 90, "commander_distance": 150, "commander_azimuth": 75.5}
+#
+# Streaming mode keeps one target and reads "<timestamp> <ship_azimuth>" heading updates instead,
+# printing a line only when a gun's solution changes:
+#     python naval_cli.py headings.txt --stream "calahan 150 75.5 210 20"
+#
+# Usage: python naval_cli.py [missions.txt] [--json] [--stream "<ship> <distance> <azimuth> [<wind_azimuth> <wind_strength>]"]
+import argparse
+import json
+import math
+import sys
+
+from naval_core import SHIP_TYPES, calculate_wind_parameters, solve_firing_solution
+from naval_stream import stream_solutions
+
+FIRE_FIELDS = ["ship_azimuth", "commander_distance", "commander_azimuth", "wind_azimuth", "wind_strength"]
+WIND_FIELDS = ["ship_azimuth", "commander_azimuth", "commander_distance", "explosion_azimuth", "explosion_distance"]
+
+# Function to turn one input line into a mission dictionary
+def parse_mission(line):
+    if line.startswith("{"):
+        mission = json.loads(line)
+    else:
+        fields = line.replace(",", " ").split()
+        if fields[0].lower() == "wind":
+            if len(fields) != 7:
+                raise ValueError("wind missions need: wind <ship> " + " ".join(f"<{name}>" for name in WIND_FIELDS))
+            mission = {"type": "wind", "ship": fields[1]}
+            mission.update(zip(WIND_FIELDS, fields[2:]))
+        else:
+            if len(fields) not in (4, 6):
+                raise ValueError("fire missions need: <ship> " + " ".join(f"<{name}>" for name in FIRE_FIELDS[:3]) + " [<wind_azimuth> <wind_strength>]")
+            mission = {"type": "fire", "ship": fields[0]}
+            mission.update(zip(FIRE_FIELDS, fields[1:]))
+    return validate_mission(mission)
+
+# Function to check a mission dictionary and convert its fields (also used by the fire-control server)
+def validate_mission(mission):
+    mission.setdefault("type", "fire")
+    if mission["type"] not in ("fire", "wind"):
+        raise ValueError(f"unknown mission type {mission['type']!r} (known: fire, wind)")
+    ship_type = str(mission["ship"]).lower()
+    if ship_type not in SHIP_TYPES:
+        raise ValueError(f"unknown ship type {mission['ship']!r} (known: {', '.join(sorted(SHIP_TYPES))})")
+    mission["ship"] = ship_type
+    for name in WIND_FIELDS if mission["type"] == "wind" else FIRE_FIELDS:
+        mission[name] = float(mission.get(name, 0.0))
+        if not math.isfinite(mission[name]):
+            raise ValueError(f"{name} must be a finite number, got {mission[name]}")
+    return mission
+
+# Function to solve one mission, returning a JSON-ready result
+def solve_mission(mission):
+    ship_type = mission["ship"]
+    if mission["type"] == "wind":
+        wind_azimuth, wind_strength = calculate_wind_parameters(ship_type, *(mission[name] for name in WIND_FIELDS))
+        return {"ship": ship_type, "wind_azimuth": round(wind_azimuth, 1), "wind_strength": wind_strength}
+
+    return display_result(solve_firing_solution(ship_type, *(mission[name] for name in FIRE_FIELDS)))
+
+# Function to turn a FiringSolution into a JSON-ready result (azimuth None where a gun cannot fire)
+def display_result(solution):
+    guns = []
+    for gun_name, azimuth, distance, can_fire in zip(
+        SHIP_TYPES[solution.ship_type].gun_names, solution.azimuths, solution.distances, solution.can_fire
+    ):
+        guns.append({"gun": gun_name, "azimuth": azimuth if can_fire else None, "distance": distance})
+    return {"ship": solution.ship_type, "guns": guns}
+
+# Function to format a result as one chat-ready line
+def format_result(result):
+    ship_name = SHIP_TYPES[result["ship"]].name
+    if "guns" not in result:
+        return f"{ship_name} wind: Azimuth {result['wind_azimuth']}°, Strength {result['wind_strength']}"
+    parts = []
+    for gun in result["guns"]:
+        azimuth = "No angle" if gun["azimuth"] is None else f"{gun['azimuth']}°"
+        parts.append(f"{gun['gun']}: {azimuth} / {gun['distance']}")
+    return f"{ship_name}: " + " | ".join(parts)
+
+# Function to read "<timestamp> <ship_azimuth>" updates, skipping blank, comment and malformed lines
+def read_heading_updates(lines):
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            timestamp, ship_azimuth = (float(field) for field in line.replace(",", " ").split())
+        except ValueError:
+            print(f"line {line_number}: heading updates need: <timestamp> <ship_azimuth>", file=sys.stderr)
+            continue
+        if not (math.isfinite(timestamp) and math.isfinite(ship_azimuth)):
+            print(f"line {line_number}: heading updates must be finite numbers, got {line}", file=sys.stderr)
+            continue
+        yield timestamp, ship_azimuth
+
+# Function to print a line for every changed solution of a streamed target
+def run_stream(target, lines, as_json):
+    # The target is a fire mission without the ship azimuth, which comes from the updates
+    ship_type, *fields = target.replace(",", " ").split()
+    mission = parse_mission(" ".join([ship_type, "0", *fields]))
+    for timestamp, ship_azimuth, solution in stream_solutions(
+        mission["ship"], read_heading_updates(lines), *(mission[name] for name in FIRE_FIELDS[1:])
+    ):
+        result = display_result(solution)
+        result.update(timestamp=timestamp, ship_azimuth=ship_azimuth)
+        print(json.dumps(result) if as_json else f"[{timestamp:g}] heading {ship_azimuth:g}° " + format_result(result), flush=True)
+
+# Function to run the command line tool
+# Returns 1 if any mission could not be solved, the others are still answered
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve naval artillery fire missions from a file or stdin.")
+    parser.add_argument("missions", nargs="?", type=argparse.FileType("r", encoding="utf-8"), default=sys.stdin,
+                        help="file with one mission per line (default: stdin)")
+    parser.add_argument("--json", action="store_true", help="write one JSON object per line instead of chat text")
+    parser.add_argument("--stream", metavar="TARGET",
+                        help='stream heading updates for one target, given as "<ship> <distance> <azimuth> [<wind_azimuth> <wind_strength>]"')
+    args = parser.parse_args(argv)
+
+    if args.stream:
+        try:
+            run_stream(args.stream, args.missions, args.json)
+        except (ValueError, KeyError, IndexError) as e:
+            print(f"stream target: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    status = 0
+    for line_number, line in enumerate(args.missions, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            result = solve_mission(parse_mission(line))
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"line {line_number}: {e}", file=sys.stderr)
+            status = 1
+            continue
+        print(json.dumps(result) if args.json else format_result(result), flush=True)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+# Headless ballistics core of the Naval Artillery Calculator
+# Pure Python (math and the standard library only), so scripts, bots and the command line
+# can import the solvers in milliseconds without Streamlit or NumPy.
+import json
+import math
+import os
+import time
+
+from naval_metrics import METRICS, timed
+from solution_cache import SOLUTION_CACHE, cached_solver
+
+# Location of the declarative ship registry
+SHIPS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ships.json")
+# Default location of the precomputed lookup tables (see naval_tables.py)
+TABLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables")
+# Seconds a lookup table check is reused before the file system is asked again
+TABLE_CHECK_INTERVAL = 1.0
+
+# Function to convert degrees to radians
+def to_radians(degrees):
+    return degrees * math.pi / 180
+
+# Function to convert radians to degrees
+def to_degrees(radians):
+    return radians * 180 / math.pi
+
+# Function to calculate azimuth (0-360) from coordinate differences
+# atan2 covers every quadrant, including targets lying exactly on an axis (dx == 0 or dy == 0)
+def calculate_azimuth(dx, dy):
+    return to_degrees(math.atan2(dy, dx)) % 360
+
+# Ship geometry compiled from one registry entry
+# Guns sit on the ship axis at "offset" from the commander (negative is towards the stern).
+# A gun can fire when its bearing is within "arc_half_width" degrees (inclusive) of "arc_center",
+# which is measured from the bow; a half width of 180 means the gun bears all around.
+class ShipType:
+    def __init__(self, key, entry):
+        self.key = key
+        self.name = entry["name"]
+        self.gun_names = [gun["name"] for gun in entry["guns"]]
+        self.wind_reference_gun = entry["wind_reference_gun"]
+
+        # One (offset, arc_cos, arc_sin, arc_limit) tuple per gun
+        # The arc test compares the projection of the gun-to-target vector on the arc center with
+        # arc_limit = cos(half width) times the distance; full circle arcs always pass
+        self.guns = []
+        for gun in entry["guns"]:
+            arc_center = to_radians(gun["arc_center"])
+            arc_limit = -math.inf if gun["arc_half_width"] >= 180 else math.cos(to_radians(gun["arc_half_width"]))
+            self.guns.append((float(gun["offset"]), math.cos(arc_center), math.sin(arc_center), arc_limit))
+
+# Function to load the ship registry and compile every entry
+def load_ship_types(path=SHIPS_FILE):
+    with open(path, encoding="utf-8") as registry_file:
+        registry = json.load(registry_file)
+    return {key: ShipType(key, entry) for key, entry in registry.items()}
+
+# Registry loaded once at startup
+SHIP_TYPES = load_ship_types()
+METRICS.register_cache("solution", SOLUTION_CACHE)
+
+# Function to calculate the wind-adjusted target coordinates (relative to the commander)
+# Depends only on the target and the wind, so streaming solves reuse it while the ship turns
+def solve_target(commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    x0 = (math.cos(to_radians(commander_azimuth)) * commander_distance) - (math.cos(to_radians(wind_azimuth)) * wind_strength)
+    y0 = (math.sin(to_radians(commander_azimuth)) * commander_distance) - (math.sin(to_radians(wind_azimuth)) * wind_strength)
+    return x0, y0
+
+# Function to solve every gun of a ship for target coordinates from solve_target
+# Returns a list of (azimuth, distance, can_fire) per gun, unrounded
+def solve_guns_for_target(ship, ship_azimuth, x0, y0):
+    # Rotate the target into the ship frame, where every gun lies on the x axis
+    ship_cos = math.cos(to_radians(ship_azimuth))
+    ship_sin = math.sin(to_radians(ship_azimuth))
+    along = x0 * ship_cos + y0 * ship_sin
+    across = y0 * ship_cos - x0 * ship_sin
+
+    solutions = []
+    for offset, arc_cos, arc_sin, arc_limit in ship.guns:
+        # Calculate differences between gun and target
+        dx = along - offset
+
+        # Calculate azimuth (relative bearing plus ship azimuth) and distance
+        A = (to_degrees(math.atan2(across, dx)) + ship_azimuth) % 360
+        d = math.sqrt(dx * dx + across * across)
+
+        # Check the firing arc
+        can_fire = dx * arc_cos + across * arc_sin >= arc_limit * d
+        solutions.append((A, d, can_fire))
+
+    return solutions
+
+# Function to solve every gun of a ship for one commander target
+# Returns a list of (azimuth, distance, can_fire) per gun, unrounded
+def solve_guns(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    x0, y0 = solve_target(commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+    return solve_guns_for_target(SHIP_TYPES[ship_type], ship_azimuth, x0, y0)
+
+# Function to calculate how far a splash drifted from the point a gun aimed at
+# The gun fired with the commanded azimuth/distance, the commander saw the splash at the observed azimuth/distance.
+# Returns the drift (dx, dy), which is the wind vector in the convention the solvers use.
+def solve_splash_drift(ship_type, ship_azimuth, gun, commanded_azimuth, commanded_distance, observed_azimuth, observed_distance):
+    offset = SHIP_TYPES[ship_type].guns[gun][0]
+
+    # Calculate gun position (relative to the commander)
+    xg = math.cos(to_radians(ship_azimuth)) * offset
+    yg = math.sin(to_radians(ship_azimuth)) * offset
+
+    # Calculate expected shell landing coordinates
+    xm = xg + (math.cos(to_radians(commanded_azimuth)) * commanded_distance)
+    ym = yg + (math.sin(to_radians(commanded_azimuth)) * commanded_distance)
+
+    # Calculate actual shell landing coordinates
+    xf = math.cos(to_radians(observed_azimuth)) * observed_distance
+    yf = math.sin(to_radians(observed_azimuth)) * observed_distance
+
+    # Calculate difference
+    return xf - xm, yf - ym
+
+# Function to calculate wind parameters based on shell landing point
+# The ship's wind reference gun fired with exactly the commander's azimuth and distance
+def solve_wind(ship_type, ship_azimuth, commander_azimuth, commander_distance, explosion_azimuth, explosion_distance):
+    dxv, dyv = solve_splash_drift(
+        ship_type, ship_azimuth, SHIP_TYPES[ship_type].wind_reference_gun,
+        commander_azimuth, commander_distance, explosion_azimuth, explosion_distance
+    )
+
+    # Calculate wind azimuth and strength
+    Av = calculate_azimuth(dxv, dyv)
+    dv = math.sqrt(dxv**2 + dyv**2)
+    # Round wind strength to nearest 10
+    dv = round(dv / 10) * 10
+
+    return Av, dv
+
+# Firing solution of one ship for one target, rounded to the 0.1 step the calculators show
+# One entry per gun in each tuple; a gun that cannot bear on the target has a NaN azimuth
+class FiringSolution:
+    __slots__ = ("ship_type", "azimuths", "distances", "can_fire")
+
+    def __init__(self, ship_type, azimuths, distances, can_fire):
+        self.ship_type = ship_type
+        self.azimuths = tuple(azimuths)
+        self.distances = tuple(distances)
+        self.can_fire = tuple(can_fire)
+
+    # Solutions are equal when every gun shows the same values (NaN azimuths compare equal)
+    def __eq__(self, other):
+        if not isinstance(other, FiringSolution):
+            return NotImplemented
+        return (
+            self.ship_type == other.ship_type
+            and self.can_fire == other.can_fire
+            and self.distances == other.distances
+            and all(A == other_A for A, other_A, can_fire in zip(self.azimuths, other.azimuths, self.can_fire) if can_fire)
+        )
+
+    def __repr__(self):
+        return f"FiringSolution({self.ship_type!r}, azimuths={self.azimuths}, distances={self.distances}, can_fire={self.can_fire})"
+
+    # Function to return the legacy display tuple: azimuth (or "No angle") and distance per gun
+    def to_display_values(self):
+        values = []
+        for A, d, can_fire in zip(self.azimuths, self.distances, self.can_fire):
+            values.append(A if can_fire else "No angle")
+            values.append(d)
+        return tuple(values)
+
+# Function to convert engine results (unrounded (azimuth, distance, can_fire) per gun) into a FiringSolution
+def to_firing_solution(ship_type, solutions):
+    return FiringSolution(
+        ship_type,
+        [round(A, 1) % 360 if can_fire else math.nan for A, _, can_fire in solutions],
+        [round(d, 1) for _, d, _ in solutions],
+        [can_fire for _, _, can_fire in solutions],
+    )
+
+# Function to convert engine results into the azimuth/distance values shown for each gun
+# A gun that cannot bear on the target gets "No angle" instead of an azimuth
+def to_display_values(solutions):
+    values = []
+    for A, d, can_fire in solutions:
+        values.append(round(A, 1) % 360 if can_fire else "No angle")
+        values.append(round(d, 1))
+    return tuple(values)
+
+# Last lookup table check per ship type: (monotonic time of the check, table file exists)
+TABLE_CHECKS = {}
+
+# Function to check whether a lookup table was built for a ship type
+# The answer is reused for TABLE_CHECK_INTERVAL, so solves skip the file system check while tables
+# built or removed in a running process are still picked up
+def has_firing_table(ship_type):
+    now = time.monotonic()
+    check = TABLE_CHECKS.get(ship_type)
+    if check is None or now - check[0] > TABLE_CHECK_INTERVAL:
+        check = TABLE_CHECKS[ship_type] = (now, os.path.exists(os.path.join(TABLES_DIR, f"{ship_type}.npy")))
+    return check[1]
+
+# Function to solve one target for the calculators, returning a FiringSolution
+# Answers from the precomputed lookup table when one is built and the inputs lie on its grid.
+# The table has no wind axis, so with wind the lookup is not even tried.
+# naval_tables needs NumPy, so it is only imported once a table file actually exists.
+def solve_firing_solution(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    if wind_strength == 0 and has_firing_table(ship_type):
+        from naval_tables import open_firing_table
+        table = open_firing_table(ship_type)
+        solution = None if table is None else table.lookup_solution(
+            ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength
+        )
+        if solution is not None:
+            return solution
+    return to_firing_solution(ship_type, solve_guns(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength))
+
+# Function to solve one target into the legacy display tuple
+def solve_display_values(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    return solve_firing_solution(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength).to_display_values()
+
+# Function to calculate the firing solution of any ship type (cached)
+@timed
+@cached_solver
+def calculate_firing_solution(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    return solve_firing_solution(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+
+# Function to calculate artillery coordinates
+# Returns the legacy tuple (A1, d1, A2, d2) with "No angle" for a gun that cannot fire
+@timed
+def calculate_artillery_coordinates(ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    return calculate_firing_solution("frigate", ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength).to_display_values()
+
+# Function to calculate artillery coordinates for CalahanBS
+# Returns the legacy tuple (A1, d1, A2, d2, A3, d3) with "No angle" for a gun that cannot fire
+@timed
+def calculate_calahan_artillery_coordinates(ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    return calculate_firing_solution("calahan", ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength).to_display_values()
+
+# Function to calculate wind parameters based on shell landing point
+# Uses the wind reference gun of the given ship type (rear gun on the Frigate, middle gun on the CalahanBS)
+@timed
+@cached_solver
+def calculate_wind_parameters(ship_type, ship_azimuth, commander_azimuth, commander_distance,
+                              explosion_azimuth, explosion_distance):
+    return solve_wind(ship_type, ship_azimuth, commander_azimuth, commander_distance,
+                      explosion_azimuth, explosion_distance)
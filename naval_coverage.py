@@ -0,0 +1,118 @@
+# Firing-arc coverage maps
+# For one ship heading and wind, solves a polar grid of commander targets (every 0.1 degree of azimuth
+# times a set of distance rings) in one batch call, so crews can see where each gun bears, and the
+# wind-corrected aim of every cell, before they enter a target. Maps are cached per (ship, heading, wind, grid) and can be rendered as an image.
+import math
+
+import numpy as np
+
+from naval_core import SHIP_TYPES
+from naval_engine import solve_guns_batch
+from naval_metrics import METRICS, timed
+from solution_cache import CACHE_SCALE, SolutionCache
+
+# Grid of the coverage maps: every 0.1 degree of commander azimuth, distance rings every DEFAULT_DISTANCE_STEP
+COVERAGE_AZIMUTHS = np.arange(3600) / 10
+DEFAULT_MAX_DISTANCE = 300.0
+DEFAULT_DISTANCE_STEP = 5.0
+# Maps kept in memory (a 3600 x 60 map of a three-gun ship keeps 648 KB of can-fire flags and 5.2 MB of float32 aim)
+COVERAGE_CACHE = SolutionCache(16)
+METRICS.register_cache("coverage", COVERAGE_CACHE)
+
+# Colors of the rendered map by the number of guns that bear (index 0 is no gun, the last is every gun)
+NO_GUN_COLOR = (60, 60, 66)
+SOME_GUNS_COLOR = (214, 160, 40)
+ALL_GUNS_COLOR = (60, 170, 90)
+BACKGROUND_COLOR = (14, 17, 23)
+SHIP_COLOR = (235, 235, 235)
+
+# Coverage of one ship heading and wind over the polar grid
+# can_fire, azimuths and distances have shape (azimuth, distance ring, gun); the aim is rounded to the 0.1 step the
+# calculators show and kept as float32 (azimuth NaN where the gun cannot fire)
+class CoverageMap:
+    def __init__(self, ship_type, ship_azimuth, wind_azimuth, wind_strength, max_distance, distance_step):
+        self.ship_type = ship_type
+        self.ship_azimuth = ship_azimuth
+        self.wind_azimuth = wind_azimuth
+        self.wind_strength = wind_strength
+        self.commander_azimuths = COVERAGE_AZIMUTHS
+        self.commander_distances = np.arange(1, math.floor(max_distance / distance_step) + 1) * distance_step
+        azimuths, distances, self.can_fire = solve_guns_batch(
+            ship_type, ship_azimuth, self.commander_distances, self.commander_azimuths[:, None], wind_azimuth, wind_strength, decimals=1
+        )
+        self.azimuths = np.where(self.can_fire, azimuths, np.nan).astype(np.float32)
+        self.distances = distances.astype(np.float32)
+
+    # Function to return the grid indices of the cell nearest to a commander target
+    def cell(self, commander_azimuth, commander_distance):
+        azimuth_index = round(commander_azimuth * 10) % len(self.commander_azimuths)
+        step = self.commander_distances[0]
+        distance_index = min(max(round(commander_distance / step) - 1, 0), len(self.commander_distances) - 1)
+        return azimuth_index, distance_index
+
+    # Function to return the aim of the cell nearest to a commander target
+    # Returns (azimuth or None where the gun cannot fire, distance) per gun, as the calculators show them
+    def aim(self, commander_azimuth, commander_distance):
+        azimuth_index, distance_index = self.cell(commander_azimuth, commander_distance)
+        return [
+            (round(float(azimuth), 1) if can_fire else None, round(float(distance), 1))
+            for azimuth, distance, can_fire in zip(
+                self.azimuths[azimuth_index, distance_index], self.distances[azimuth_index, distance_index], self.can_fire[azimuth_index, distance_index]
+            )
+        ]
+
+    # Function to return the fraction of the grid each gun covers
+    def coverage_fractions(self):
+        return self.can_fire.mean(axis=(0, 1))
+
+# Function to compute (or fetch from the cache) the coverage map of a ship heading and wind
+# Heading and wind are quantized to the 0.1 step of the number inputs
+@timed
+def coverage_map(ship_type, ship_azimuth, wind_azimuth=0.0, wind_strength=0.0,
+                 max_distance=DEFAULT_MAX_DISTANCE, distance_step=DEFAULT_DISTANCE_STEP):
+    key = (ship_type, *(round(value * CACHE_SCALE) for value in (ship_azimuth, wind_azimuth, wind_strength, max_distance, distance_step)))
+    return COVERAGE_CACHE.get_or_compute(key, lambda: CoverageMap(ship_type, *(value / CACHE_SCALE for value in key[1:])))
+
+# Pixel to grid cell maps by (image size, ring count)
+PIXEL_CELLS = {}
+
+# Function to map every pixel of a square image onto the polar grid, once per image size and grid
+# Up is azimuth 0 and azimuths grow clockwise, like a map; pixels past the last ring get index -1
+def pixel_cells(size, ring_count):
+    if (size, ring_count) not in PIXEL_CELLS:
+        center = (size - 1) / 2
+        rows, columns = np.mgrid[0:size, 0:size]
+        north = (center - rows) / center
+        east = (columns - center) / center
+        azimuth_index = np.rint(np.degrees(np.arctan2(east, north)) * 10).astype(np.intp) % 3600
+        distance_index = np.rint(np.sqrt(north * north + east * east) * ring_count).astype(np.intp) - 1
+        outside = distance_index >= ring_count
+        distance_index = np.clip(distance_index, 0, ring_count - 1)
+        flat = azimuth_index * ring_count + distance_index
+        flat[outside] = -1
+        PIXEL_CELLS[(size, ring_count)] = flat
+    return PIXEL_CELLS[(size, ring_count)]
+
+# Function to render a coverage map as an RGB image (uint8 array of shape (size, size, 3))
+# Cells are colored by how many guns bear; the ship is drawn as a line through its guns
+@timed
+def render_coverage(coverage, size=401):
+    gun_count = coverage.can_fire.shape[2]
+    palette = np.array([NO_GUN_COLOR] + [
+        [round(some + (every - some) * (count - 1) / max(gun_count - 1, 1)) for some, every in zip(SOME_GUNS_COLOR, ALL_GUNS_COLOR)]
+        for count in range(1, gun_count + 1)
+    ] + [BACKGROUND_COLOR], dtype=np.uint8)
+    counts = coverage.can_fire.sum(axis=2, dtype=np.uint8).ravel()
+    # Index -1 (outside the last ring) picks the background color appended to the lookup
+    image = palette[np.append(counts, gun_count + 1)[pixel_cells(size, len(coverage.commander_distances))]]
+
+    # Draw the ship between its front and rear gun
+    center = (size - 1) / 2
+    scale = center / coverage.commander_distances[-1]
+    offsets = [offset for offset, _, _, _ in SHIP_TYPES[coverage.ship_type].guns]
+    heading = math.radians(coverage.ship_azimuth)
+    for step in np.linspace(min(offsets + [0.0]), max(offsets + [0.0]), 64):
+        row = round(center - math.cos(heading) * step * scale)
+        column = round(center + math.sin(heading) * step * scale)
+        image[max(row - 1, 0):row + 2, max(column - 1, 0):column + 2] = SHIP_COLOR
+    return image
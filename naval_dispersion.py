@@ -0,0 +1,114 @@
+# Monte Carlo dispersion report
+# The calculator answers with one aim per gun, but the inputs behind it are uncertain: the wind
+# calculation rounds strength to the nearest 10, and the commander's readings and the ship heading
+# are noisy. This samples the true inputs around the entered ones, solves every sample in one batch
+# call and reports per gun how far the aim that would have been needed spreads, how likely the shell
+# lands within a radius of the target when the crew fires the entered solution, and how likely the
+# gun is actually out of its arc. Reports are cached per input set.
+#
+# The crew fires the nominal aim; the shell lands at the gun plus that aim plus the true wind, and the
+# target sits at the gun plus the needed aim plus the same wind, so the miss is the difference of the two aims.
+import numpy as np
+
+from naval_core import SHIP_TYPES
+from naval_engine import calculate_cos_sin_batch, solve_guns_batch
+from naval_metrics import METRICS, timed
+from solution_cache import CACHE_SCALE, SolutionCache
+
+DEFAULT_SAMPLES = 20000
+# Landing distance from the target that counts as a hit
+DEFAULT_RADIUS = 5.0
+# Error distribution of each input as (distribution, scale): "normal" with scale as the standard deviation,
+# or "uniform" with scale as the half width. Wind strength is rounded to the nearest 10 by the wind calculation.
+DEFAULT_ERRORS = {
+    "ship_azimuth": ("normal", 0.5),
+    "commander_distance": ("normal", 1.0),
+    "commander_azimuth": ("normal", 0.5),
+    "wind_azimuth": ("normal", 10.0),
+    "wind_strength": ("uniform", 5.0),
+}
+ERROR_DISTRIBUTIONS = ("normal", "uniform")
+# Percentiles reported for the aim spread
+SPREAD_PERCENTILES = (5, 95)
+# Reports kept in memory (a few hundred bytes each)
+DISPERSION_CACHE = SolutionCache(256)
+METRICS.register_cache("dispersion", DISPERSION_CACHE)
+
+# Function to draw errors from one configured distribution
+def sample_errors(rng, distribution, scale, size):
+    if distribution == "normal":
+        return rng.normal(0.0, scale, size)
+    if distribution == "uniform":
+        return rng.uniform(-scale, scale, size)
+    raise ValueError(f"unknown error distribution {distribution!r} (known: {', '.join(ERROR_DISTRIBUTIONS)})")
+
+# Dispersion of every gun's solution for one input set
+# Per-gun arrays: nominal aim, standard deviation and percentile range of the aim that would have been
+# needed (azimuth offsets are relative to the nominal azimuth), hit and out-of-arc probabilities, mean miss
+class DispersionReport:
+    def __init__(self, ship_type, inputs, errors, samples, radius, seed):
+        self.ship_type = ship_type
+        self.inputs = inputs
+        self.errors = errors
+        self.samples = samples
+        self.radius = radius
+        rng = np.random.default_rng(seed)
+
+        # Step 1: Nominal solution, the aim the crew fires with
+        nominal_azimuth, nominal_distance, nominal_can_fire = solve_guns_batch(ship_type, *inputs)
+        self.nominal_azimuth = np.round(nominal_azimuth, 1) % 360
+        self.nominal_distance = np.round(nominal_distance, 1)
+        self.nominal_can_fire = nominal_can_fire
+
+        # Step 2: Sample the true inputs and solve them all at once, shape (sample, gun)
+        sa, cd, ca, wa, ws = (
+            value + sample_errors(rng, *errors[name], samples)
+            for value, name in zip(inputs, ("ship_azimuth", "commander_distance", "commander_azimuth", "wind_azimuth", "wind_strength"))
+        )
+        azimuths, distances, can_fire = solve_guns_batch(ship_type, sa % 360, np.maximum(cd, 0.0), ca % 360, wa % 360, np.maximum(ws, 0.0))
+
+        # Step 3: Spread of the aim that would have been needed
+        azimuth_offsets = (azimuths - nominal_azimuth + 180) % 360 - 180
+        self.azimuth_sd = azimuth_offsets.std(axis=0)
+        self.distance_sd = distances.std(axis=0)
+        self.azimuth_range = np.percentile(azimuth_offsets, SPREAD_PERCENTILES, axis=0).T
+        self.distance_range = np.percentile(distances, SPREAD_PERCENTILES, axis=0).T
+
+        # Step 4: Miss of the nominal aim; the shell lands where the needed aim points plus the aim error
+        nominal_cos, nominal_sin = calculate_cos_sin_batch(self.nominal_azimuth)
+        needed_cos, needed_sin = calculate_cos_sin_batch(azimuths)
+        miss = np.hypot(nominal_cos * self.nominal_distance - needed_cos * distances, nominal_sin * self.nominal_distance - needed_sin * distances)
+        self.mean_miss = miss.mean(axis=0)
+        # A gun out of its arc cannot fire, so those samples never hit
+        self.hit_probability = ((miss <= radius) & can_fire).mean(axis=0)
+        self.out_of_arc_probability = 1.0 - can_fire.mean(axis=0)
+
+# Function to compute (or fetch from the cache) the dispersion report of an input set
+# errors overrides entries of DEFAULT_ERRORS; the same inputs, errors and seed always give the same report
+@timed
+def dispersion_report(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth=0.0, wind_strength=0.0,
+                      errors=None, samples=DEFAULT_SAMPLES, radius=DEFAULT_RADIUS, seed=0):
+    errors = {**DEFAULT_ERRORS, **(errors or {})}
+    for name, (distribution, scale) in errors.items():
+        if distribution not in ERROR_DISTRIBUTIONS or not scale >= 0:
+            raise ValueError(f"bad error distribution for {name}: {distribution!r} with scale {scale!r}")
+    inputs = tuple(round(value * CACHE_SCALE) for value in (ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength))
+    key = (ship_type, inputs, tuple(sorted(errors.items())), samples, radius, seed)
+    return DISPERSION_CACHE.get_or_compute(
+        key, lambda: DispersionReport(ship_type, tuple(value / CACHE_SCALE for value in inputs), errors, samples, radius, seed)
+    )
+
+# Function to turn a report into one text line per gun
+def format_dispersion(report):
+    lines = []
+    for gun, gun_name in enumerate(SHIP_TYPES[report.ship_type].gun_names):
+        azimuth_low, azimuth_high = report.azimuth_range[gun]
+        distance_low, distance_high = report.distance_range[gun]
+        aim = f"{report.nominal_azimuth[gun]}° / {report.nominal_distance[gun]}" if report.nominal_can_fire[gun] else f"No angle / {report.nominal_distance[gun]}"
+        lines.append(
+            f"{gun_name}: {aim}, needed azimuth {azimuth_low:+.1f}° to {azimuth_high:+.1f}° (±{report.azimuth_sd[gun]:.1f}°), "
+            f"distance {distance_low:.1f} to {distance_high:.1f} (±{report.distance_sd[gun]:.1f}), "
+            f"P(within {report.radius:g}) {100 * report.hit_probability[gun]:.0f}%, "
+            f"P(out of arc) {100 * report.out_of_arc_probability[gun]:.0f}%, mean miss {report.mean_miss[gun]:.1f}"
+        )
+    return lines
@@ -0,0 +1,167 @@
+# Vectorized firing-solution engine (NumPy) for whole arrays of targets
+# Uses the same ship registry and geometry as the scalar solvers in naval_core
+import math
+
+import numpy as np
+
+from naval_core import SHIP_TYPES, FiringSolution, to_radians
+
+# Batch solver settings
+# Inputs are processed in chunks so intermediate arrays stay in CPU cache
+BATCH_CHUNK_SIZE = 8192
+
+# Cosine/sine tables for every 0.1 degree step accepted by the number inputs
+ANGLE_TABLE_DEGREES = np.arange(3600) / 10
+ANGLE_COS_TABLE = np.cos(to_radians(ANGLE_TABLE_DEGREES))
+ANGLE_SIN_TABLE = np.sin(to_radians(ANGLE_TABLE_DEGREES))
+
+# Function to calculate cosine and sine of an array of angles in degrees
+# Angles on the 0.1 degree input grid are looked up in the tables (wrapping past 360), anything else falls back to np.cos/np.sin
+def calculate_cos_sin_batch(degrees):
+    index = np.rint(degrees * 10)
+    if np.array_equal(index / 10, degrees):
+        index = index.astype(np.intp)
+        return ANGLE_COS_TABLE.take(index, mode="wrap"), ANGLE_SIN_TABLE.take(index, mode="wrap")
+    radians = to_radians(degrees)
+    return np.cos(radians), np.sin(radians)
+
+# Per-gun columns of one ship type for the batch engine (one row per gun, broadcast over targets)
+class ShipColumns:
+    def __init__(self, ship):
+        guns = np.array(ship.guns, dtype=np.float64)
+        self.gun_offsets = guns[:, 0:1]
+        self.arc_cos = guns[:, 1:2]
+        self.arc_sin = guns[:, 2:3]
+        self.arc_limits = guns[:, 3:4]
+
+# Columns compiled once for every registered ship type
+SHIP_COLUMNS = {key: ShipColumns(ship) for key, ship in SHIP_TYPES.items()}
+
+# Function to broadcast scalar or array inputs together
+# Returns the inputs, their broadcast shape and size; scalars stay scalars so their trig is computed once,
+# not once per target, and arrays are flattened to the broadcast size
+def broadcast_inputs(*inputs):
+    values = [np.asarray(value, dtype=np.float64) for value in inputs]
+    shape = np.broadcast_shapes(*(value.shape for value in values))
+    values = [value if value.size == 1 else np.broadcast_to(value, shape).ravel() for value in values]
+    return values, shape, math.prod(shape)
+
+# Function to solve every gun for one chunk of targets given relative to the ship's commander point
+# Writes azimuths, distances and can-fire masks (gun rows, target columns) into A, d and can_fire
+def solve_guns_chunk(ship, sa, x0, y0, A, d, can_fire, decimals):
+    # Step 2: Rotate the target into the ship frame, where every gun lies on the x axis
+    ship_cos, ship_sin = calculate_cos_sin_batch(sa)
+    along = x0 * ship_cos + y0 * ship_sin
+    across = y0 * ship_cos - x0 * ship_sin
+
+    # Step 3: Calculate differences between guns and target
+    dx = along - ship.gun_offsets
+
+    # Step 4: Calculate azimuth for each gun (relative bearing plus ship azimuth, wrapped to 0-360)
+    np.arctan2(across, dx, out=A)
+    A *= 180
+    A /= math.pi
+    A += sa
+    np.subtract(A, 360, out=A, where=A >= 360)
+    np.add(A, 360, out=A, where=A < 0)
+
+    # Step 5: Calculate distance for each gun
+    np.multiply(dx, dx, out=d)
+    d += across * across
+    np.sqrt(d, out=d)
+
+    # Step 6: Check the firing arcs on the unrounded values
+    dx *= ship.arc_cos
+    dx += across * ship.arc_sin
+    np.greater_equal(dx, ship.arc_limits * d, out=can_fire)
+
+    if decimals is not None:
+        np.round(A, decimals, out=A)
+        np.round(d, decimals, out=d)
+        # Keep azimuths in 0-360 after rounding (359.96 shows as 0.0)
+        np.subtract(A, 360, out=A, where=A >= 360)
+
+# Function to move the gun axis of (gun, target) result arrays last without copying
+def gun_axis_last(shape, azimuths, distances, can_fire):
+    shape = (len(azimuths),) + shape
+    return (
+        np.moveaxis(azimuths.reshape(shape), 0, -1),
+        np.moveaxis(distances.reshape(shape), 0, -1),
+        np.moveaxis(can_fire.reshape(shape), 0, -1),
+    )
+
+# Function to solve every gun of a ship for whole arrays of targets at once
+# Accepts scalars or NumPy arrays (broadcast together) and returns azimuths, distances and can-fire masks
+# with the gun axis last; pass decimals to round azimuths and distances
+def solve_guns_batch(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength, decimals=None):
+    ship = SHIP_COLUMNS[ship_type]
+    values, shape, size = broadcast_inputs(ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+    gun_count = len(ship.gun_offsets)
+
+    azimuths = np.empty((gun_count, size))
+    distances = np.empty((gun_count, size))
+    can_fire = np.empty((gun_count, size), dtype=bool)
+    for start in range(0, size, BATCH_CHUNK_SIZE):
+        chunk = slice(start, start + BATCH_CHUNK_SIZE)
+        sa, cd, ca, wa, ws = (value if value.size == 1 else value[chunk] for value in values)
+
+        # Step 1: Calculate target coordinates with wind adjustment (relative to the commander)
+        commander_cos, commander_sin = calculate_cos_sin_batch(ca)
+        wind_cos, wind_sin = calculate_cos_sin_batch(wa)
+        x0 = commander_cos * cd - wind_cos * ws
+        y0 = commander_sin * cd - wind_sin * ws
+
+        solve_guns_chunk(ship, sa, x0, y0, azimuths[:, chunk], distances[:, chunk], can_fire[:, chunk], decimals)
+
+    return gun_axis_last(shape, azimuths, distances, can_fire)
+
+# Function to solve every gun of a ship for whole arrays of wind-adjusted target coordinates at once
+# x0 and y0 are relative to the ship's commander point, as from naval_core.solve_target; used when the
+# target and wind terms are shared, e.g. by several ships of a fleet (see naval_fleet.py)
+def solve_guns_for_targets_batch(ship_type, ship_azimuth, x0, y0, decimals=None):
+    ship = SHIP_COLUMNS[ship_type]
+    values, shape, size = broadcast_inputs(ship_azimuth, x0, y0)
+    gun_count = len(ship.gun_offsets)
+
+    azimuths = np.empty((gun_count, size))
+    distances = np.empty((gun_count, size))
+    can_fire = np.empty((gun_count, size), dtype=bool)
+    for start in range(0, size, BATCH_CHUNK_SIZE):
+        chunk = slice(start, start + BATCH_CHUNK_SIZE)
+        sa, x, y = (value if value.size == 1 else value[chunk] for value in values)
+        solve_guns_chunk(ship, sa, x, y, azimuths[:, chunk], distances[:, chunk], can_fire[:, chunk], decimals)
+
+    return gun_axis_last(shape, azimuths, distances, can_fire)
+
+# Function to return the structured dtype of batch firing solutions of a ship type
+# Each field holds one value per gun; azimuth is NaN where the gun cannot bear on the target
+def solution_dtype(ship_type):
+    gun_count = len(SHIP_TYPES[ship_type].guns)
+    return np.dtype([("azimuth", np.float64, (gun_count,)), ("distance", np.float64, (gun_count,)), ("can_fire", np.bool_, (gun_count,))])
+
+# Function to solve whole arrays of targets into a structured array of firing solutions (rounded to 0.1)
+# The result has the broadcast shape of the inputs; solutions["azimuth"] etc. are columnar (..., gun) views
+def solve_solutions_batch(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    azimuths, distances, can_fire = solve_guns_batch(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength, decimals=1)
+    solutions = np.empty(can_fire.shape[:-1], dtype=solution_dtype(ship_type))
+    solutions["azimuth"] = np.where(can_fire, azimuths, np.nan)
+    solutions["distance"] = distances
+    solutions["can_fire"] = can_fire
+    return solutions
+
+# Function to return one entry of a structured solution array as a FiringSolution
+def solution_at(ship_type, solutions, index):
+    solution = solutions[index]
+    return FiringSolution(ship_type, solution["azimuth"].tolist(), solution["distance"].tolist(), solution["can_fire"].tolist())
+
+# Function to calculate Frigate artillery coordinates for whole arrays of targets at once
+# Accepts scalars or NumPy arrays (broadcast together) and returns azimuths, distances and can-fire masks
+# with one column per gun (Middle, Rear)
+def calculate_artillery_coordinates_batch(ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    return solve_guns_batch("frigate", ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength, decimals=1)
+
+# Function to calculate CalahanBS artillery coordinates for whole arrays of targets at once
+# Accepts scalars or NumPy arrays (broadcast together) and returns azimuths, distances and can-fire masks
+# with one column per gun (Front, Middle, Rear)
+def calculate_calahan_artillery_coordinates_batch(ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+    return solve_guns_batch("calahan", ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength, decimals=1)
@@ -0,0 +1,204 @@
+# Bulk export of solution sets (many targets, every gun, can-fire flags)
+# Missions are solved chunk by chunk with the batch engine and written out as they are solved, so a
+# large plan never sits in memory as one string or table. Three forms:
+#     CSV           iter_csv yields text chunks (header first), ready for a streamed HTTP body or file
+#     Arrow/Parquet write_arrow / write_parquet write one record batch / row group per chunk (pyarrow)
+#     chat          iter_chat_batches yields compact lines packed into chat-message sized batches
+#
+# Missions are rows of ship azimuth, commander distance, commander azimuth [, wind azimuth, wind strength],
+# given as an array or any iterable of rows (for example lines read lazily from a file).
+#
+# Usage: python naval_export.py missions.txt --ship calahan --format csv|arrow|parquet|chat [--output FILE]
+import argparse
+import csv
+import io
+import itertools
+import sys
+
+import numpy as np
+
+from naval_cli import FIRE_FIELDS
+from naval_core import SHIP_TYPES
+from naval_engine import BATCH_CHUNK_SIZE, solve_guns_batch
+
+# Rows solved and written per chunk
+EXPORT_CHUNK_SIZE = BATCH_CHUNK_SIZE
+# Longest chat message built by iter_chat_batches
+DEFAULT_CHAT_LENGTH = 250
+
+# Function to split missions into (n, 5) float arrays of at most chunk_size rows
+# Rows with 3 values get no wind
+def iter_mission_chunks(missions, chunk_size=EXPORT_CHUNK_SIZE):
+    if isinstance(missions, np.ndarray):
+        chunks = (missions[start:start + chunk_size] for start in range(0, len(missions), chunk_size))
+    else:
+        rows = (list(row) + [0.0, 0.0] if len(row) == 3 else row for row in missions)
+        chunks = iter(lambda: list(itertools.islice(rows, chunk_size)), [])
+    for chunk in chunks:
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if chunk.ndim != 2 or chunk.shape[1] not in (3, 5):
+            raise ValueError("missions need 3 or 5 values each: " + ", ".join(FIRE_FIELDS))
+        if chunk.shape[1] == 3:
+            chunk = np.column_stack([chunk, np.zeros((len(chunk), 2))])
+        yield chunk
+
+# Function to return the export column names of a ship type
+def solution_columns(ship_type):
+    columns = ["mission"] + FIRE_FIELDS
+    for gun_name in SHIP_TYPES[ship_type].gun_names:
+        prefix = gun_name.lower().replace(" ", "_")
+        columns += [f"{prefix}_azimuth", f"{prefix}_distance", f"{prefix}_can_fire"]
+    return columns
+
+# Function to solve missions chunk by chunk
+# Yields (first mission number, missions, azimuths, distances, can_fire) with the gun axis last
+def iter_solution_chunks(ship_type, missions, chunk_size=EXPORT_CHUNK_SIZE):
+    first = 0
+    for chunk in iter_mission_chunks(missions, chunk_size):
+        azimuths, distances, can_fire = solve_guns_batch(ship_type, *chunk.T, decimals=1)
+        yield first, chunk, azimuths, distances, can_fire
+        first += len(chunk)
+
+# Function to stream a solution set as CSV text chunks, header first
+# Azimuths are left empty where a gun cannot fire
+def iter_csv(ship_type, missions, chunk_size=EXPORT_CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(solution_columns(ship_type))
+    yield buffer.getvalue()
+    for first, chunk, azimuths, distances, can_fire in iter_solution_chunks(ship_type, missions, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        # Rows are written column-wise: one list per column, zipped into rows by the C csv writer
+        columns = [range(first + 1, first + len(chunk) + 1)] + chunk.T.tolist()
+        for gun in range(azimuths.shape[-1]):
+            fire = can_fire[:, gun].tolist()
+            columns.append([azimuth if gun_fires else "" for azimuth, gun_fires in zip(azimuths[:, gun].tolist(), fire)])
+            columns.append(distances[:, gun].tolist())
+            columns.append(can_fire[:, gun].astype(np.uint8).tolist())
+        writer.writerows(zip(*columns))
+        yield buffer.getvalue()
+
+# Function to return the pyarrow schema of a ship type's export (columns of solution_columns)
+def solution_schema(ship_type):
+    import pyarrow as pa
+
+    columns = solution_columns(ship_type)
+    types = [pa.int64()] + [pa.float64()] * len(FIRE_FIELDS) + [pa.float64(), pa.float64(), pa.bool_()] * len(SHIP_TYPES[ship_type].guns)
+    return pa.schema(list(zip(columns, types)))
+
+# Function to turn one solved chunk into a pyarrow record batch
+def to_record_batch(ship_type, first, chunk, azimuths, distances, can_fire):
+    import pyarrow as pa
+
+    arrays = [pa.array(np.arange(first + 1, first + len(chunk) + 1))]
+    arrays += [pa.array(column) for column in chunk.T]
+    for gun in range(azimuths.shape[-1]):
+        arrays.append(pa.array(azimuths[:, gun], mask=~can_fire[:, gun]))
+        arrays.append(pa.array(distances[:, gun]))
+        arrays.append(pa.array(can_fire[:, gun]))
+    return pa.RecordBatch.from_arrays(arrays, schema=solution_schema(ship_type))
+
+# Function to write a solution set as an Arrow IPC file, one record batch per chunk
+# sink is a path or a writable binary file; azimuths are null where a gun cannot fire.
+# Without missions the file is still written, with the schema and no record batch.
+def write_arrow(sink, ship_type, missions, chunk_size=EXPORT_CHUNK_SIZE):
+    import pyarrow as pa
+
+    rows = 0
+    with pa.ipc.new_file(sink, solution_schema(ship_type)) as writer:
+        for solved in iter_solution_chunks(ship_type, missions, chunk_size):
+            batch = to_record_batch(ship_type, *solved)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+# Function to write a solution set as a Parquet file, one row group per chunk
+# Without missions the file is still written, with the schema and no row group
+def write_parquet(sink, ship_type, missions, chunk_size=EXPORT_CHUNK_SIZE):
+    import pyarrow.parquet as pq
+
+    rows = 0
+    with pq.ParquetWriter(sink, solution_schema(ship_type)) as writer:
+        for solved in iter_solution_chunks(ship_type, missions, chunk_size):
+            batch = to_record_batch(ship_type, *solved)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+# Function to format one mission's solution compactly for chat, e.g. "F 74.0/159.5 M -/170.3 R 63.3/178.9"
+# Guns are named by their initials, "-" where a gun cannot fire
+def format_chat_solution(initials, azimuths, distances, can_fire):
+    return " ".join(f"{initial} {azimuth if fire else '-'}/{distance}" for initial, azimuth, distance, fire in zip(initials, azimuths, distances, can_fire))
+
+# Function to pack chat lines into messages of at most max_length characters (a longer line is sent alone)
+def pack_chat_lines(lines, max_length=DEFAULT_CHAT_LENGTH, separator=" ; ", prefix=""):
+    batch = ""
+    for line in lines:
+        if batch and len(batch) + len(separator) + len(line) > max_length:
+            yield batch
+            batch = prefix + line
+        else:
+            batch = f"{batch}{separator}{line}" if batch else prefix + line
+    if batch:
+        yield batch
+
+# Function to yield compact chat lines packed into messages of at most max_length characters
+# One line per mission, e.g. "#12 F 74.0/159.5 M -/170.3 R 63.3/178.9" (gun initials, "-" where a gun cannot fire)
+def iter_chat_batches(ship_type, missions, max_length=DEFAULT_CHAT_LENGTH, separator=" ; ", chunk_size=EXPORT_CHUNK_SIZE):
+    initials = [gun_name[0] for gun_name in SHIP_TYPES[ship_type].gun_names]
+
+    def lines():
+        for first, chunk, azimuths, distances, can_fire in iter_solution_chunks(ship_type, missions, chunk_size):
+            for number, row_azimuths, row_distances, row_can_fire in zip(
+                range(first + 1, first + len(chunk) + 1), azimuths.tolist(), distances.tolist(), can_fire.tolist()
+            ):
+                yield f"#{number} " + format_chat_solution(initials, row_azimuths, row_distances, row_can_fire)
+
+    yield from pack_chat_lines(lines(), max_length, separator)
+
+# Function to read missions lazily from "<ship_azimuth> <distance> <azimuth> [<wind_azimuth> <wind_strength>]" lines
+def read_missions(lines):
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield [float(field) for field in line.replace(",", " ").split()]
+
+# Function to run the command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export solutions for many fire missions as CSV, Arrow, Parquet or chat text.")
+    parser.add_argument("missions", nargs="?", type=argparse.FileType("r", encoding="utf-8"), default=sys.stdin,
+                        help="file with one mission per line: ship_azimuth distance azimuth [wind_azimuth wind_strength] (default: stdin)")
+    parser.add_argument("--ship", required=True, choices=sorted(SHIP_TYPES), help="ship type")
+    parser.add_argument("--format", choices=["csv", "arrow", "parquet", "chat"], default="csv", help="export format (default: csv)")
+    parser.add_argument("--output", help="output file (default: stdout for csv and chat; required for arrow and parquet)")
+    parser.add_argument("--chat-length", type=int, default=DEFAULT_CHAT_LENGTH, help="longest chat message in characters")
+    args = parser.parse_args(argv)
+
+    missions = read_missions(args.missions)
+    try:
+        if args.format in ("arrow", "parquet"):
+            if not args.output:
+                parser.error(f"--output is required for {args.format}")
+            write = write_arrow if args.format == "arrow" else write_parquet
+            rows = write(args.output, args.ship, missions)
+            print(f"wrote {rows} missions to {args.output}", file=sys.stderr)
+            return 0
+
+        chunks = iter_csv(args.ship, missions) if args.format == "csv" else (
+            batch + "\n" for batch in iter_chat_batches(args.ship, missions, args.chat_length)
+        )
+        output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if args.output:
+                output.close()
+    except ValueError as e:
+        print(f"missions: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
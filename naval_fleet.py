@@ -0,0 +1,191 @@
+# Fleet fire control: several ships at their own positions and headings, targets called by off-ship spotters
+# The other solvers put a ship's commander point and the spotter at the same origin. Here every position is a
+# map coordinate in the solvers' convention (x = cos(azimuth) * distance, y = sin(azimuth) * distance, from
+# any origin shared by the fleet). A spotter calls a target by distance and azimuth from itself; the target
+# and wind terms are computed once per target, then every gun of every ship is solved over the whole
+# (ship, target) grid in one vectorized call per ship type.
+#
+# A fleet is described as JSON:
+#     {"spotters": {"alpha": [0, 0], "bravo": [250, -40]},
+#      "ships": [{"name": "Frigate 1", "ship": "frigate", "heading": 90, "x": 40, "y": -20},
+#                {"name": "Calahan", "ship": "calahan", "heading": 275, "spotter": "alpha", "distance": 60, "azimuth": 180}],
+#      "wind_azimuth": 45, "wind_strength": 20}
+# A ship gives its commander point as x/y, or as the distance and azimuth at which a spotter sees it.
+#
+# Usage: python naval_fleet.py fleet.json [targets.txt]
+#     targets: one per line "[<spotter>] <distance> <azimuth>" (the spotter can be left out when there is one),
+#     prints the chat lines of every ship
+import argparse
+import json
+import math
+import sys
+
+import numpy as np
+
+from naval_core import SHIP_TYPES, FiringSolution, to_radians
+from naval_engine import calculate_cos_sin_batch, solve_guns_for_targets_batch
+from naval_export import DEFAULT_CHAT_LENGTH, format_chat_solution, pack_chat_lines
+from naval_metrics import timed
+
+# Name of the spotter of a fleet described without spotters, at the origin
+DEFAULT_SPOTTER = "spotter"
+
+# Spotters and ships of a fleet, compiled into columns for the batch engine
+# ships keeps one dictionary per ship (name, ship type, heading, x, y) in the given order;
+# groups maps each ship type to (ship indices, x, y, heading) arrays of its ships
+class Fleet:
+    def __init__(self, ships, spotters=None):
+        spotters = spotters or {DEFAULT_SPOTTER: (0.0, 0.0)}
+        self.spotter_names = [str(name) for name in spotters]
+        positions = np.array([[float(x), float(y)] for x, y in spotters.values()], dtype=np.float64).reshape(-1, 2)
+        self.spotter_x, self.spotter_y = positions.T
+        self.spotter_index = {name: index for index, name in enumerate(self.spotter_names)}
+
+        self.ships = []
+        for number, entry in enumerate(ships, start=1):
+            ship_type = str(entry["ship"]).lower()
+            if ship_type not in SHIP_TYPES:
+                raise ValueError(f"unknown ship type {entry['ship']!r} (known: {', '.join(sorted(SHIP_TYPES))})")
+            if "x" in entry or "y" in entry:
+                x, y = float(entry["x"]), float(entry["y"])
+            else:
+                # Position as a spotter reads it
+                spotter = self.spotter_index[self.spotter_name(entry.get("spotter"))]
+                x = self.spotter_x[spotter] + math.cos(to_radians(float(entry["azimuth"]))) * float(entry["distance"])
+                y = self.spotter_y[spotter] + math.sin(to_radians(float(entry["azimuth"]))) * float(entry["distance"])
+            name = str(entry.get("name", f"{SHIP_TYPES[ship_type].name} {number}"))
+            if any(ship["name"] == name for ship in self.ships):
+                raise ValueError(f"duplicate ship name {name!r}")
+            self.ships.append({"name": name, "ship": ship_type, "heading": float(entry["heading"]) % 360, "x": float(x), "y": float(y)})
+
+        self.groups = {}
+        for ship_type in dict.fromkeys(ship["ship"] for ship in self.ships):
+            indices = np.array([index for index, ship in enumerate(self.ships) if ship["ship"] == ship_type])
+            columns = np.array([[self.ships[index][name] for name in ("x", "y", "heading")] for index in indices])
+            self.groups[ship_type] = (indices, *columns.T)
+
+    # Function to resolve a spotter name; None means the only spotter
+    def spotter_name(self, name):
+        if name is None:
+            if len(self.spotter_names) != 1:
+                raise ValueError(f"the fleet has several spotters, name one of: {', '.join(self.spotter_names)}")
+            return self.spotter_names[0]
+        if str(name) not in self.spotter_index:
+            raise ValueError(f"unknown spotter {name!r} (known: {', '.join(self.spotter_names)})")
+        return str(name)
+
+# Solutions of every gun of every ship for every target of one fire call
+# solutions maps each ship name to (azimuths, distances, can_fire) arrays of shape (target, gun)
+class FleetSolution:
+    def __init__(self, fleet, target_count, solutions):
+        self.fleet = fleet
+        self.target_count = target_count
+        self.solutions = solutions
+
+    # Function to return the solution of one ship for one target as a FiringSolution
+    def firing_solution(self, ship_name, target):
+        ship_type = next(ship["ship"] for ship in self.fleet.ships if ship["name"] == ship_name)
+        azimuths, distances, can_fire = (values[target] for values in self.solutions[ship_name])
+        return FiringSolution(ship_type, np.where(can_fire, azimuths, np.nan).tolist(), distances.tolist(), can_fire.tolist())
+
+    # Function to return the fire call as JSON-ready dictionaries, one per ship (azimuth None where a gun cannot fire)
+    def to_dict(self):
+        ships = []
+        for ship in self.fleet.ships:
+            azimuths, distances, can_fire = self.solutions[ship["name"]]
+            ships.append({
+                **ship,
+                "guns": SHIP_TYPES[ship["ship"]].gun_names,
+                "azimuths": np.where(can_fire, azimuths, None).tolist(),
+                "distances": distances.tolist(),
+            })
+        return {"targets": self.target_count, "ships": ships}
+
+# Function to split targets into spotter indices, distances and azimuths
+# Targets are rows of [spotter,] distance, azimuth; the spotter is a name and may be left out when there is one
+def target_columns(fleet, targets):
+    spotters, distances, azimuths = [], [], []
+    for target in targets:
+        target = list(target)
+        if len(target) not in (2, 3):
+            raise ValueError("fleet targets need 2 or 3 values each: [spotter,] distance, azimuth")
+        spotters.append(fleet.spotter_index[fleet.spotter_name(target[0] if len(target) == 3 else None)])
+        distances.append(float(target[-2]))
+        azimuths.append(float(target[-1]))
+    return np.array(spotters, dtype=np.intp), np.array(distances), np.array(azimuths)
+
+# Function to solve every gun of every ship of a fleet for a list of called targets
+# Returns a FleetSolution rounded to the 0.1 step the calculators show
+@timed
+def solve_fleet(fleet, targets, wind_azimuth=0.0, wind_strength=0.0):
+    spotters, distances, azimuths = target_columns(fleet, targets)
+
+    # Step 1: Wind-adjusted target coordinates on the map, shared by every ship
+    target_cos, target_sin = calculate_cos_sin_batch(azimuths)
+    wind_cos, wind_sin = calculate_cos_sin_batch(np.float64(wind_azimuth))
+    target_x = fleet.spotter_x[spotters] + target_cos * distances - wind_cos * wind_strength
+    target_y = fleet.spotter_y[spotters] + target_sin * distances - wind_sin * wind_strength
+
+    # Step 2: Every ship of a type against every target, relative to each ship's commander point
+    solutions = {}
+    for ship_type, (indices, ship_x, ship_y, headings) in fleet.groups.items():
+        azimuth_grid, distance_grid, can_fire_grid = solve_guns_for_targets_batch(
+            ship_type, headings[:, None], target_x - ship_x[:, None], target_y - ship_y[:, None], decimals=1
+        )
+        for row, index in enumerate(indices):
+            solutions[fleet.ships[index]["name"]] = (azimuth_grid[row], distance_grid[row], can_fire_grid[row])
+    return FleetSolution(fleet, len(distances), solutions)
+
+# Function to turn a fleet solution into chat messages per ship name
+# Each message starts with the ship name, e.g. "Frigate 1: #1 M 74.0/159.5 R -/170.3 ; #2 M 12.1/98.4 R 10.9/120.0"
+def fleet_chat_lines(solution, max_length=DEFAULT_CHAT_LENGTH, separator=" ; "):
+    messages = {}
+    for ship in solution.fleet.ships:
+        initials = [gun_name[0] for gun_name in SHIP_TYPES[ship["ship"]].gun_names]
+        azimuths, distances, can_fire = (values.tolist() for values in solution.solutions[ship["name"]])
+        lines = (
+            f"#{number} " + format_chat_solution(initials, *row)
+            for number, row in enumerate(zip(azimuths, distances, can_fire), start=1)
+        )
+        messages[ship["name"]] = list(pack_chat_lines(lines, max_length, separator, prefix=f"{ship['name']}: "))
+    return messages
+
+# Function to build a fleet and its wind from a JSON description (see the top of this file)
+# Returns (fleet, wind_azimuth, wind_strength)
+def fleet_from_dict(description):
+    fleet = Fleet(description["ships"], description.get("spotters"))
+    return fleet, float(description.get("wind_azimuth", 0.0)), float(description.get("wind_strength", 0.0))
+
+# Function to read "[<spotter>] <distance> <azimuth>" target lines, skipping blank and comment lines
+def read_targets(lines):
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            fields = line.replace(",", " ").split()
+            yield [fields[0]] + [float(field) for field in fields[1:]] if len(fields) == 3 else [float(field) for field in fields]
+
+# Function to run the command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve targets called by spotters for every gun of every ship of a fleet.")
+    parser.add_argument("fleet", type=argparse.FileType("r", encoding="utf-8"), help="JSON file describing the spotters, ships and wind")
+    parser.add_argument("targets", nargs="?", type=argparse.FileType("r", encoding="utf-8"), default=sys.stdin,
+                        help="file with one target per line: [spotter] distance azimuth (default: stdin)")
+    parser.add_argument("--json", action="store_true", help="print the solutions as JSON instead of chat lines")
+    parser.add_argument("--chat-length", type=int, default=DEFAULT_CHAT_LENGTH, help="longest chat message in characters")
+    args = parser.parse_args(argv)
+
+    try:
+        fleet, wind_azimuth, wind_strength = fleet_from_dict(json.load(args.fleet))
+        solution = solve_fleet(fleet, list(read_targets(args.targets)), wind_azimuth, wind_strength)
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"fleet: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(solution.to_dict()))
+    else:
+        for messages in fleet_chat_lines(solution, args.chat_length).values():
+            print("\n".join(messages))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# Best-heading optimizer
+# Answers "which way do I turn so the guns can fire?": solves one commander target for all 3600 ship
+# headings (every 0.1 degree) in one batch call and finds the heading ranges where at least 1, 2, ...
+# or all guns bear. The sweep only depends on the target and the wind, so it is cached and ranking
+# the ranges by the turn from the current heading is all that runs while the heading input changes.
+import numpy as np
+
+from naval_core import SHIP_TYPES
+from naval_engine import solve_guns_batch
+from naval_metrics import METRICS, timed
+from solution_cache import CACHE_SCALE, SolutionCache
+
+# Every 0.1 degree of ship heading
+SWEEP_HEADINGS = np.arange(3600) / 10
+# Sweeps kept in memory (one target and wind each, a few kB)
+HEADING_CACHE = SolutionCache(256)
+METRICS.register_cache("heading", HEADING_CACHE)
+
+# Bearing of every gun over every ship heading for one target and wind
+# can_fire has shape (heading, gun); ranges[k - 1] lists the (first, last) heading indices of each circular
+# run of headings where at least k guns bear (last may be smaller than first when a run wraps past 360)
+class HeadingSweep:
+    def __init__(self, ship_type, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+        self.ship_type = ship_type
+        _, _, self.can_fire = solve_guns_batch(ship_type, SWEEP_HEADINGS, commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+        self.counts = self.can_fire.sum(axis=1)
+        self.ranges = [circular_runs(self.counts >= gun_count) for gun_count in range(1, self.can_fire.shape[1] + 1)]
+
+# Function to find the circular runs of True in a mask over the 3600 headings
+# Returns an (n, 2) array of (first, last) indices; a mask that is all True is one run of every heading
+def circular_runs(mask):
+    if mask.all():
+        return np.array([[0, len(mask) - 1]])
+    if not mask.any():
+        return np.zeros((0, 2), dtype=np.intp)
+    # Start the scan at a heading where the mask is False, so no run is cut in two at index 0
+    shift = int(np.argmin(mask))
+    edges = np.diff(np.roll(mask, -shift).astype(np.int8), prepend=0, append=0)
+    first = (np.flatnonzero(edges == 1) + shift) % len(mask)
+    last = (np.flatnonzero(edges == -1) - 1 + shift) % len(mask)
+    return np.column_stack([first, last])
+
+# Function to compute (or fetch from the cache) the heading sweep of a target and wind
+@timed
+def heading_sweep(ship_type, commander_distance, commander_azimuth, wind_azimuth=0.0, wind_strength=0.0):
+    key = (ship_type, *(round(value * CACHE_SCALE) for value in (commander_distance, commander_azimuth, wind_azimuth, wind_strength)))
+    return HEADING_CACHE.get_or_compute(key, lambda: HeadingSweep(ship_type, *(value / CACHE_SCALE for value in key[1:])))
+
+# Function to rank heading ranges by the turn they need from the current heading
+# Returns one dictionary per range: first and last heading, width, the nearest heading in the range,
+# the signed turn to it (positive is clockwise, to starboard) and the guns that bear there
+def rank_ranges(sweep, ship_azimuth, ranges):
+    gun_names = SHIP_TYPES[sweep.ship_type].gun_names
+    heading_count = len(SWEEP_HEADINGS)
+    current = round(ship_azimuth * CACHE_SCALE) % heading_count
+    first, last = ranges[:, 0], ranges[:, 1]
+    width = (last - first) % heading_count + 1
+
+    # Inside the range no turn is needed; otherwise turn clockwise to its first or back to its last heading
+    inside = (current - first) % heading_count < width
+    clockwise = (first - current) % heading_count
+    counter_clockwise = (current - last) % heading_count
+    turn = np.where(inside, 0, np.where(clockwise <= counter_clockwise, clockwise, -counter_clockwise))
+    nearest = np.where(inside, current, np.where(clockwise <= counter_clockwise, first, last))
+
+    options = []
+    for index in np.lexsort((-width, np.abs(turn))):
+        options.append({
+            "first": float(SWEEP_HEADINGS[first[index]]),
+            "last": float(SWEEP_HEADINGS[last[index]]),
+            "width": float(width[index]) / CACHE_SCALE,
+            "heading": float(SWEEP_HEADINGS[nearest[index]]),
+            "turn": float(turn[index]) / CACHE_SCALE,
+            "guns": [gun_name for gun_name, can_fire in zip(gun_names, sweep.can_fire[nearest[index]]) if can_fire],
+        })
+    return options
+
+# Function to find the headings where at least 1, 2, ... or all guns bear on a commander target
+# Returns a dictionary from gun count to the ranked heading ranges (see rank_ranges), empty lists where
+# that many guns never bear
+@timed
+def best_headings(ship_type, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth=0.0, wind_strength=0.0):
+    sweep = heading_sweep(ship_type, commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+    return {gun_count: rank_ranges(sweep, ship_azimuth, ranges) for gun_count, ranges in enumerate(sweep.ranges, start=1)}
@@ -0,0 +1,107 @@
+# Load generator for the fire-control API (naval_server.py)
+# Keeps a fixed number of fire missions in flight over HTTP or one WebSocket for a set time,
+# then reports requests per second and latency percentiles.
+#
+# Usage: python naval_loadgen.py [--url http://127.0.0.1:8765] [--mode http|ws] [--concurrency 64] [--duration 10]
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import tornado.httpclient
+import tornado.websocket
+
+from naval_core import SHIP_TYPES
+
+# Function to draw one random fire mission on the 0.1 step of the number inputs
+def random_mission(rng):
+    return {
+        "ship": rng.choice(sorted(SHIP_TYPES)),
+        "ship_azimuth": round(rng.uniform(0, 360), 1),
+        "commander_distance": round(rng.uniform(50, 300), 1),
+        "commander_azimuth": round(rng.uniform(0, 360), 1),
+        "wind_azimuth": round(rng.uniform(0, 360), 1),
+        "wind_strength": round(rng.uniform(0, 50), 1),
+    }
+
+# Function to keep one HTTP request in flight until the deadline, recording latencies
+async def http_worker(client, url, deadline, rng, latencies, errors):
+    while time.perf_counter() < deadline:
+        body = json.dumps(random_mission(rng))
+        start = time.perf_counter()
+        try:
+            await client.fetch(url + "/solve", method="POST", body=body)
+        except Exception as e:
+            errors.append(str(e))
+            continue
+        latencies.append(time.perf_counter() - start)
+
+# Function to run the HTTP load
+async def run_http(url, concurrency, duration, rng, latencies, errors):
+    client = tornado.httpclient.AsyncHTTPClient(force_instance=True, max_clients=concurrency)
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(http_worker(client, url, deadline, rng, latencies, errors) for _ in range(concurrency)))
+    client.close()
+
+# Function to run the WebSocket load, keeping concurrency messages in flight on one connection
+async def run_ws(url, concurrency, duration, rng, latencies, errors):
+    connection = await tornado.websocket.websocket_connect(url.replace("http", "ws", 1) + "/ws")
+    sent = {}
+    next_id = 0
+    deadline = time.perf_counter() + duration
+
+    # Function to send one more mission
+    def send():
+        nonlocal next_id
+        next_id += 1
+        sent[next_id] = time.perf_counter()
+        return connection.write_message(json.dumps({"id": next_id, **random_mission(rng)}))
+
+    for _ in range(concurrency):
+        await send()
+    while sent:
+        message = await connection.read_message()
+        if message is None:
+            errors.append("connection closed")
+            break
+        answer = json.loads(message)
+        latencies.append(time.perf_counter() - sent.pop(answer["id"]))
+        if "error" in answer:
+            errors.append(answer["error"])
+        if time.perf_counter() < deadline:
+            await send()
+    connection.close()
+
+# Function to print the load test summary
+def report(latencies, errors, elapsed):
+    latencies.sort()
+    count = len(latencies)
+    print(f"requests: {count} in {elapsed:.2f} s ({count / elapsed:.0f} req/s), errors: {len(errors)}")
+    if count:
+        for label, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)):
+            print(f"{label}: {latencies[min(count - 1, int(fraction * count))] * 1000:.2f} ms")
+    for error in sorted(set(errors))[:5]:
+        print(f"error: {error}", file=sys.stderr)
+
+# Function to run the command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the naval fire-control API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8765", help="server base URL")
+    parser.add_argument("--mode", choices=["http", "ws"], default="http", help="send missions over HTTP or one WebSocket")
+    parser.add_argument("--concurrency", type=int, default=64, help="missions kept in flight")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the missions")
+    args = parser.parse_args(argv)
+
+    latencies = []
+    errors = []
+    run = run_http if args.mode == "http" else run_ws
+    start = time.perf_counter()
+    asyncio.run(run(args.url.rstrip("/"), args.concurrency, args.duration, random.Random(args.seed), latencies, errors))
+    report(latencies, errors, time.perf_counter() - start)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,399 @@
+# Append-only binary mission log
+# Every fire mission, single-splash wind calculation and observed splash is written as one fixed-width
+# record (96 bytes with the usual 4 gun slots), so an operation can be analysed afterwards (hit rates,
+# wind drift over the night).
+# Appending packs one record with a precompiled struct into a memory buffer; the buffer goes to the file
+# in whole records with one write once it fills, or from a timer thread at most flush_interval later. Readers map the file with np.memmap as a
+# structured array (RECORD_DTYPE), so millions of records are scanned with NumPy and nothing is parsed.
+#
+# Record kinds and how they use the fields:
+#     fire    inputs, per-gun aim (azimuth NaN where the gun cannot bear), can_fire bits
+#     wind    ship azimuth, commander azimuth/distance, explosion as observed_*, result as estimate_*
+#     splash  target as commander_* (NaN if unknown), the firing gun's aim in its gun_* slot,
+#             landing as observed_*, fitted wind after the splash as estimate_*
+#
+# Settings (environment variables):
+#     NAVAL_MISSION_LOG   append to this file from the calculator and the fire-control server
+#
+# Usage: python naval_log.py missions.log [--tail N] [--replay] [--hit-radius R] [--window SECONDS]
+import argparse
+import atexit
+import math
+import os
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from naval_core import SHIP_TYPES
+from naval_engine import calculate_cos_sin_batch, solve_guns_batch
+from wind_estimator import splash_drifts_batch, wind_from_vector
+
+MISSION_LOG_FILE = os.environ.get("NAVAL_MISSION_LOG")
+# Gun slots per record: at least 4, more if a hull in ships.json has more guns (ships with fewer leave the rest NaN)
+LOG_GUNS = max([4] + [len(ship.guns) for ship in SHIP_TYPES.values()])
+# The can_fire field is one byte, one bit per gun
+MAX_LOG_GUNS = 8
+if LOG_GUNS > MAX_LOG_GUNS:
+    raise ValueError(f"Mission log records hold at most {MAX_LOG_GUNS} guns, ships.json has a hull with {LOG_GUNS}")
+RECORD_FIRE = 0
+RECORD_WIND = 1
+RECORD_SPLASH = 2
+RECORD_KINDS = {RECORD_FIRE: "fire", RECORD_WIND: "wind", RECORD_SPLASH: "splash"}
+# Bytes buffered before a write, and seconds a record may wait in the buffer
+LOG_BUFFER_SIZE = 64 * 1024
+LOG_FLUSH_INTERVAL = 1.0
+# Default landing distance from the target that counts as a hit, and wind drift window (seconds)
+DEFAULT_HIT_RADIUS = 5.0
+DEFAULT_WINDOW = 600.0
+
+# Function to build the record layout for a number of gun slots (stored in each file's header)
+def record_dtype(gun_slots):
+    return np.dtype([
+        ("time", "<f8"),
+        ("kind", "u1"),
+        ("ship", "S15"),
+        ("ship_azimuth", "<f4"),
+        ("commander_distance", "<f4"),
+        ("commander_azimuth", "<f4"),
+        ("wind_azimuth", "<f4"),
+        ("wind_strength", "<f4"),
+        ("gun_azimuth", "<f4", (gun_slots,)),
+        ("gun_distance", "<f4", (gun_slots,)),
+        ("can_fire", "u1"),
+        ("gun", "i1"),
+        ("reserved", "V2"),
+        ("observed_azimuth", "<f4"),
+        ("observed_distance", "<f4"),
+        ("estimate_azimuth", "<f4"),
+        ("estimate_strength", "<f4"),
+    ])
+
+RECORD_DTYPE = record_dtype(LOG_GUNS)
+# The same layout for packing one record on the append path
+RECORD_STRUCT = struct.Struct(f"<dB15s5f{LOG_GUNS}f{LOG_GUNS}fBb2x4f")
+# File header: magic with format version, record size, gun slots
+LOG_MAGIC = b"NAVLOG\x00\x01"
+HEADER_STRUCT = struct.Struct("<8sII48x")
+HEADER_SIZE = HEADER_STRUCT.size
+NAN = float("nan")
+NO_GUNS = (NAN,) * LOG_GUNS
+
+# Writer of one log file, shared by every session and request of a process
+class MissionLog:
+    def __init__(self, path, buffer_size=LOG_BUFFER_SIZE, flush_interval=LOG_FLUSH_INTERVAL):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.buffer = bytearray()
+        self.timer = None
+        self.records = 0
+        if not os.path.exists(path):
+            create_log_file(path)
+        check_header(path, LOG_GUNS)
+        # O_APPEND keeps whole-record writes of several processes from overwriting each other
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+
+    # Function to buffer packed records and write them once the buffer is full
+    # The first record after a write starts a timer, so no record waits longer than flush_interval
+    def append_bytes(self, data, count=1):
+        with self.lock:
+            self.buffer += data
+            self.records += count
+            if len(self.buffer) >= self.buffer_size:
+                self.flush_locked()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.flush_interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    # Function to write the buffer (callers hold the lock)
+    # A short write (disk full, signal) can end inside a record: the rest of that record is written at once so
+    # later records stay aligned, and whole records that were not written stay buffered for the next flush
+    def flush_locked(self):
+        if self.buffer and self.fd is not None:
+            written = os.write(self.fd, self.buffer)
+            while written % RECORD_DTYPE.itemsize:
+                record_end = written + RECORD_DTYPE.itemsize - written % RECORD_DTYPE.itemsize
+                more = os.write(self.fd, self.buffer[written:record_end])
+                if more == 0:
+                    raise OSError(f"could not finish a record in {self.path}, the log is torn")
+                written += more
+            del self.buffer[:written]
+
+    # Function to write everything buffered so far
+    def flush(self):
+        with self.lock:
+            self.timer = None
+            self.flush_locked()
+
+    # Function to flush and close the file
+    def close(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if self.fd is not None:
+                self.flush_locked()
+                os.close(self.fd)
+                self.fd = None
+
+    # Function to log one fire mission and its FiringSolution
+    def log_fire(self, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength, solution, timestamp=None):
+        padding = LOG_GUNS - len(solution.azimuths)
+        gun_azimuths = solution.azimuths + NO_GUNS[:padding]
+        gun_distances = solution.distances + NO_GUNS[:padding]
+        can_fire = 0
+        for gun, gun_fires in enumerate(solution.can_fire):
+            can_fire |= gun_fires << gun
+        self.append_bytes(RECORD_STRUCT.pack(
+            time.time() if timestamp is None else timestamp, RECORD_FIRE, solution.ship_type.encode(),
+            ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength,
+            *gun_azimuths, *gun_distances, can_fire, -1, NAN, NAN, NAN, NAN,
+        ))
+
+    # Function to log solved fire missions in one go
+    # missions is (n, 5); azimuths, distances and can_fire are the batch engine's (n, guns) results
+    def log_fire_batch(self, ship_type, missions, azimuths, distances, can_fire, timestamp=None):
+        missions = np.asarray(missions)
+        gun_count = can_fire.shape[-1]
+        records = np.zeros(len(missions), dtype=RECORD_DTYPE)
+        records["time"] = time.time() if timestamp is None else timestamp
+        records["kind"] = RECORD_FIRE
+        records["ship"] = ship_type
+        for column, name in enumerate(("ship_azimuth", "commander_distance", "commander_azimuth", "wind_azimuth", "wind_strength")):
+            records[name] = missions[:, column]
+        records["gun_azimuth"] = NAN
+        records["gun_distance"] = NAN
+        records["gun_azimuth"][:, :gun_count] = np.where(can_fire, azimuths, np.nan)
+        records["gun_distance"][:, :gun_count] = distances
+        records["can_fire"] = (can_fire << np.arange(gun_count, dtype=np.uint8)).sum(axis=1)
+        records["gun"] = -1
+        for name in ("observed_azimuth", "observed_distance", "estimate_azimuth", "estimate_strength"):
+            records[name] = NAN
+        self.append_bytes(records.tobytes(), len(records))
+
+    # Function to log a single-splash wind calculation and its result
+    def log_wind(self, ship_type, ship_azimuth, commander_azimuth, commander_distance, explosion_azimuth, explosion_distance,
+                 wind_azimuth, wind_strength, timestamp=None):
+        self.append_bytes(RECORD_STRUCT.pack(
+            time.time() if timestamp is None else timestamp, RECORD_WIND, ship_type.encode(),
+            ship_azimuth, commander_distance, commander_azimuth, NAN, NAN,
+            *NO_GUNS, *NO_GUNS, 0, -1, explosion_azimuth, explosion_distance, wind_azimuth, wind_strength,
+        ))
+
+    # Function to log an observed splash of one gun, with the wind fitted after it
+    # The target (commander distance and azimuth) is optional and enables hit rates
+    def log_splash(self, ship_type, ship_azimuth, gun, commanded_azimuth, commanded_distance, observed_azimuth, observed_distance,
+                   estimate_azimuth=NAN, estimate_strength=NAN, commander_distance=NAN, commander_azimuth=NAN, timestamp=None):
+        gun_azimuths = [NAN] * LOG_GUNS
+        gun_distances = [NAN] * LOG_GUNS
+        gun_azimuths[gun] = commanded_azimuth
+        gun_distances[gun] = commanded_distance
+        self.append_bytes(RECORD_STRUCT.pack(
+            time.time() if timestamp is None else timestamp, RECORD_SPLASH, ship_type.encode(),
+            ship_azimuth, commander_distance, commander_azimuth, NAN, NAN,
+            *gun_azimuths, *gun_distances, 0, gun, observed_azimuth, observed_distance, estimate_azimuth, estimate_strength,
+        ))
+
+# Function to create a log file holding just its header
+# The header is written to a temporary file and linked into place, so a log never exists without a complete
+# header and of several processes creating it at once exactly one wins
+def create_log_file(path):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as temp_file:
+        temp_file.write(HEADER_STRUCT.pack(LOG_MAGIC, RECORD_DTYPE.itemsize, LOG_GUNS))
+    try:
+        os.link(temp_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(temp_path)
+
+# Function to check the header of a log file, raising ValueError if it is not a mission log of this format
+# (or, with gun_slots, not one with that many gun slots); returns the file's record layout
+def check_header(path, gun_slots=None):
+    with open(path, "rb") as log_file:
+        header = log_file.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path} is too short to be a mission log")
+    magic, record_size, file_gun_slots = HEADER_STRUCT.unpack(header)
+    if magic != LOG_MAGIC or not 0 < file_gun_slots <= MAX_LOG_GUNS or record_size != record_dtype(file_gun_slots).itemsize:
+        raise ValueError(f"{path} is not a mission log of this format")
+    if gun_slots is not None and file_gun_slots != gun_slots:
+        raise ValueError(f"{path} has {file_gun_slots} gun slots per record, this ships.json needs {gun_slots}")
+    return record_dtype(file_gun_slots)
+
+# Function to map a log file as a read-only structured array in its record layout (RECORD_DTYPE unless
+# it was written with another number of gun slots). A record still being written at the end of the file is left out
+def read_log(path):
+    dtype = check_header(path)
+    count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+# Function to replay the fire records of a log through the current solver
+# Returns the number of fire records and of records whose solution differs by more than tolerance
+# (after a change to ships.json or the solver). Inputs are stored as float32, so a value on a rounding edge
+# may round the other way: the default tolerance allows one 0.1 step.
+def replay_fire(records, tolerance=0.11):
+    checked = 0
+    changed = 0
+    fire = records[records["kind"] == RECORD_FIRE]
+    for ship in np.unique(fire["ship"]):
+        ship_type = ship.decode()
+        if ship_type not in SHIP_TYPES:
+            continue
+        ship_records = fire[fire["ship"] == ship]
+        gun_count = len(SHIP_TYPES[ship_type].guns)
+        missions = [ship_records[name].astype(np.float64) for name in ("ship_azimuth", "commander_distance", "commander_azimuth", "wind_azimuth", "wind_strength")]
+        azimuths, distances, can_fire = solve_guns_batch(ship_type, *missions, decimals=1)
+        logged_fire = (ship_records["can_fire"][:, None] >> np.arange(gun_count)) & 1 == 1
+        # Azimuths near 0/360 compare on the circle
+        azimuth_error = np.abs((azimuths - ship_records["gun_azimuth"][:, :gun_count] + 180) % 360 - 180)
+        distance_error = np.abs(distances - ship_records["gun_distance"][:, :gun_count])
+        differs = (can_fire != logged_fire) | (can_fire & (azimuth_error > tolerance)) | (distance_error > tolerance)
+        checked += len(ship_records)
+        changed += int(differs.any(axis=1).sum())
+    return checked, changed
+
+# Function to analyse a log: record counts, gun bearing rates, splash hit rate and wind drift over time
+# Returns a dictionary; splashes without a target are left out of the hit rate
+def analyze_log(records, hit_radius=DEFAULT_HIT_RADIUS, window=DEFAULT_WINDOW):
+    kinds = records["kind"]
+    report = {"records": len(records), "kinds": {name: int((kinds == kind).sum()) for kind, name in RECORD_KINDS.items()}}
+    if len(records) == 0:
+        return report
+    times = records["time"]
+    report["start"] = float(times.min())
+    report["end"] = float(times.max())
+
+    # Step 1: Share of fire missions each gun could bear on, per ship
+    fire = records[kinds == RECORD_FIRE]
+    report["bearing"] = {}
+    for ship in np.unique(fire["ship"]):
+        bits = fire["can_fire"][fire["ship"] == ship]
+        gun_count = len(SHIP_TYPES[ship.decode()].guns) if ship.decode() in SHIP_TYPES else records["gun_azimuth"].shape[-1]
+        report["bearing"][ship.decode()] = [float(((bits >> gun) & 1).mean()) for gun in range(gun_count)]
+
+    # Step 2: Miss distance of splashes with a target, landing and target both in the commander frame
+    splashes = records[kinds == RECORD_SPLASH]
+    with_target = splashes[~np.isnan(splashes["commander_distance"])]
+    if len(with_target):
+        observed_cos, observed_sin = calculate_cos_sin_batch(with_target["observed_azimuth"].astype(np.float64))
+        target_cos, target_sin = calculate_cos_sin_batch(with_target["commander_azimuth"].astype(np.float64))
+        miss = np.hypot(observed_cos * with_target["observed_distance"] - target_cos * with_target["commander_distance"],
+                        observed_sin * with_target["observed_distance"] - target_sin * with_target["commander_distance"])
+        report["hit_rate"] = float((miss <= hit_radius).mean())
+        report["mean_miss"] = float(miss.mean())
+        report["splashes_with_target"] = len(with_target)
+
+    # Step 3: Mean splash drift (the wind) per time window
+    drifts = []
+    drift_times = []
+    for ship in np.unique(splashes["ship"]):
+        ship_type = ship.decode()
+        if ship_type not in SHIP_TYPES:
+            continue
+        ship_splashes = splashes[splashes["ship"] == ship]
+        guns = ship_splashes["gun"].astype(np.intp)
+        rows = np.arange(len(ship_splashes))
+        drifts.append(splash_drifts_batch(
+            ship_type, ship_splashes["ship_azimuth"], guns,
+            ship_splashes["gun_azimuth"][rows, guns], ship_splashes["gun_distance"][rows, guns],
+            ship_splashes["observed_azimuth"], ship_splashes["observed_distance"],
+        ))
+        drift_times.append(ship_splashes["time"])
+    report["wind"] = []
+    if drifts:
+        drifts = np.concatenate(drifts)
+        windows = ((np.concatenate(drift_times) - report["start"]) // window).astype(np.intp)
+        counts = np.bincount(windows)
+        sum_x = np.bincount(windows, drifts[:, 0])
+        sum_y = np.bincount(windows, drifts[:, 1])
+        for index in np.flatnonzero(counts):
+            wind_azimuth, wind_strength = wind_from_vector(sum_x[index] / counts[index], sum_y[index] / counts[index])
+            report["wind"].append({
+                "start": report["start"] + index * window,
+                "splashes": int(counts[index]),
+                "wind_azimuth": round(wind_azimuth, 1) % 360,
+                "wind_strength": round(wind_strength, 1),
+            })
+    return report
+
+# Function to format one record as a text line
+def format_record(record):
+    ship_type = record["ship"].decode()
+    gun_count = len(SHIP_TYPES[ship_type].guns) if ship_type in SHIP_TYPES else len(record["gun_azimuth"])
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["time"]))
+    kind = record["kind"]
+    if kind == RECORD_FIRE:
+        guns = " ".join(
+            f"{'-' if math.isnan(azimuth) else round(float(azimuth), 1)}/{round(float(distance), 1)}"
+            for azimuth, distance in zip(record["gun_azimuth"][:gun_count], record["gun_distance"][:gun_count])
+        )
+        return (f"{stamp} fire {ship_type} heading {record['ship_azimuth']:.1f} target {record['commander_distance']:.1f}/"
+                f"{record['commander_azimuth']:.1f} wind {record['wind_azimuth']:.1f}/{record['wind_strength']:.1f}: {guns}")
+    if kind == RECORD_WIND:
+        return (f"{stamp} wind {ship_type} heading {record['ship_azimuth']:.1f} target {record['commander_distance']:.1f}/"
+                f"{record['commander_azimuth']:.1f} explosion {record['observed_distance']:.1f}/{record['observed_azimuth']:.1f}: "
+                f"{record['estimate_azimuth']:.1f}/{record['estimate_strength']:.1f}")
+    gun = record["gun"]
+    return (f"{stamp} splash {ship_type} heading {record['ship_azimuth']:.1f} gun {gun} aimed {record['gun_azimuth'][gun]:.1f}/"
+            f"{record['gun_distance'][gun]:.1f} landed {record['observed_distance']:.1f}/{record['observed_azimuth']:.1f}, "
+            f"fitted wind {record['estimate_azimuth']:.1f}/{record['estimate_strength']:.1f}")
+
+# Function to format an analysis report as text lines
+def format_report(report):
+    lines = [f"{report['records']} records: " + ", ".join(f"{count} {name}" for name, count in report["kinds"].items())]
+    if report["records"] == 0:
+        return lines
+    lines.append(f"from {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(report['start']))} "
+                 f"to {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(report['end']))}")
+    for ship_type, rates in report["bearing"].items():
+        names = SHIP_TYPES[ship_type].gun_names if ship_type in SHIP_TYPES else [f"gun {gun}" for gun in range(len(rates))]
+        lines.append(f"{ship_type} guns bearing: " + ", ".join(f"{name} {100 * rate:.0f}%" for name, rate in zip(names, rates)))
+    if "hit_rate" in report:
+        lines.append(f"hit rate {100 * report['hit_rate']:.0f}% of {report['splashes_with_target']} splashes with a target, "
+                     f"mean miss {report['mean_miss']:.1f}")
+    for entry in report["wind"]:
+        lines.append(f"wind from {time.strftime('%H:%M', time.localtime(entry['start']))}: {entry['wind_azimuth']}°, "
+                     f"strength {entry['wind_strength']} ({entry['splashes']} splashes)")
+    return lines
+
+# Log shared by the calculator and the server, if NAVAL_MISSION_LOG is set
+MISSION_LOG = MissionLog(MISSION_LOG_FILE) if MISSION_LOG_FILE else None
+if MISSION_LOG is not None:
+    atexit.register(MISSION_LOG.close)
+
+# Function to run the command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize, list or replay a binary mission log.")
+    parser.add_argument("log", help="mission log file")
+    parser.add_argument("--tail", type=int, metavar="N", help="print the last N records instead of the summary")
+    parser.add_argument("--replay", action="store_true", help="re-solve every fire record and count changed solutions")
+    parser.add_argument("--hit-radius", type=float, default=DEFAULT_HIT_RADIUS, help="landing distance from the target that counts as a hit")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW, help="seconds per wind drift window")
+    args = parser.parse_args(argv)
+
+    try:
+        records = read_log(args.log)
+    except (OSError, ValueError) as e:
+        print(f"{args.log}: {e}", file=sys.stderr)
+        return 1
+    if args.tail is not None:
+        for record in records[max(len(records) - args.tail, 0):]:
+            print(format_record(record))
+    elif args.replay:
+        checked, changed = replay_fire(records)
+        print(f"replayed {checked} fire records, {changed} solutions changed")
+    else:
+        print("\n".join(format_report(analyze_log(records, args.hit_radius, args.window))))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+# Low-overhead instrumentation for the calculator server
+# Records per-rerun wall time, call counts and sampled timings of the solver functions, cache counters
+# and active sessions, and exports them in the Prometheus text format (for a scrape endpoint or a
+# node_exporter textfile). Standard library only, so naval_core can use it without extra imports.
+#
+# Settings (environment variables):
+#     NAVAL_METRICS_SAMPLE_EVERY   time one call in N per function (default 16, 0 turns timing off)
+#     NAVAL_METRICS_FILE           write the Prometheus text to this file after reruns
+#     NAVAL_METRICS_FILE_INTERVAL  seconds between two writes of that file (default 10)
+import bisect
+import functools
+import os
+import threading
+import time
+
+SAMPLE_EVERY = int(os.environ.get("NAVAL_METRICS_SAMPLE_EVERY", 16))
+METRICS_FILE = os.environ.get("NAVAL_METRICS_FILE")
+METRICS_FILE_INTERVAL = float(os.environ.get("NAVAL_METRICS_FILE_INTERVAL", 10))
+# A session counts as active if it reran within this many seconds
+SESSION_TIMEOUT = 300
+# Histogram buckets in seconds
+RERUN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+FUNCTION_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+
+# Cumulative histogram of observed durations
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    # Function to record one value (callers hold the registry lock)
+    def observe(self, value):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    # Function to return (upper bound, cumulative count) pairs ending with +Inf
+    def cumulative(self):
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.bucket_counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+# Call counter and sampled timing of one function
+class FunctionStats:
+    def __init__(self):
+        self.calls = 0
+        self.timings = Histogram(FUNCTION_BUCKETS)
+
+# Process-wide metrics shared by every session
+class MetricsRegistry:
+    def __init__(self, sample_every=SAMPLE_EVERY):
+        self.sample_every = sample_every
+        self.lock = threading.Lock()
+        self.reruns = {}
+        self.functions = {}
+        self.sessions = {}
+        self.collectors = []
+        self.last_file_write = 0.0
+
+    # Function to record the wall time of one script rerun of a page
+    def observe_rerun(self, page, seconds):
+        with self.lock:
+            histogram = self.reruns.get(page)
+            if histogram is None:
+                histogram = self.reruns[page] = Histogram(RERUN_BUCKETS)
+            histogram.observe(seconds)
+
+    # Function to mark a session as active now
+    def touch_session(self, session_id):
+        self.sessions[session_id] = time.monotonic()
+
+    # Function to count sessions active within SESSION_TIMEOUT, forgetting older ones
+    def active_sessions(self):
+        cutoff = time.monotonic() - SESSION_TIMEOUT
+        with self.lock:
+            for session_id, last_seen in list(self.sessions.items()):
+                if last_seen < cutoff:
+                    del self.sessions[session_id]
+            return len(self.sessions)
+
+    # Function to add a callable returning extra samples as (name, type, help, labels, value) tuples
+    def register_collector(self, collector):
+        self.collectors.append(collector)
+
+    # Function to export the counters of a SolutionCache under a cache label
+    def register_cache(self, name, cache):
+        def collect():
+            stats = cache.stats()
+            labels = {"cache": name}
+            return [
+                ("naval_cache_hits_total", "counter", "Cache lookups answered from the cache", labels, stats["hits"]),
+                ("naval_cache_misses_total", "counter", "Cache lookups that had to compute", labels, stats["misses"]),
+                ("naval_cache_evictions_total", "counter", "Entries evicted to stay within maxsize", labels, stats["evictions"]),
+                ("naval_cache_entries", "gauge", "Entries currently cached", labels, stats["size"]),
+                ("naval_cache_hit_ratio", "gauge", "Hits divided by lookups since start", labels, stats["hit_rate"]),
+            ]
+        self.register_collector(collect)
+
+    # Function to wrap a function with a call counter and sampled timing
+    # Counting is one integer increment; only every sample_every-th call reads the clock
+    def timed(self, function, name=None):
+        name = name or function.__name__
+        stats = self.functions.setdefault(name, FunctionStats())
+        sample_every = self.sample_every
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            stats.calls += 1
+            if not sample_every or stats.calls % sample_every:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    stats.timings.observe(elapsed)
+
+        return wrapper
+
+    # Function to return a plain snapshot of everything recorded, for the admin view
+    def snapshot(self):
+        active_sessions = self.active_sessions()
+        with self.lock:
+            reruns = {
+                page: {"count": histogram.count, "mean_ms": 1000 * histogram.sum / histogram.count if histogram.count else 0.0, "max_ms": 1000 * histogram.max}
+                for page, histogram in self.reruns.items()
+            }
+            functions = {
+                name: {
+                    "calls": stats.calls,
+                    "sampled": stats.timings.count,
+                    "mean_us": 1e6 * stats.timings.sum / stats.timings.count if stats.timings.count else 0.0,
+                    "max_us": 1e6 * stats.timings.max,
+                }
+                for name, stats in self.functions.items()
+            }
+        extra = [entry for collector in self.collectors for entry in collector()]
+        return {"active_sessions": active_sessions, "reruns": reruns, "functions": functions, "extra": extra}
+
+    # Function to render every metric in the Prometheus text exposition format
+    def render_prometheus(self):
+        lines = []
+        described = set()
+
+        # HELP and TYPE lines go once before the first sample of each metric
+        def describe(name, kind, help_text):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        def sample(name, labels, value):
+            label_text = ",".join(f'{key}="{label}"' for key, label in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        def histogram_samples(name, labels, histogram):
+            for bound, count in histogram.cumulative():
+                sample(f"{name}_bucket", {**labels, "le": "+Inf" if bound == float("inf") else repr(bound)}, count)
+            sample(f"{name}_sum", labels, histogram.sum)
+            sample(f"{name}_count", labels, histogram.count)
+
+        describe("naval_active_sessions", "gauge", f"Sessions that reran in the last {SESSION_TIMEOUT} s")
+        sample("naval_active_sessions", {}, self.active_sessions())
+        with self.lock:
+            for page, histogram in sorted(self.reruns.items()):
+                describe("naval_rerun_seconds", "histogram", "Wall time of one script rerun")
+                histogram_samples("naval_rerun_seconds", {"page": page}, histogram)
+            for name, stats in sorted(self.functions.items()):
+                describe("naval_function_calls_total", "counter", "Calls of instrumented functions")
+                sample("naval_function_calls_total", {"function": name}, stats.calls)
+            for name, stats in sorted(self.functions.items()):
+                describe("naval_function_seconds", "histogram", f"Sampled call time (one call in {self.sample_every})")
+                histogram_samples("naval_function_seconds", {"function": name}, stats.timings)
+        # Samples of one metric must be adjacent, so collector output is grouped by name
+        extra = [entry for collector in self.collectors for entry in collector()]
+        first_seen = {}
+        for index, (name, _, _, _, _) in enumerate(extra):
+            first_seen.setdefault(name, index)
+        for name, kind, help_text, labels, value in sorted(extra, key=lambda entry: first_seen[entry[0]]):
+            describe(name, kind, help_text)
+            sample(name, labels, value)
+        return "\n".join(lines) + "\n"
+
+    # Function to write the Prometheus text to a file atomically, at most once per interval
+    # Returns True if the file was written
+    def write_file(self, path=METRICS_FILE, interval=METRICS_FILE_INTERVAL):
+        now = time.monotonic()
+        if not path or now - self.last_file_write < interval:
+            return False
+        self.last_file_write = now
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.render_prometheus())
+        os.replace(temporary_path, path)
+        return True
+
+# Registry shared by the whole server process
+METRICS = MetricsRegistry()
+
+# Decorator to instrument a function in METRICS
+def timed(function):
+    return METRICS.timed(function)
@@ -0,0 +1,150 @@
+# Multi-target fire planner
+# Assigns a list of commander targets to the guns of one ship and orders the salvo.
+# The gun solutions of every target come from one batch solve; each target goes to one gun that
+# can bear on it, minimizing turret traverse and the time until each round can fire.
+#
+# Targets are assigned to (gun, round) slots with the Hungarian algorithm: slot (g, r) is the
+# r-th round of gun g, so its cost is r reload times plus the traverse from the gun's current
+# aim divided by the traverse rate. Each gun then sweeps its targets in one direction, and the
+# firing order is every gun's sweep merged by the time each round is ready.
+import math
+
+import numpy as np
+
+from naval_core import SHIP_TYPES
+from naval_engine import solve_guns_batch
+from naval_metrics import timed
+
+# Seconds between two rounds of one gun
+DEFAULT_RELOAD_TIME = 5.0
+# Turret traverse in degrees per second
+DEFAULT_TRAVERSE_RATE = 10.0
+# Cost of a slot whose gun cannot bear on the target
+INFEASIBLE_COST = 1e9
+
+# Function to solve a rectangular assignment problem (rows <= columns) with the Hungarian algorithm
+# Shortest augmenting paths with row/column potentials, O(rows^2 * columns), the column scans vectorized.
+# Returns the column assigned to each row.
+def solve_assignment(cost):
+    cost = np.asarray(cost, dtype=np.float64)
+    rows, columns = cost.shape
+    if rows > columns:
+        raise ValueError("the assignment needs at least as many columns as rows")
+
+    # Index 0 is a virtual column that starts each augmenting path
+    row_potential = np.zeros(rows + 1)
+    column_potential = np.zeros(columns + 1)
+    column_row = np.zeros(columns + 1, dtype=np.intp)
+    previous_column = np.zeros(columns + 1, dtype=np.intp)
+    for row in range(1, rows + 1):
+        column_row[0] = row
+        column = 0
+        slack = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current_row = column_row[column]
+            # Reduced costs from the row just reached to every column not on the path yet
+            reduced = cost[current_row - 1] - row_potential[current_row] - column_potential[1:]
+            better = ~used[1:] & (reduced < slack[1:])
+            slack[1:][better] = reduced[better]
+            previous_column[1:][better] = column
+            free_slack = np.where(used[1:], np.inf, slack[1:])
+            next_column = int(np.argmin(free_slack)) + 1
+            delta = free_slack[next_column - 1]
+            row_potential[column_row[used]] += delta
+            column_potential[used] -= delta
+            slack[~used] -= delta
+            column = next_column
+            if column_row[column] == 0:
+                break
+        # Flip the augmenting path
+        while column:
+            column_row[column] = column_row[previous_column[column]]
+            column = previous_column[column]
+
+    assignment = np.empty(rows, dtype=np.intp)
+    assigned = column_row[1:] > 0
+    assignment[column_row[1:][assigned] - 1] = np.flatnonzero(assigned)
+    return assignment
+
+# Function to return the bearing of aims relative to the gun's arc center, in -180 to 180
+# Turrets traverse through their arc, never through the blocked side, so traverse is the
+# difference of these values (guns that bear all around may take the short way across 180)
+def relative_to_arc(ship_type, ship_azimuth, azimuths):
+    arc_centers = np.array([math.degrees(math.atan2(arc_sin, arc_cos)) for _, arc_cos, arc_sin, _ in SHIP_TYPES[ship_type].guns])
+    return (np.asarray(azimuths) - ship_azimuth - arc_centers + 180) % 360 - 180
+
+# Function to return the traverse in degrees between relative bearings
+# full_circle marks guns that bear all around and may take the short way across 180
+def traverse_between(start, end, full_circle):
+    traverse = np.abs(np.asarray(end) - np.asarray(start))
+    return np.where(full_circle, np.minimum(traverse, 360 - traverse), traverse)
+
+# Function to plan a salvo against several commander targets
+# targets is a list of (commander_distance, commander_azimuth) pairs; gun_azimuths optionally gives the
+# current aim of each gun (defaults to the middle of each arc).
+# Returns a dictionary with the firing order (one entry per assigned target, in firing sequence),
+# the targets no gun can bear on, the total traverse and the time of the first round.
+@timed
+def plan_fire(ship_type, ship_azimuth, targets, wind_azimuth=0.0, wind_strength=0.0, gun_azimuths=None,
+              reload_time=DEFAULT_RELOAD_TIME, traverse_rate=DEFAULT_TRAVERSE_RATE):
+    ship = SHIP_TYPES[ship_type]
+    gun_count = len(ship.guns)
+    full_circle = np.array([arc_limit == -math.inf for _, _, _, arc_limit in ship.guns])
+    targets = np.asarray(targets, dtype=np.float64).reshape(-1, 2)
+    target_count = len(targets)
+    plan = {"ship": ship_type, "order": [], "unassigned": [], "total_traverse": 0.0, "first_round_time": None}
+    if target_count == 0:
+        return plan
+
+    # Step 1: Solve every gun for every target in one batch call, shape (target, gun)
+    azimuths, distances, can_fire = solve_guns_batch(ship_type, ship_azimuth, targets[:, 0], targets[:, 1], wind_azimuth, wind_strength, decimals=1)
+    relative = relative_to_arc(ship_type, ship_azimuth, azimuths)
+    if gun_azimuths is None:
+        start = np.zeros(gun_count)
+    else:
+        start = relative_to_arc(ship_type, ship_azimuth, gun_azimuths)
+
+    # Step 2: Cost of target t in slot (gun g, round r), shape (target, gun, round)
+    traverse_time = traverse_between(start, relative, full_circle) / traverse_rate
+    cost = traverse_time[:, :, None] + reload_time * np.arange(target_count)
+    cost[~can_fire] = INFEASIBLE_COST
+
+    # Step 3: Assign targets to slots
+    assignment = solve_assignment(cost.reshape(target_count, -1))
+    assigned_gun = assignment // target_count
+    feasible = can_fire[np.arange(target_count), assigned_gun]
+    plan["unassigned"] = np.flatnonzero(~feasible).tolist()
+
+    # Step 4: Sweep each gun's targets in one direction, nearest end first, and time each round
+    for gun in range(gun_count):
+        gun_targets = np.flatnonzero(feasible & (assigned_gun == gun))
+        if len(gun_targets) == 0:
+            continue
+        gun_targets = gun_targets[np.argsort(relative[gun_targets, gun], kind="stable")]
+        if abs(relative[gun_targets[-1], gun] - start[gun]) < abs(relative[gun_targets[0], gun] - start[gun]):
+            gun_targets = gun_targets[::-1]
+        aim = start[gun]
+        fire_time = None
+        for target in gun_targets:
+            traverse = float(traverse_between(aim, relative[target, gun], full_circle[gun]))
+            # The turret traverses while the gun reloads
+            on_target = (fire_time or 0.0) + traverse / traverse_rate
+            fire_time = on_target if fire_time is None else max(fire_time + reload_time, on_target)
+            aim = relative[target, gun]
+            plan["total_traverse"] += traverse
+            plan["order"].append({
+                "target": int(target),
+                "gun": gun,
+                "gun_name": ship.gun_names[gun],
+                "azimuth": float(azimuths[target, gun]),
+                "distance": float(distances[target, gun]),
+                "time": round(fire_time, 2),
+            })
+
+    plan["order"].sort(key=lambda entry: (entry["time"], entry["gun"]))
+    plan["total_traverse"] = round(plan["total_traverse"], 1)
+    if plan["order"]:
+        plan["first_round_time"] = plan["order"][0]["time"]
+    return plan
@@ -0,0 +1,489 @@
+# Local fire-control API (Tornado/asyncio) for bots, overlays and other tools
+# Serves the solvers and the multi-splash wind estimator as JSON over HTTP and over a WebSocket.
+# Fire missions that arrive together are micro-batched into one vectorized solve_guns_batch call per ship,
+# and large plans are solved in a process pool so the event loop keeps answering.
+#
+# HTTP endpoints (JSON bodies, same field names as naval_cli JSON missions):
+#     POST   /solve         one fire or wind mission
+#     POST   /plan          {"ship": ..., "missions": [[ship_azimuth, distance, azimuth, wind_azimuth, wind_strength], ...]}
+#     GET    /wind/<name>   current fitted wind of a named estimator
+#     POST   /wind/<name>   add a splash (or {"splashes": [...]}) to a named estimator
+#     DELETE /wind/<name>   reset a named estimator
+#     GET    /metrics       Prometheus text metrics (see naval_metrics.py)
+#     POST   /fire-plan     {"ship": ..., "ship_azimuth": ..., "targets": [[distance, azimuth], ...]} gun assignment and firing order
+#     POST   /fleet         {"spotters": ..., "ships": [...], "targets": [[spotter, distance, azimuth], ...]} every gun of
+#                           every ship of a fleet, with per-ship chat lines (see naval_fleet.py)
+#     GET    /region-wind/<region>   shared wind estimate of a region or grid square (see naval_windstore.py)
+#     POST   /region-wind/<region>   publish {"wind_azimuth": ..., "wind_strength": ..., "source": ..., "weight": ...}
+#                                     ("source" names the publisher and is required)
+# WebSocket /ws takes the same requests as messages with an "op" of solve, plan, fire_plan, fleet, wind, splash, reset,
+# region_wind or region_publish (wind operations also need "name", region operations "region"); an optional "id"
+# is echoed back, and answers can arrive out of order. "region_subscribe" / "region_unsubscribe" start and stop
+# pushing {"op": "region_update", ...} messages whenever the region's shared wind changes.
+# With a mission log (--mission-log or NAVAL_MISSION_LOG) every solved fire or wind mission and every splash
+# is appended to it (see naval_log.py); plans are what-if batches and are not logged.
+#
+# Usage: python naval_server.py [--host 127.0.0.1] [--port 8765] [--workers N] [--mission-log FILE]
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import tornado.web
+import tornado.websocket
+
+from naval_cli import FIRE_FIELDS, WIND_FIELDS, solve_mission, validate_mission
+from naval_core import SHIP_TYPES
+from naval_engine import solve_guns_batch
+from naval_fleet import fleet_chat_lines, fleet_from_dict, solve_fleet
+from naval_log import MISSION_LOG, MissionLog
+from naval_metrics import METRICS
+from naval_planner import plan_fire
+from naval_windstore import WIND_STORE, region_key
+from wind_estimator import WindEstimator
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Micro-batching: wait at most this long (seconds) for more missions, flush early at the size limit
+BATCH_DELAY = 0.002
+BATCH_LIMIT = 4096
+# Plans with at least this many missions are solved in the process pool
+PLAN_POOL_THRESHOLD = 20000
+# Fire plans with at least this many targets are planned in the process pool
+FIRE_PLAN_POOL_THRESHOLD = 64
+SPLASH_FIELDS = ["ship_azimuth", "gun", "commanded_azimuth", "commanded_distance", "observed_azimuth", "observed_distance"]
+# Optional splash fields: the target the splash was aimed at, for hit rates in the mission log
+SPLASH_TARGET_FIELDS = ["commander_distance", "commander_azimuth"]
+LOGGER = logging.getLogger("naval_server")
+
+# Function to convert a request number, rejecting NaN and infinity (answered with 400)
+def finite_float(name, value):
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"{name} must be a finite number, got {value}")
+    return value
+
+# Function to convert request numbers (nested lists) to a float64 array, rejecting NaN and infinity (answered with 400)
+def finite_array(name, value):
+    values = np.asarray(value, dtype=np.float64)
+    if not np.isfinite(values).all():
+        raise ValueError(f"{name} must be finite numbers")
+    return values
+
+# Function to solve a columnar plan with the batch engine (runs inline or in a pool worker)
+# missions is an (n, 3) or (n, 5) array of ship azimuth, distance, azimuth [, wind azimuth, wind strength]
+def solve_plan(ship_type, missions):
+    missions = np.asarray(missions, dtype=np.float64)
+    if missions.ndim != 2 or missions.shape[1] not in (3, 5):
+        raise ValueError("plan missions need 3 or 5 values each: " + ", ".join(FIRE_FIELDS))
+    if missions.shape[1] == 3:
+        missions = np.column_stack([missions, np.zeros((len(missions), 2))])
+    azimuths, distances, can_fire = solve_guns_batch(ship_type, *missions.T, decimals=1)
+    return {
+        "ship": ship_type,
+        "guns": SHIP_TYPES[ship_type].gun_names,
+        "azimuths": np.where(can_fire, azimuths, None).tolist(),
+        "distances": distances.tolist(),
+    }
+
+# Collects fire missions for one ship type and solves them in one batch call
+class MicroBatcher:
+    def __init__(self, ship_type, delay=BATCH_DELAY, limit=BATCH_LIMIT, mission_log=None):
+        self.ship_type = ship_type
+        self.mission_log = mission_log
+        self.gun_names = SHIP_TYPES[ship_type].gun_names
+        self.delay = delay
+        self.limit = limit
+        self.pending = []
+        self.timer = None
+        self.batches = 0
+        self.solved = 0
+        self.failed = 0
+        self.log_failures = 0
+
+    # Function to queue one validated fire mission and wait for its result
+    def solve(self, mission):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append(([mission[name] for name in FIRE_FIELDS], future))
+        if len(self.pending) >= self.limit:
+            self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.delay, self.flush)
+        return future
+
+    # Function to solve every queued mission at once and hand out the results
+    # Runs as a timer callback, so nothing may escape: a failed solve fails every waiting request,
+    # and a failed log write is reported without holding back the solved results
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+        try:
+            missions = np.array([values for values, _ in pending])
+            azimuths, distances, can_fire = solve_guns_batch(self.ship_type, *missions.T, decimals=1)
+        except Exception as e:
+            LOGGER.exception("Solving a batch of %d %s missions failed", len(pending), self.ship_type)
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            self.failed += len(pending)
+            return
+        if self.mission_log is not None:
+            try:
+                self.mission_log.log_fire_batch(self.ship_type, missions, azimuths, distances, can_fire)
+            except Exception:
+                LOGGER.exception("Logging a batch of %d %s missions failed", len(pending), self.ship_type)
+                self.log_failures += 1
+        azimuths = np.where(can_fire, azimuths, None).tolist()
+        distances = distances.tolist()
+        for (_, future), row_azimuths, row_distances in zip(pending, azimuths, distances):
+            if not future.done():
+                future.set_result({"ship": self.ship_type, "guns": [
+                    {"gun": gun, "azimuth": azimuth, "distance": distance}
+                    for gun, azimuth, distance in zip(self.gun_names, row_azimuths, row_distances)
+                ]})
+        self.batches += 1
+        self.solved += len(pending)
+
+# Shared state of one server: batchers, named wind estimators and the process pool
+class FireControlService:
+    def __init__(self, workers=None, batch_delay=BATCH_DELAY, mission_log=MISSION_LOG, wind_store=WIND_STORE):
+        self.mission_log = mission_log
+        self.wind_store = wind_store
+        self.batchers = {ship_type: MicroBatcher(ship_type, batch_delay, mission_log=mission_log) for ship_type in SHIP_TYPES}
+        self.estimators = {}
+        self.workers = workers
+        self.pool = None
+        METRICS.register_collector(self.collect_metrics)
+
+    # Function to report micro-batching counters to METRICS
+    def collect_metrics(self):
+        samples = []
+        for ship_type, batcher in self.batchers.items():
+            labels = {"ship": ship_type}
+            samples.append(("naval_server_batches_total", "counter", "Micro-batches solved", labels, batcher.batches))
+            samples.append(("naval_server_batched_missions_total", "counter", "Fire missions solved in micro-batches", labels, batcher.solved))
+            samples.append(("naval_server_failed_missions_total", "counter", "Fire missions whose micro-batch failed to solve", labels, batcher.failed))
+            samples.append(("naval_server_log_failures_total", "counter", "Micro-batches that could not be written to the mission log", labels, batcher.log_failures))
+        samples.append(("naval_server_wind_estimators", "gauge", "Named wind estimators", {}, len(self.estimators)))
+        return samples
+
+    # Function to answer one fire or wind mission
+    async def solve(self, body):
+        mission = validate_mission(dict(body))
+        if mission["type"] == "wind":
+            result = solve_mission(mission)
+            if self.mission_log is not None:
+                self.mission_log.log_wind(mission["ship"], *(mission[name] for name in WIND_FIELDS), result["wind_azimuth"], result["wind_strength"])
+            return result
+        return await self.batchers[mission["ship"]].solve(mission)
+
+    # Function to answer a plan, in the process pool when it is large
+    async def plan(self, body):
+        ship_type = str(body["ship"]).lower()
+        if ship_type not in SHIP_TYPES:
+            raise ValueError(f"unknown ship type {body['ship']!r} (known: {', '.join(sorted(SHIP_TYPES))})")
+        missions = finite_array("missions", body["missions"])
+        if len(missions) < PLAN_POOL_THRESHOLD:
+            return solve_plan(ship_type, missions)
+        return await self.run_in_pool(solve_plan, ship_type, missions)
+
+    # Function to assign targets to guns and order the salvo, in the process pool when there are many targets
+    async def fire_plan(self, body):
+        ship_type = str(body["ship"]).lower()
+        if ship_type not in SHIP_TYPES:
+            raise ValueError(f"unknown ship type {body['ship']!r} (known: {', '.join(sorted(SHIP_TYPES))})")
+        targets = finite_array("targets", body["targets"])
+        if targets.ndim != 2 or targets.shape[1] != 2:
+            raise ValueError("fire plan targets need 2 values each: commander_distance, commander_azimuth")
+        gun_azimuths = body.get("gun_azimuths")
+        arguments = (
+            ship_type, finite_float("ship_azimuth", body["ship_azimuth"]), targets,
+            finite_float("wind_azimuth", body.get("wind_azimuth", 0.0)), finite_float("wind_strength", body.get("wind_strength", 0.0)),
+            None if gun_azimuths is None else finite_array("gun_azimuths", gun_azimuths),
+        )
+        if len(targets) < FIRE_PLAN_POOL_THRESHOLD:
+            return plan_fire(*arguments)
+        return await self.run_in_pool(plan_fire, *arguments)
+
+    # Function to solve a fleet fire call; each ship's entry gets its chat messages
+    def fleet(self, body):
+        fleet, wind_azimuth, wind_strength = fleet_from_dict(body)
+        solution = solve_fleet(fleet, body["targets"], wind_azimuth, wind_strength)
+        result = solution.to_dict()
+        for ship, messages in zip(result["ships"], fleet_chat_lines(solution).values()):
+            ship["chat"] = messages
+        return result
+
+    # Function to run a function in the process pool, starting the pool on first use
+    async def run_in_pool(self, function, *arguments):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers)
+        return await asyncio.get_running_loop().run_in_executor(self.pool, function, *arguments)
+
+    # Function to report the fitted wind of a named estimator
+    def wind(self, name):
+        estimator = self.estimators.get(name)
+        if estimator is None or estimator.count == 0:
+            return {"name": name, "splashes": 0}
+        wind_azimuth, wind_strength = estimator.wind()
+        uncertainty = estimator.uncertainty()
+        return {
+            "name": name,
+            "wind_azimuth": round(wind_azimuth, 1) % 360,
+            "wind_strength": round(wind_strength, 1),
+            "uncertainty": None if math.isinf(uncertainty) else round(uncertainty, 2),
+            "splashes": estimator.count,
+            "effective_splashes": round(estimator.effective_count(), 2),
+        }
+
+    # Function to add one or more splashes to a named estimator
+    def add_splashes(self, name, body):
+        # Check every splash before adding any, so one bad value cannot poison the estimator or apply half a request
+        splashes = []
+        for splash in body.get("splashes", [body]):
+            ship_type = str(splash["ship"]).lower()
+            if ship_type not in SHIP_TYPES:
+                raise ValueError(f"unknown ship type {splash['ship']!r} (known: {', '.join(sorted(SHIP_TYPES))})")
+            gun = int(splash.get("gun", SHIP_TYPES[ship_type].wind_reference_gun))
+            if not 0 <= gun < len(SHIP_TYPES[ship_type].guns):
+                raise ValueError(f"{SHIP_TYPES[ship_type].name} has no gun {gun}")
+            values = [finite_float(field, splash[field]) for field in SPLASH_FIELDS if field != "gun"]
+            # A missing target is logged as NaN (no hit rate), a given one must be a number
+            target = [finite_float(field, splash[field]) if field in splash else math.nan for field in SPLASH_TARGET_FIELDS]
+            timestamp = None if splash.get("timestamp") is None else finite_float("timestamp", splash["timestamp"])
+            splashes.append((ship_type, gun, values, target, timestamp))
+
+        estimator = self.estimators.setdefault(name, WindEstimator())
+        for ship_type, gun, values, target, timestamp in splashes:
+            estimator.add_splash(ship_type, values[0], gun, *values[1:], timestamp=timestamp)
+            if self.mission_log is not None:
+                self.mission_log.log_splash(ship_type, values[0], gun, *values[1:], *estimator.wind(), *target, timestamp=timestamp)
+        return self.wind(name)
+
+    # Function to report the shared wind of a region
+    def region_wind(self, region):
+        return self.wind_store.current(region) or {"region": region, "reports": 0}
+
+    # Function to publish a wind estimate to the shared store of a region
+    # Every publisher names itself with "source"; make_report rejects missing sources and poisonous values (400)
+    def publish_region_wind(self, region, body):
+        return self.wind_store.publish(
+            region, body.get("source"), body["wind_azimuth"], body["wind_strength"], body.get("weight", 1.0), body.get("timestamp"),
+        )
+
+    # Function to reset a named estimator
+    def reset_wind(self, name):
+        self.estimators.pop(name, None)
+        return self.wind(name)
+
+    # Function to shut down the process pool
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+# Base handler answering JSON and turning bad requests into 400 responses
+class JsonHandler(tornado.web.RequestHandler):
+    def initialize(self, service):
+        self.service = service
+
+    def set_default_headers(self):
+        self.set_header("Content-Type", "application/json")
+
+    # Function to parse the request body
+    def json_body(self):
+        try:
+            return json.loads(self.request.body or b"{}")
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, reason=f"invalid JSON: {e}")
+
+    # Function to run a request and write its result or error
+    async def answer(self, compute):
+        try:
+            result = compute()
+            if asyncio.iscoroutine(result):
+                result = await result
+        except (ValueError, KeyError, TypeError) as e:
+            self.set_status(400)
+            result = {"error": f"{type(e).__name__}: {e}"}
+        self.finish(json.dumps(result))
+
+    def write_error(self, status_code, **kwargs):
+        self.finish(json.dumps({"error": self._reason}))
+
+class SolveHandler(JsonHandler):
+    async def post(self):
+        await self.answer(lambda: self.service.solve(self.json_body()))
+
+class PlanHandler(JsonHandler):
+    async def post(self):
+        await self.answer(lambda: self.service.plan(self.json_body()))
+
+class FirePlanHandler(JsonHandler):
+    async def post(self):
+        await self.answer(lambda: self.service.fire_plan(self.json_body()))
+
+class FleetHandler(JsonHandler):
+    async def post(self):
+        await self.answer(lambda: self.service.fleet(self.json_body()))
+
+class MetricsHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.set_header("Content-Type", "text/plain; version=0.0.4")
+        self.finish(METRICS.render_prometheus())
+
+class RegionWindHandler(JsonHandler):
+    async def get(self, region):
+        await self.answer(lambda: self.service.region_wind(region))
+
+    async def post(self, region):
+        await self.answer(lambda: self.service.publish_region_wind(region, self.json_body()))
+
+class WindHandler(JsonHandler):
+    async def get(self, name):
+        await self.answer(lambda: self.service.wind(name))
+
+    async def post(self, name):
+        await self.answer(lambda: self.service.add_splashes(name, self.json_body()))
+
+    async def delete(self, name):
+        await self.answer(lambda: self.service.reset_wind(name))
+
+# WebSocket handler, every message is answered in its own task so concurrent solves are batched together
+class FireControlSocket(tornado.websocket.WebSocketHandler):
+    def initialize(self, service):
+        self.service = service
+        self.subscriptions = {}
+
+    def on_message(self, message):
+        asyncio.ensure_future(self.answer(message))
+
+    def on_close(self):
+        for unsubscribe in self.subscriptions.values():
+            unsubscribe()
+        self.subscriptions.clear()
+
+    # Function to push a region's shared wind to this socket whenever it changes
+    # Store callbacks can run on another thread, so the message is handed to the event loop
+    def subscribe_region(self, region):
+        region = region_key(region)
+        if region not in self.subscriptions:
+            loop = asyncio.get_running_loop()
+
+            def push(estimate):
+                loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self.push(estimate)))
+
+            self.subscriptions[region] = self.service.wind_store.subscribe(region, push)
+        return self.service.region_wind(region)
+
+    # Function to send one pushed region update
+    async def push(self, estimate):
+        try:
+            await self.write_message(json.dumps({"op": "region_update", **estimate}))
+        except tornado.websocket.WebSocketClosedError:
+            pass
+
+    # Function to answer one message
+    async def answer(self, message):
+        request_id = None
+        try:
+            body = json.loads(message)
+            request_id = body.pop("id", None)
+            op = body.pop("op", "solve")
+            if op == "solve":
+                result = await self.service.solve(body)
+            elif op == "plan":
+                result = await self.service.plan(body)
+            elif op == "fire_plan":
+                result = await self.service.fire_plan(body)
+            elif op == "fleet":
+                result = self.service.fleet(body)
+            elif op == "wind":
+                result = self.service.wind(str(body["name"]))
+            elif op == "splash":
+                result = self.service.add_splashes(str(body.pop("name")), body)
+            elif op == "reset":
+                result = self.service.reset_wind(str(body["name"]))
+            elif op == "region_wind":
+                result = self.service.region_wind(str(body["region"]))
+            elif op == "region_publish":
+                result = self.service.publish_region_wind(str(body.pop("region")), body)
+            elif op == "region_subscribe":
+                result = self.subscribe_region(str(body["region"]))
+            elif op == "region_unsubscribe":
+                region = region_key(body["region"])
+                unsubscribe = self.subscriptions.pop(region, None)
+                if unsubscribe is not None:
+                    unsubscribe()
+                result = {"region": region, "subscribed": False}
+            else:
+                raise ValueError(f"unknown op {op!r} (known: solve, plan, fire_plan, fleet, wind, splash, reset, region_wind, "
+                                 "region_publish, region_subscribe, region_unsubscribe)")
+        except (ValueError, KeyError, TypeError) as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+        except Exception as e:
+            # Answer anyway, so the client is not left waiting for a reply that never comes
+            LOGGER.exception("WebSocket request failed")
+            result = {"error": f"internal error: {type(e).__name__}: {e}"}
+        if request_id is not None:
+            result = {"id": request_id, **result}
+        try:
+            await self.write_message(json.dumps(result))
+        except tornado.websocket.WebSocketClosedError:
+            pass
+
+# Function to build the Tornado application around a service
+def make_app(service):
+    routes = [
+        (r"/solve", SolveHandler),
+        (r"/plan", PlanHandler),
+        (r"/fire-plan", FirePlanHandler),
+        (r"/fleet", FleetHandler),
+        (r"/wind/([\w.-]+)", WindHandler),
+        (r"/region-wind/([^/]+)", RegionWindHandler),
+        (r"/ws", FireControlSocket),
+    ]
+    return tornado.web.Application([(path, handler, {"service": service}) for path, handler in routes] + [(r"/metrics", MetricsHandler)])
+
+# Function to run the server until interrupted
+async def serve(host, port, workers, mission_log_file=None):
+    mission_log = MissionLog(mission_log_file) if mission_log_file else MISSION_LOG
+    service = FireControlService(workers, mission_log=mission_log)
+    server = make_app(service).listen(port, address=host)
+    print(f"Fire-control API listening on http://{host}:{port}", flush=True)
+    # SIGTERM stops the server like Ctrl+C, so buffered log records are written
+    stopped = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+    try:
+        await stopped.wait()
+    finally:
+        server.stop()
+        service.close()
+        if mission_log is not None:
+            mission_log.close()
+
+# Function to run the command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/WebSocket fire-control API for the naval artillery solvers.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to bind (default: {DEFAULT_HOST}, local only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="process pool size for large plans")
+    parser.add_argument("--mission-log", help="append every mission and splash to this binary log (default: NAVAL_MISSION_LOG)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.mission_log))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,212 @@
+# Fast cold start for the desktop build
+# Launching the calculator is dominated by imports: Streamlit and its server, then NumPy and every module
+# built on it. The main menu needs none of the solver modules, so the UI imports them on the screens that
+# use them, and prewarm loads them in a background thread (together with the lookup tables and the caches
+# of the default inputs) while the crew is still picking a ship.
+#
+# This module is also the entry point of the frozen build. It starts the prewarm thread before Streamlit,
+# then runs the UI in-process with the settings that only cost start time in a desktop app turned off
+# (file watcher, run on save, usage stats), bound to this machine so no network address is looked up. Build a one-folder app; a one-file app unpacks itself to a
+# temporary folder on every start:
+#     pyinstaller --onedir --name NavalCalc --collect-all streamlit --copy-metadata streamlit \
+#         --add-data "NavalCalcWarden.py:." --add-data "ships.json:." naval_startup.py
+# (add --add-data "tables:tables" when lookup tables were built)
+#
+# Startup profiler, run from source: times every import of a cold interpreter (python -X importtime) and
+# the time to the first firing solution, and fails when that is over the budget:
+#     python naval_startup.py --profile [--budget 2.5] [--top 25]
+#
+# Settings (environment variables):
+#     NAVAL_STARTUP_BUDGET   seconds allowed from start to the first solution (default 2.5)
+#     NAVAL_PREWARM          set to 0 to skip the background prewarm
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from naval_metrics import METRICS
+
+# Taken when the module is first imported; the frozen build imports it before anything else
+PROCESS_START = time.perf_counter()
+STARTUP_BUDGET = float(os.environ.get("NAVAL_STARTUP_BUDGET", 2.5))
+PREWARM_ENABLED = os.environ.get("NAVAL_PREWARM", "1") != "0"
+# Streamlit settings of the desktop build; each one skips work done at every start
+FAST_START_OPTIONS = {
+    "global.developmentMode": False,
+    "server.fileWatcherType": "none",
+    "server.runOnSave": False,
+    "browser.gatherUsageStats": False,
+}
+# Mission solved by the profiler probe and the prewarm
+PROBE_MISSION = (0.0, 100.0, 0.0, 0.0, 0.0)
+APP_SCRIPT = "NavalCalcWarden.py"
+
+# Startup times of this process in seconds, None until reached
+STARTUP_TIMES = {"prewarm": None, "first_solution": None}
+STARTUP_EVENTS = {"prewarm": "the background prewarm finished", "first_solution": "the first firing solution was shown"}
+prewarm_thread = None
+prewarm_lock = threading.Lock()
+
+# Function to export the startup times as gauges
+def collect_startup_times():
+    return [
+        (f"naval_startup_{name}_seconds", "gauge", f"Seconds from process start until {STARTUP_EVENTS[name]}", {}, seconds)
+        for name, seconds in STARTUP_TIMES.items() if seconds is not None
+    ]
+
+METRICS.register_collector(collect_startup_times)
+
+# Function to record the first firing solution shown by this process
+def mark_first_solution():
+    if STARTUP_TIMES["first_solution"] is None:
+        STARTUP_TIMES["first_solution"] = time.perf_counter() - PROCESS_START
+
+# Function to load everything the calculator screens need ahead of the first use
+# Every import is spelled out so PyInstaller finds the modules of the UI, which it cannot see in the script
+def prewarm():
+    start = time.perf_counter()
+
+    # Step 1: The solver modules and the optional sections of the calculator screens
+    import naval_coverage
+    import naval_dispersion
+    import naval_engine
+    import naval_export
+    import naval_heading
+    import naval_log
+    import naval_planner
+    import naval_windstore
+    import wind_estimator
+    from naval_core import SHIP_TYPES, has_firing_table, solve_firing_solution
+
+    for ship_type in SHIP_TYPES:
+        # Step 2: Open the lookup tables, so their first lookup does not pay for reading the grid metadata
+        if has_firing_table(ship_type):
+            from naval_tables import open_firing_table
+            open_firing_table(ship_type)
+
+        # Step 3: Run each solver once (NumPy sets up its loops on first use) and fill the caches for the
+        # inputs a calculator screen opens with
+        solve_firing_solution(ship_type, *PROBE_MISSION)
+        naval_engine.solve_guns_batch(ship_type, *PROBE_MISSION)
+        naval_coverage.coverage_map(ship_type, PROBE_MISSION[0])
+        naval_heading.best_headings(ship_type, *PROBE_MISSION)
+
+    STARTUP_TIMES["prewarm"] = time.perf_counter() - PROCESS_START
+    return time.perf_counter() - start
+
+# Function to run prewarm once per process in a daemon thread
+# Streamlit runs the script in the same process, so whatever the thread loads is shared with every session
+def start_prewarm():
+    global prewarm_thread
+    with prewarm_lock:
+        if prewarm_thread is None and PREWARM_ENABLED:
+            prewarm_thread = threading.Thread(target=prewarm, name="naval-prewarm", daemon=True)
+            prewarm_thread.start()
+    return prewarm_thread
+
+# Function to find the UI script, next to this module or in the folder of a frozen build
+def app_script_path():
+    base = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, APP_SCRIPT)
+
+# Function to run the calculator UI in this process with the fast start settings
+def launch(port=None, headless=False, address="localhost"):
+    start_prewarm()
+    from streamlit.web import bootstrap
+
+    flag_options = {**FAST_START_OPTIONS, "server.headless": headless, "server.address": address}
+    if port is not None:
+        flag_options["server.port"] = port
+    bootstrap.load_config_options(flag_options=flag_options)
+    bootstrap.run(app_script_path(), False, [], flag_options)
+
+# Function to time the cold path of the calculator in this interpreter and print it as JSON
+# Run by the profiler in a fresh interpreter; stages are cumulative seconds since this module was loaded
+def probe():
+    stages = {}
+    from streamlit.web import bootstrap
+    stages["streamlit"] = time.perf_counter()
+    # The modules of the main menu
+    import naval_core
+    import naval_metrics
+    stages["main_menu"] = time.perf_counter()
+    # The modules a calculator screen draws with
+    import naval_log
+    import naval_windstore
+    import wind_estimator
+    stages["calculator"] = time.perf_counter()
+    naval_core.calculate_firing_solution("frigate", *PROBE_MISSION)
+    stages["first_solution"] = time.perf_counter()
+    print(json.dumps({name: seconds - PROCESS_START for name, seconds in stages.items()}))
+
+# Function to parse the output of python -X importtime
+# Returns (module, self seconds, cumulative seconds) tuples in import order
+def parse_import_times(text):
+    imports = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return imports
+
+# Function to profile a cold start in a fresh interpreter
+# Returns the wall time of the whole run, the probe stages and the parsed import times
+def profile_startup():
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", os.path.abspath(__file__), "--probe"],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    wall = time.perf_counter() - start
+    return wall, json.loads(result.stdout.strip().splitlines()[-1]), parse_import_times(result.stderr)
+
+# Function to turn a profile into report lines: stages, import cost per package, slowest modules
+def format_profile(wall, stages, imports, budget=STARTUP_BUDGET, top=20):
+    lines = [f"Cold start: {wall:.3f} s wall, first solution after {stages['first_solution']:.3f} s "
+             f"(budget {budget:g} s, {'ok' if stages['first_solution'] <= budget else 'OVER BUDGET'})"]
+    previous = 0.0
+    for name, seconds in stages.items():
+        lines.append(f"    {name:<16}{seconds:8.3f} s  (+{seconds - previous:.3f} s)")
+        previous = seconds
+
+    packages = {}
+    for name, self_seconds, _ in imports:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + self_seconds
+    lines.append(f"Import cost per package ({len(imports)} modules, {sum(packages.values()):.3f} s):")
+    for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"    {package:<32}{1000 * seconds:9.1f} ms")
+
+    lines.append("Slowest modules (self / cumulative):")
+    for name, self_seconds, cumulative_seconds in sorted(imports, key=lambda entry: -entry[1])[:top]:
+        lines.append(f"    {name:<48}{1000 * self_seconds:9.1f} ms {1000 * cumulative_seconds:9.1f} ms")
+    return lines
+
+# Function to run the command line entry point (the desktop app, or the profiler)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Start the calculator with a fast cold start, or profile its startup.")
+    parser.add_argument("--port", type=int, help="port of the calculator UI (default: Streamlit's)")
+    parser.add_argument("--address", default="localhost", help="address to serve the UI on (default: localhost, this machine only)")
+    parser.add_argument("--headless", action="store_true", help="do not open a browser window")
+    parser.add_argument("--profile", action="store_true", help="profile a cold start in a fresh interpreter instead of starting the UI")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET, help=f"seconds allowed to the first solution (default: {STARTUP_BUDGET:g})")
+    parser.add_argument("--top", type=int, default=20, help="packages and modules listed by the profiler")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        probe()
+        return 0
+    if args.profile:
+        wall, stages, imports = profile_startup()
+        print("\n".join(format_profile(wall, stages, imports, args.budget, args.top)))
+        return 0 if stages["first_solution"] <= args.budget else 1
+    launch(args.port, args.headless, args.address)
+    return 0
+
+if __name__ == "__main__":
+    # The UI imports this module by name; let that find the running module instead of loading a second copy
+    sys.modules.setdefault("naval_startup", sys.modules[__name__])
+    sys.exit(main())
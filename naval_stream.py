@@ -0,0 +1,87 @@
+# Streaming re-solve for a ship that keeps turning or drifting
+# Consumes timestamped ship updates and only emits a solution when what the crew sees changes:
+# a rounded azimuth/distance or a gun moving in or out of its firing arc.
+#
+# Updates are (timestamp, ship_azimuth) pairs, or dictionaries with a "timestamp" and any of
+# ship_azimuth, commander_distance, commander_azimuth, wind_azimuth and wind_strength.
+import time
+
+from naval_core import SHIP_TYPES, solve_guns_for_target, solve_target, to_firing_solution
+
+TARGET_FIELDS = ["commander_distance", "commander_azimuth", "wind_azimuth", "wind_strength"]
+# Headings remembered per target, so a ship swinging back and forth re-uses earlier solves
+HEADING_MEMO_SIZE = 3600
+
+# Incremental solver for one ship and one target
+# The wind-adjusted target is only recomputed when the target or the wind changes, headings are
+# memoized per 0.1 degree, and update() returns None when the displayed solution did not change.
+class StreamingSolver:
+    def __init__(self, ship_type, commander_distance, commander_azimuth, wind_azimuth=0.0, wind_strength=0.0):
+        self.ship = SHIP_TYPES[ship_type]
+        self.ship_type = ship_type
+        self.target = None
+        self.last_solution = None
+        self.set_target(commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+
+    # Function to change the target or the wind, keeping whatever was not passed
+    def set_target(self, commander_distance=None, commander_azimuth=None, wind_azimuth=None, wind_strength=None):
+        target = tuple(
+            old if new is None else float(new)
+            for old, new in zip(self.target or (None,) * 4, (commander_distance, commander_azimuth, wind_azimuth, wind_strength))
+        )
+        if target != self.target:
+            self.target = target
+            self.x0, self.y0 = solve_target(*target)
+            self.headings = {}
+
+    # Function to solve the current target for a ship heading, returning a FiringSolution
+    def solve(self, ship_azimuth):
+        key = round(ship_azimuth * 10)
+        solution = self.headings.get(key)
+        if solution is None:
+            if len(self.headings) >= HEADING_MEMO_SIZE:
+                self.headings.clear()
+            solution = to_firing_solution(self.ship_type, solve_guns_for_target(self.ship, key / 10, self.x0, self.y0))
+            self.headings[key] = solution
+        return solution
+
+    # Function to apply one heading (and optional target/wind change)
+    # Returns the solution if it differs from the last one returned, otherwise None
+    def update(self, ship_azimuth, **target):
+        if target:
+            self.set_target(**target)
+        solution = self.solve(ship_azimuth)
+        if solution == self.last_solution:
+            return None
+        self.last_solution = solution
+        return solution
+
+# Function to split one update into (timestamp, ship_azimuth, target changes)
+def parse_update(update, ship_azimuth):
+    if isinstance(update, dict):
+        target = {name: update[name] for name in TARGET_FIELDS if name in update}
+        return update.get("timestamp", time.time()), update.get("ship_azimuth", ship_azimuth), target
+    timestamp, ship_azimuth = update
+    return timestamp, ship_azimuth, {}
+
+# Generator of changed solutions for a stream of ship updates
+# Yields (timestamp, ship_azimuth, FiringSolution) only when the displayed solution changes;
+# the first update always yields
+def stream_solutions(ship_type, updates, commander_distance, commander_azimuth, wind_azimuth=0.0, wind_strength=0.0):
+    solver = StreamingSolver(ship_type, commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+    ship_azimuth = 0.0
+    for update in updates:
+        timestamp, ship_azimuth, target = parse_update(update, ship_azimuth)
+        solution = solver.update(ship_azimuth, **target)
+        if solution is not None:
+            yield timestamp, ship_azimuth, solution
+
+# Async version of stream_solutions for an async iterable of ship updates
+async def astream_solutions(ship_type, updates, commander_distance, commander_azimuth, wind_azimuth=0.0, wind_strength=0.0):
+    solver = StreamingSolver(ship_type, commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+    ship_azimuth = 0.0
+    async for update in updates:
+        timestamp, ship_azimuth, target = parse_update(update, ship_azimuth)
+        solution = solver.update(ship_azimuth, **target)
+        if solution is not None:
+            yield timestamp, ship_azimuth, solution
@@ -0,0 +1,234 @@
+# Precomputed firing-solution lookup tables
+# A solution only depends on the target's bearing relative to the ship and its distance,
+# so one table per ship type over a (relative bearing, distance) grid answers every heading.
+#
+# Build the tables offline:
+#     python naval_tables.py --output tables --bearing-step 0.1 --distance-step 0.5 --max-distance 400
+#
+# Each ship gets <ship>.npy (uint16 array opened with memory mapping) and <ship>.json (grid metadata).
+# A rebuild writes both to temporary files and swaps them in, the .json last, so processes that have the
+# old table mapped keep reading it and a reopen only happens once the new table is complete.
+# Array layout is (bearing, distance, gun, 2): azimuth relative to the ship in tenths of a degree with
+# CAN_FIRE_BIT set when the gun bears, and distance in tenths.
+import argparse
+import json
+import math
+import os
+import warnings
+
+import numpy as np
+
+from naval_core import SHIP_TYPES, TABLES_DIR, FiringSolution
+from naval_engine import calculate_cos_sin_batch, solve_guns_batch
+
+TABLE_FORMAT_VERSION = 1
+CAN_FIRE_BIT = 0x8000
+VALUE_MASK = 0x7FFF
+# Bearings per build step, keeps the builder's working set small
+BUILD_BEARINGS_PER_STEP = 60
+
+# Function to describe a ship's geometry, stored with each table so stale tables are detected
+def ship_signature(ship_type):
+    ship = SHIP_TYPES[ship_type]
+    return {"gun_names": ship.gun_names, "guns": ship.guns}
+
+# Function to build the lookup table for one ship type
+def build_table(ship_type, directory=TABLES_DIR, bearing_step=0.1, distance_step=0.5, max_distance=400.0):
+    ship = SHIP_TYPES[ship_type]
+    bearing_count = int(round(360 / bearing_step))
+    distance_count = int(round(max_distance / distance_step)) + 1
+    largest_offset = max(abs(offset) for offset, _, _, _ in ship.guns)
+    if (max_distance + largest_offset) * 10 > VALUE_MASK:
+        raise ValueError(f"max_distance {max_distance} does not fit the table format")
+
+    os.makedirs(directory, exist_ok=True)
+    data_path = os.path.join(directory, f"{ship_type}.npy")
+    metadata_path = os.path.join(directory, f"{ship_type}.json")
+    # Never write into the live files: truncating a mapped .npy hands other processes zeroed solutions
+    temp_data_path = f"{data_path}.{os.getpid()}.tmp"
+    temp_metadata_path = f"{metadata_path}.{os.getpid()}.tmp"
+    try:
+        table = np.lib.format.open_memmap(
+            temp_data_path, mode="w+", dtype=np.uint16, shape=(bearing_count, distance_count, len(ship.guns), 2)
+        )
+        distances = np.arange(distance_count) * distance_step
+        for start in range(0, bearing_count, BUILD_BEARINGS_PER_STEP):
+            bearings = np.arange(start, min(start + BUILD_BEARINGS_PER_STEP, bearing_count)) * bearing_step
+            # With the ship at azimuth 0 and no wind, the solver returns azimuths relative to the ship
+            A, d, can_fire = solve_guns_batch(ship_type, 0.0, distances[None, :], bearings[:, None], 0.0, 0.0, decimals=1)
+            azimuth_tenths = np.rint(A * 10).astype(np.uint16) % 3600
+            table[start:start + len(bearings), :, :, 0] = azimuth_tenths | np.where(can_fire, CAN_FIRE_BIT, 0).astype(np.uint16)
+            table[start:start + len(bearings), :, :, 1] = np.rint(d * 10).astype(np.uint16)
+        table.flush()
+        del table
+        os.replace(temp_data_path, data_path)
+    except BaseException:
+        if os.path.exists(temp_data_path):
+            os.remove(temp_data_path)
+        raise
+
+    metadata = {
+        "version": TABLE_FORMAT_VERSION,
+        "ship_type": ship_type,
+        "bearing_step": bearing_step,
+        "distance_step": distance_step,
+        "max_distance": max_distance,
+        "ship": ship_signature(ship_type),
+    }
+    try:
+        with open(temp_metadata_path, "w", encoding="utf-8") as metadata_file:
+            json.dump(metadata, metadata_file, indent=2)
+        os.replace(temp_metadata_path, metadata_path)
+    except BaseException:
+        if os.path.exists(temp_metadata_path):
+            os.remove(temp_metadata_path)
+        raise
+    return data_path
+
+# Memory-mapped lookup table for one ship type
+# Worker processes opening the same file share its pages through the OS page cache
+class FiringTable:
+    def __init__(self, ship_type, directory=TABLES_DIR):
+        with open(os.path.join(directory, f"{ship_type}.json"), encoding="utf-8") as metadata_file:
+            metadata = json.load(metadata_file)
+        if metadata["version"] != TABLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported table format version {metadata['version']} for {ship_type}")
+        if json.loads(json.dumps(ship_signature(ship_type))) != metadata["ship"]:
+            raise ValueError(f"Lookup table for {ship_type} does not match ships.json, rebuild it")
+        self.ship_type = ship_type
+        self.bearing_step = metadata["bearing_step"]
+        self.distance_step = metadata["distance_step"]
+        self.max_distance = metadata["max_distance"]
+        # Plain ndarray view of the memory map, indexing it skips np.memmap's per-access overhead
+        self.table = np.asarray(np.load(os.path.join(directory, f"{ship_type}.npy"), mmap_mode="r"))
+        self.bearing_count, self.distance_count = self.table.shape[:2]
+        # Between the two swaps of a rebuild the .npy may already be the new one; refuse a pair that does not fit
+        expected = (int(round(360 / self.bearing_step)), int(round(self.max_distance / self.distance_step)) + 1, len(SHIP_TYPES[ship_type].guns), 2)
+        if self.table.shape != expected:
+            raise ValueError(f"Lookup table for {ship_type} does not match its metadata, it is being rebuilt")
+
+    # Function to look up one target as a FiringSolution
+    # Returns None unless the query lies exactly on the table grid (no wind, grid bearing and distance),
+    # so callers fall back to the solver whenever the table would only be approximate
+    def lookup_solution(self, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+        if wind_strength != 0:
+            return None
+        bearing_index = ((commander_azimuth - ship_azimuth) % 360) / self.bearing_step
+        distance_index = commander_distance / self.distance_step
+        bearing_cell = round(bearing_index)
+        distance_cell = round(distance_index)
+        if abs(bearing_index - bearing_cell) > 1e-6 or abs(distance_index - distance_cell) > 1e-6:
+            return None
+        if distance_cell >= self.distance_count:
+            return None
+
+        azimuths = []
+        distances = []
+        can_fire = []
+        for azimuth_cell, distance_value in self.table[bearing_cell % self.bearing_count, distance_cell].tolist():
+            gun_fires = bool(azimuth_cell & CAN_FIRE_BIT)
+            azimuths.append(((azimuth_cell & VALUE_MASK) + round(ship_azimuth * 10)) % 3600 / 10 if gun_fires else math.nan)
+            distances.append(distance_value / 10)
+            can_fire.append(gun_fires)
+        return FiringSolution(self.ship_type, azimuths, distances, can_fire)
+
+    # Function to look up one target the way the calculators display it (legacy tuple, see lookup_solution)
+    def lookup_display_values(self, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength):
+        solution = self.lookup_solution(ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength)
+        return None if solution is None else solution.to_display_values()
+
+    # Function to look up whole arrays of targets (same inputs and outputs as solve_guns_batch with decimals=1)
+    # Uses the nearest grid cell, or bilinear interpolation between the four surrounding cells;
+    # with interpolation a gun only counts as bearing when it bears from all four cells.
+    # Targets beyond the table's distance range are solved directly.
+    def lookup_batch(self, ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength, interpolate=False):
+        values = np.broadcast_arrays(*(np.asarray(value, dtype=np.float64) for value in (ship_azimuth, commander_distance, commander_azimuth, wind_azimuth, wind_strength)))
+        sa, cd, ca, wa, ws = values
+
+        # Relative bearing and distance of the wind-corrected target
+        if np.any(ws != 0):
+            commander_cos, commander_sin = calculate_cos_sin_batch(ca)
+            wind_cos, wind_sin = calculate_cos_sin_batch(wa)
+            x0 = commander_cos * cd - wind_cos * ws
+            y0 = commander_sin * cd - wind_sin * ws
+            target_azimuth = np.degrees(np.arctan2(y0, x0))
+            target_distance = np.hypot(x0, y0)
+        else:
+            target_azimuth = ca
+            target_distance = cd
+        bearing_index = ((target_azimuth - sa) % 360) / self.bearing_step
+        distance_index = target_distance / self.distance_step
+        in_range = distance_index <= self.distance_count - 1
+        distance_index = np.where(in_range, distance_index, 0)
+
+        if interpolate:
+            b0 = np.floor(bearing_index).astype(np.intp)
+            r0 = np.minimum(np.floor(distance_index).astype(np.intp), self.distance_count - 2)
+            wb = (bearing_index - b0)[..., None]
+            wr = (distance_index - r0)[..., None]
+            b0 %= self.bearing_count
+            b1 = (b0 + 1) % self.bearing_count
+            cells = [self.table[b, r] for b, r in ((b0, r0), (b1, r0), (b0, r0 + 1), (b1, r0 + 1))]
+            can_fire = np.logical_and.reduce([(cell[..., 0] & CAN_FIRE_BIT) != 0 for cell in cells])
+            azimuths = [(cell[..., 0] & VALUE_MASK) / 10 for cell in cells]
+            distances = [cell[..., 1] / 10 for cell in cells]
+            # Interpolate azimuths along the shortest way round so 359.9 and 0.1 blend to 0.0
+            azimuths = [azimuths[0] + ((azimuth - azimuths[0] + 180) % 360 - 180) for azimuth in azimuths]
+            relative = (azimuths[0] * (1 - wb) + azimuths[1] * wb) * (1 - wr) + (azimuths[2] * (1 - wb) + azimuths[3] * wb) * wr
+            d = (distances[0] * (1 - wb) + distances[1] * wb) * (1 - wr) + (distances[2] * (1 - wb) + distances[3] * wb) * wr
+            A = np.round((relative + sa[..., None]) % 360, 1)
+            d = np.round(d, 1)
+        else:
+            cell = self.table[np.rint(bearing_index).astype(np.intp) % self.bearing_count, np.rint(distance_index).astype(np.intp)]
+            can_fire = (cell[..., 0] & CAN_FIRE_BIT) != 0
+            A = ((cell[..., 0] & VALUE_MASK) + np.rint(sa * 10).astype(np.int64)[..., None]) % 3600 / 10
+            d = cell[..., 1] / 10
+
+        if not np.all(in_range):
+            outside = ~in_range
+            A[outside], d[outside], can_fire[outside] = solve_guns_batch(
+                self.ship_type, sa[outside], cd[outside], ca[outside], wa[outside], ws[outside], decimals=1
+            )
+        return A, d, can_fire
+
+# Tables opened by this process: (ship type, directory) -> (modification time of the .json file, table or None)
+OPEN_TABLES = {}
+
+# Function to open the lookup table for a ship type, reopening it when the table was rebuilt
+# The .json is swapped in last by build_table, so its modification time marks a complete table
+# Returns None when no table has been built, or when it cannot be used (stale or unreadable), so callers
+# solve directly; an unusable table is reported once per file version
+def open_firing_table(ship_type, directory=TABLES_DIR):
+    key = (ship_type, directory)
+    try:
+        modified = os.stat(os.path.join(directory, f"{ship_type}.json")).st_mtime_ns
+    except OSError:
+        OPEN_TABLES.pop(key, None)
+        return None
+    entry = OPEN_TABLES.get(key)
+    if entry is None or entry[0] != modified:
+        try:
+            table = FiringTable(ship_type, directory)
+        except (OSError, ValueError, KeyError) as e:
+            warnings.warn(f"Lookup table for {ship_type} in {directory} is not used, solving directly: {e}", RuntimeWarning)
+            table = None
+        entry = OPEN_TABLES[key] = (modified, table)
+    return entry[1]
+
+# Function to run the offline table builder from the command line
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build memory-mapped firing-solution lookup tables.")
+    parser.add_argument("--output", default=TABLES_DIR, help="directory to write the tables to")
+    parser.add_argument("--ship", action="append", choices=sorted(SHIP_TYPES), help="ship type to build (default: all)")
+    parser.add_argument("--bearing-step", type=float, default=0.1, help="relative bearing step in degrees")
+    parser.add_argument("--distance-step", type=float, default=0.5, help="distance step")
+    parser.add_argument("--max-distance", type=float, default=400.0, help="largest commander distance in the table")
+    args = parser.parse_args(argv)
+
+    for ship_type in args.ship or sorted(SHIP_TYPES):
+        path = build_table(ship_type, args.output, args.bearing_step, args.distance_step, args.max_distance)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"{SHIP_TYPES[ship_type].name}: {path} ({size_mb:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
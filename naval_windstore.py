@@ -0,0 +1,348 @@
+# Shared wind store keyed by region / grid square
+# One spotter's wind estimate serves every ship in the same area: sessions publish time-stamped
+# reports for a region, the store merges the latest report of every source (session, bot, ...) into one
+# estimate, drops reports older than the expiry, and calls subscribers whenever a region's estimate changes.
+#
+# Reports travel through a backend, so several server processes can share one store:
+#     LocalBackend    in-process only (default), one store per server process
+#     SocketBackend   connects to a wind hub that relays every report to every connected process
+# The hub is a small TCP relay speaking one JSON report per line; it replays the reports it knows to
+# processes that connect later:
+#     python naval_windstore.py --host 127.0.0.1 --port 8766
+#
+# Settings (environment variables):
+#     NAVAL_WIND_HUB      host:port of a wind hub; WIND_STORE uses a SocketBackend to it when set
+#     NAVAL_WIND_EXPIRY   seconds after which a report is dropped (default 900)
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import socket
+import sys
+import threading
+import time
+
+from naval_core import calculate_azimuth, to_radians
+from wind_estimator import DEFAULT_HALF_LIFE
+
+DEFAULT_HUB_HOST = "127.0.0.1"
+DEFAULT_HUB_PORT = 8766
+WIND_HUB = os.environ.get("NAVAL_WIND_HUB")
+WIND_EXPIRY = float(os.environ.get("NAVAL_WIND_EXPIRY", 900))
+# Seconds between reconnect attempts of a SocketBackend
+RECONNECT_DELAY = 2.0
+# Seconds a report's timestamp may lie in the future (clock skew between processes and publishers)
+MAX_CLOCK_SKEW = 60.0
+LOGGER = logging.getLogger("naval_windstore")
+
+# Function to turn a region name or grid square into its store key ("Deadlands  C4" and "deadlands c4" match)
+def region_key(region):
+    key = " ".join(str(region).split()).casefold()
+    if not key:
+        raise ValueError("region must not be empty")
+    return key
+
+# Function to build one wind report as sent through the backends
+# Raises ValueError for values that would poison a region's estimate: a missing source (each publisher needs
+# its own, or they overwrite each other), non-finite wind, a weight that is not positive, or a timestamp
+# further in the future than MAX_CLOCK_SKEW (it would never expire and block the source's later reports)
+def make_report(region, source, wind_azimuth, wind_strength, weight=1.0, timestamp=None):
+    source = str(source).strip() if source is not None else ""
+    if not source:
+        raise ValueError("source must name the publisher")
+    wind_azimuth, wind_strength, weight = float(wind_azimuth), float(wind_strength), float(weight)
+    if not math.isfinite(wind_azimuth):
+        raise ValueError(f"wind_azimuth must be a finite number, got {wind_azimuth}")
+    if not (math.isfinite(wind_strength) and wind_strength >= 0):
+        raise ValueError(f"wind_strength must be a finite number >= 0, got {wind_strength}")
+    if not (math.isfinite(weight) and weight > 0):
+        raise ValueError(f"weight must be a finite number > 0, got {weight}")
+    now = time.time()
+    timestamp = now if timestamp is None else float(timestamp)
+    if not (math.isfinite(timestamp) and timestamp <= now + MAX_CLOCK_SKEW):
+        raise ValueError(f"timestamp must be a finite time at most {MAX_CLOCK_SKEW:g} s ahead of now, got {timestamp}")
+    return {
+        "region": region_key(region),
+        "source": source,
+        "wind_azimuth": wind_azimuth % 360,
+        "wind_strength": wind_strength,
+        "weight": weight,
+        "timestamp": timestamp,
+    }
+
+# Function to check a report relayed by a hub or another process, returning it rebuilt by make_report
+# Raises ValueError, KeyError or TypeError for a report that is malformed or fails make_report's checks
+def check_report(report):
+    if report["timestamp"] is None:
+        raise ValueError("relayed reports need a timestamp")
+    return make_report(report["region"], report["source"], report["wind_azimuth"], report["wind_strength"], report["weight"], report["timestamp"])
+
+# Backend that delivers reports straight back to its own store
+class LocalBackend:
+    def attach(self, store):
+        self.store = store
+
+    def send(self, report):
+        self.store.apply(report)
+
+    def close(self):
+        pass
+
+# Backend that shares reports with other processes through a wind hub
+# Reports are applied locally first, so the store keeps working while the hub is unreachable;
+# a reader thread applies what the hub relays (echoes of our own reports are ignored by apply)
+class SocketBackend:
+    def __init__(self, host=DEFAULT_HUB_HOST, port=DEFAULT_HUB_PORT):
+        self.address = (host, port)
+        self.connection = None
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def attach(self, store):
+        self.store = store
+        self.reader = threading.Thread(target=self.read_loop, name="wind-hub-reader", daemon=True)
+        self.reader.start()
+
+    # Function to apply a report and forward it to the hub (dropped if the hub is unreachable)
+    def send(self, report):
+        self.store.apply(report)
+        data = (json.dumps(report) + "\n").encode()
+        with self.lock:
+            if self.connection is not None:
+                try:
+                    self.connection.sendall(data)
+                except OSError:
+                    self.connection = None
+
+    # Function to keep a hub connection open and apply every relayed report
+    def read_loop(self):
+        while not self.closed:
+            try:
+                connection = socket.create_connection(self.address, timeout=RECONNECT_DELAY)
+                connection.settimeout(None)
+            except OSError:
+                time.sleep(RECONNECT_DELAY)
+                continue
+            with self.lock:
+                self.connection = connection
+                # Reports published while disconnected go to the hub once it is back
+                try:
+                    for report in self.store.reports():
+                        connection.sendall((json.dumps(report) + "\n").encode())
+                    replayed = True
+                except OSError:
+                    self.connection = None
+                    replayed = False
+            if not replayed:
+                connection.close()
+                time.sleep(RECONNECT_DELAY)
+                continue
+            try:
+                for line in connection.makefile("r", encoding="utf-8"):
+                    try:
+                        report = check_report(json.loads(line))
+                    except (ValueError, KeyError, TypeError) as e:
+                        LOGGER.warning("Dropped a report relayed by the wind hub: %s", e)
+                        continue
+                    self.store.apply(report)
+            except OSError:
+                pass
+            with self.lock:
+                self.connection = None
+            connection.close()
+
+    def close(self):
+        self.closed = True
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+# Merged wind state of every region
+class WindStore:
+    def __init__(self, backend=None, expiry=WIND_EXPIRY, half_life=DEFAULT_HALF_LIFE):
+        self.expiry = expiry
+        self.half_life = half_life
+        self.lock = threading.Lock()
+        # Latest report per region and source
+        self.regions = {}
+        self.subscribers = {}
+        self.backend = backend or LocalBackend()
+        self.backend.attach(self)
+
+    # Function to publish a wind estimate for a region; weight counts how much it is worth (e.g. its splashes)
+    # Returns the merged estimate of the region
+    def publish(self, region, source, wind_azimuth, wind_strength, weight=1.0, timestamp=None):
+        report = make_report(region, source, wind_azimuth, wind_strength, weight, timestamp)
+        self.backend.send(report)
+        return self.current(report["region"])
+
+    # Function to store a report from any backend and notify the region's subscribers
+    # A report is ignored unless it is newer than the last one of its source
+    def apply(self, report):
+        region = report["region"]
+        with self.lock:
+            reports = self.regions.setdefault(region, {})
+            previous = reports.get(report["source"])
+            if previous is not None and previous["timestamp"] >= report["timestamp"]:
+                return
+            reports[report["source"]] = report
+            callbacks = list(self.subscribers.get(region, ()))
+        if callbacks:
+            estimate = self.current(region)
+            for callback in callbacks:
+                # A failing subscriber must not stop the others, nor the hub reader thread applying the report
+                try:
+                    callback(estimate)
+                except Exception:
+                    LOGGER.exception("Wind subscriber of region %r failed", region)
+
+    # Function to drop reports older than the expiry
+    def expire(self, now=None):
+        cutoff = (time.time() if now is None else now) - self.expiry
+        with self.lock:
+            for region, reports in list(self.regions.items()):
+                for source, report in list(reports.items()):
+                    if report["timestamp"] < cutoff:
+                        del reports[source]
+                if not reports:
+                    del self.regions[region]
+
+    # Function to return every stored report (for replaying to a hub)
+    def reports(self):
+        with self.lock:
+            return [report for reports in self.regions.values() for report in reports.values()]
+
+    # Function to merge the live reports of a region into one estimate
+    # Reports are averaged as wind vectors, weighted by their weight and faded with the half-life;
+    # spread is the weighted RMS distance of the reports from the merged vector.
+    # Returns None when the region has no live report.
+    def current(self, region, now=None):
+        now = time.time() if now is None else now
+        self.expire(now)
+        region = region_key(region)
+        with self.lock:
+            reports = list(self.regions.get(region, {}).values())
+        if not reports:
+            return None
+
+        total_weight = sum_x = sum_y = 0.0
+        vectors = []
+        for report in reports:
+            weight = report["weight"] * 0.5 ** (max(now - report["timestamp"], 0.0) / self.half_life)
+            x = math.cos(to_radians(report["wind_azimuth"])) * report["wind_strength"]
+            y = math.sin(to_radians(report["wind_azimuth"])) * report["wind_strength"]
+            vectors.append((weight, x, y))
+            total_weight += weight
+            sum_x += weight * x
+            sum_y += weight * y
+        if total_weight <= 0:
+            return None
+        x, y = sum_x / total_weight, sum_y / total_weight
+        spread = math.sqrt(sum(weight * ((vx - x) ** 2 + (vy - y) ** 2) for weight, vx, vy in vectors) / total_weight)
+        updated = max(report["timestamp"] for report in reports)
+        return {
+            "region": region,
+            "wind_azimuth": round(calculate_azimuth(x, y), 1) % 360,
+            "wind_strength": round(math.hypot(x, y), 1),
+            "spread": round(spread, 1),
+            "reports": len(reports),
+            "updated": updated,
+            # A report within MAX_CLOCK_SKEW of the future counts as just in, not as a negative age
+            "age": round(max(now - updated, 0.0), 1),
+        }
+
+    # Function to call callback(estimate) whenever a region's estimate changes
+    # Callbacks run on the thread that applied the report; returns a function that ends the subscription
+    def subscribe(self, region, callback):
+        region = region_key(region)
+        with self.lock:
+            self.subscribers.setdefault(region, []).append(callback)
+
+        def unsubscribe():
+            with self.lock:
+                callbacks = self.subscribers.get(region, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+                if not callbacks:
+                    self.subscribers.pop(region, None)
+
+        return unsubscribe
+
+    def close(self):
+        self.backend.close()
+
+# Function to create the store for a NAVAL_WIND_HUB setting ("host:port", or None for in-process)
+def open_wind_store(hub=WIND_HUB):
+    if not hub:
+        return WindStore()
+    host, _, port = hub.rpartition(":")
+    return WindStore(SocketBackend(host or DEFAULT_HUB_HOST, int(port)))
+
+# Store shared by every session and request of a process
+WIND_STORE = open_wind_store()
+
+# Relay between the wind stores of several processes
+# Every report line received is sent to every other connection; the latest report per (region, source)
+# is kept so new connections start with the current state
+class WindHub:
+    def __init__(self, expiry=WIND_EXPIRY):
+        self.expiry = expiry
+        self.writers = set()
+        self.latest = {}
+
+    # Function to serve one connected process
+    async def handle(self, reader, writer):
+        cutoff = time.time() - self.expiry
+        for key, (timestamp, line) in list(self.latest.items()):
+            if timestamp < cutoff:
+                del self.latest[key]
+            else:
+                writer.write(line)
+        self.writers.add(writer)
+        try:
+            while line := await reader.readline():
+                try:
+                    report = check_report(json.loads(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    LOGGER.warning("Dropped a report from a wind store: %s", e)
+                    continue
+                key = (report["region"], report["source"])
+                timestamp = report["timestamp"]
+                if key in self.latest and self.latest[key][0] >= timestamp:
+                    continue
+                line = (json.dumps(report) + "\n").encode()
+                self.latest[key] = (timestamp, line)
+                for other in list(self.writers):
+                    if other is not writer:
+                        other.write(line)
+        except ConnectionError:
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+# Function to run a wind hub until interrupted
+async def serve_hub(host, port):
+    hub = WindHub()
+    server = await asyncio.start_server(hub.handle, host, port)
+    print(f"Wind hub listening on {host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+# Function to run the command line entry point (the wind hub)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Relay shared wind reports between calculator and fire-control server processes.")
+    parser.add_argument("--host", default=DEFAULT_HUB_HOST, help=f"address to bind (default: {DEFAULT_HUB_HOST}, local only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_HUB_PORT, help=f"port to listen on (default: {DEFAULT_HUB_PORT})")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve_hub(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
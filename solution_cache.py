@@ -0,0 +1,95 @@
+# Solution cache shared by every session of the calculator server
+# Streamlit re-executes the page script on every rerun, but imported modules stay loaded,
+# so a cache kept here is shared across reruns and sessions of one server process.
+import functools
+import os
+import threading
+from collections import OrderedDict
+
+# Inputs are quantized to the 0.1 step of the number inputs (whole tenths) before they are used as keys
+CACHE_SCALE = 10
+# Maximum number of cached solutions, override with the NAVAL_SOLUTION_CACHE_SIZE environment variable
+DEFAULT_CACHE_SIZE = 4096
+
+# Thread-safe LRU cache with hit/miss counters
+class SolutionCache:
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Function to return the cached value for key, computing and storing it on a miss
+    # compute() runs outside the lock, so a slow solve never blocks other sessions
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    # Function to change the size limit, evicting the least recently used entries if needed
+    def resize(self, maxsize):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        with self.lock:
+            self.maxsize = maxsize
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    # Function to drop every entry and reset the counters
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    # Function to report the cache counters
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+# Cache shared by the whole server process
+SOLUTION_CACHE = SolutionCache(int(os.environ.get("NAVAL_SOLUTION_CACHE_SIZE", DEFAULT_CACHE_SIZE)))
+
+# Decorator to memoize a solver in SOLUTION_CACHE
+# The key is the solver name plus its arguments (ship type included) with numbers quantized to whole
+# tenths, and the solver is called with the quantized values so every cached answer matches its key.
+# round(value * 10) is used instead of round(value, 1), which formats the float and is much slower.
+def cached_solver(function):
+    name = function.__name__
+
+    def compute(key):
+        return function(*[value if isinstance(value, str) else value / CACHE_SCALE for value in key[1:]])
+
+    @functools.wraps(function)
+    def wrapper(*args):
+        key = (name, *[value if isinstance(value, str) else round(value * CACHE_SCALE) for value in args])
+        return SOLUTION_CACHE.get_or_compute(key, lambda: compute(key))
+
+    return wrapper
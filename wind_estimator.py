@@ -0,0 +1,168 @@
+# Multi-splash wind estimator
+# Every splash from any gun gives one drift vector: where the shell landed minus where the gun aimed.
+# The wind is the robust, time-weighted mean of those drifts. WindEstimator keeps running sums so a new
+# splash costs O(1) and older splashes fade out with a half-life. A splash far from the current fit is
+# either a bad spot reading or proof that an earlier bad reading pulled the fit, so it triggers a full
+# robust refit of the kept splashes with fit_wind, which does the fit for whole arrays of splashes with
+# iteratively reweighted least squares and Huber weights.
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+from naval_core import SHIP_TYPES, calculate_azimuth, solve_splash_drift
+from naval_engine import calculate_cos_sin_batch
+from naval_metrics import timed
+
+# Seconds after which a splash counts half as much as a new one
+DEFAULT_HALF_LIFE = 300.0
+# Drift error (in distance units) beyond which a splash is down-weighted
+DEFAULT_HUBER_SCALE = 10.0
+# Splashes kept for a full robust refit
+DEFAULT_HISTORY_SIZE = 256
+
+# Function to calculate splash drifts for whole arrays of splashes
+# gun may be a single gun index or an array of indices; returns an (n, 2) array of drift vectors
+def splash_drifts_batch(ship_type, ship_azimuth, gun, commanded_azimuth, commanded_distance, observed_azimuth, observed_distance):
+    offsets = np.array([offset for offset, _, _, _ in SHIP_TYPES[ship_type].guns])[np.asarray(gun)]
+    ship_cos, ship_sin = calculate_cos_sin_batch(np.asarray(ship_azimuth, dtype=np.float64))
+    commanded_cos, commanded_sin = calculate_cos_sin_batch(np.asarray(commanded_azimuth, dtype=np.float64))
+    observed_cos, observed_sin = calculate_cos_sin_batch(np.asarray(observed_azimuth, dtype=np.float64))
+    dx = observed_cos * observed_distance - (ship_cos * offsets + commanded_cos * commanded_distance)
+    dy = observed_sin * observed_distance - (ship_sin * offsets + commanded_sin * commanded_distance)
+    return np.stack(np.broadcast_arrays(dx, dy), axis=-1)
+
+# Function to turn a wind vector into (azimuth, strength)
+def wind_from_vector(x, y):
+    return calculate_azimuth(x, y), math.hypot(x, y)
+
+# Function to fit the wind vector to an (n, 2) array of drifts with a robust weighted least-squares solve
+# ages (seconds) fade old splashes with half_life; Huber weights limit the pull of outliers.
+# Returns (wind_x, wind_y) and the final per-splash weights.
+@timed
+def fit_wind(drifts, ages=None, half_life=DEFAULT_HALF_LIFE, huber_scale=DEFAULT_HUBER_SCALE, iterations=20, tolerance=1e-6):
+    drifts = np.asarray(drifts, dtype=np.float64).reshape(-1, 2)
+    if len(drifts) == 0:
+        raise ValueError("at least one splash is needed to fit the wind")
+    base_weights = np.ones(len(drifts)) if ages is None else 0.5 ** (np.asarray(ages, dtype=np.float64) / half_life)
+
+    weights = base_weights
+    estimate = weights @ drifts / weights.sum()
+    for _ in range(iterations):
+        errors = np.hypot(*(drifts - estimate).T)
+        weights = base_weights * np.minimum(1.0, huber_scale / np.maximum(errors, 1e-12))
+        new_estimate = weights @ drifts / weights.sum()
+        converged = np.hypot(*(new_estimate - estimate)) < tolerance
+        estimate = new_estimate
+        if converged:
+            break
+    return (float(estimate[0]), float(estimate[1])), weights
+
+# Running wind estimate fed one splash at a time
+class WindEstimator:
+    def __init__(self, half_life=DEFAULT_HALF_LIFE, huber_scale=DEFAULT_HUBER_SCALE, history_size=DEFAULT_HISTORY_SIZE):
+        self.half_life = half_life
+        self.huber_scale = huber_scale
+        self.history = deque(maxlen=history_size)
+        self.reset()
+
+    # Function to forget every splash
+    def reset(self):
+        # Decayed sums of weights, squared weights, weighted drifts and weighted squared drift lengths
+        self.sum_weight = 0.0
+        self.sum_weight_sq = 0.0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_sq = 0.0
+        self.last_time = None
+        self.count = 0
+        self.history.clear()
+
+    # Function to fade the running sums to the given time
+    def decay_to(self, timestamp):
+        if self.last_time is not None and timestamp > self.last_time:
+            factor = 0.5 ** ((timestamp - self.last_time) / self.half_life)
+            self.sum_weight *= factor
+            self.sum_weight_sq *= factor * factor
+            self.sum_x *= factor
+            self.sum_y *= factor
+            self.sum_sq *= factor
+        if self.last_time is None or timestamp > self.last_time:
+            self.last_time = timestamp
+
+    # Function to add one drift vector, in O(1) unless it lands beyond the Huber scale of the fit
+    # A splash reported after newer ones counts by its real age
+    def add_drift(self, dx, dy, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        self.decay_to(timestamp)
+        weight = 0.5 ** ((self.last_time - timestamp) / self.half_life)
+        outlier = False
+        if self.sum_weight > 0:
+            wind_x, wind_y = self.wind_vector()
+            error = math.hypot(dx - wind_x, dy - wind_y)
+            outlier = error > self.huber_scale
+            if outlier:
+                weight *= self.huber_scale / error
+        self.sum_weight += weight
+        self.sum_weight_sq += weight * weight
+        self.sum_x += weight * dx
+        self.sum_y += weight * dy
+        self.sum_sq += weight * (dx * dx + dy * dy)
+        self.count += 1
+        self.history.append((timestamp, dx, dy))
+        if outlier:
+            return self.refit()
+        return self.wind()
+
+    # Function to add one splash from any gun
+    # commanded_* is what the gun fired with, observed_* is the commander's reading of the splash
+    @timed
+    def add_splash(self, ship_type, ship_azimuth, gun, commanded_azimuth, commanded_distance,
+                   observed_azimuth, observed_distance, timestamp=None):
+        dx, dy = solve_splash_drift(ship_type, ship_azimuth, gun, commanded_azimuth, commanded_distance,
+                                    observed_azimuth, observed_distance)
+        return self.add_drift(dx, dy, timestamp)
+
+    # Function to return the current wind vector (x, y)
+    def wind_vector(self):
+        if self.sum_weight <= 0:
+            return 0.0, 0.0
+        return self.sum_x / self.sum_weight, self.sum_y / self.sum_weight
+
+    # Function to return the current wind as (azimuth, strength)
+    def wind(self):
+        return wind_from_vector(*self.wind_vector())
+
+    # Function to return the effective number of splashes behind the estimate
+    def effective_count(self):
+        if self.sum_weight_sq <= 0:
+            return 0.0
+        return self.sum_weight ** 2 / self.sum_weight_sq
+
+    # Function to return the standard error of the wind vector (same units as wind strength)
+    def uncertainty(self):
+        effective_count = self.effective_count()
+        if effective_count <= 1:
+            return math.inf
+        wind_x, wind_y = self.wind_vector()
+        variance = max(self.sum_sq / self.sum_weight - (wind_x * wind_x + wind_y * wind_y), 0.0)
+        return math.sqrt(variance / (effective_count - 1))
+
+    # Function to refit every kept splash with fit_wind and restart the running sums from that fit
+    # Run by add_drift for every splash beyond the Huber scale, so an early outlier that pulled the running
+    # sums is down-weighted against all the splashes that came after it
+    def refit(self, now=None):
+        if not self.history:
+            return self.wind()
+        now = self.last_time if now is None else now
+        times, dx, dy = np.array(self.history).T
+        drifts = np.column_stack([dx, dy])
+        _, weights = fit_wind(drifts, now - times, self.half_life, self.huber_scale)
+        self.sum_weight = float(weights.sum())
+        self.sum_weight_sq = float(weights @ weights)
+        self.sum_x = float(weights @ dx)
+        self.sum_y = float(weights @ dy)
+        self.sum_sq = float(weights @ (dx * dx + dy * dy))
+        self.last_time = now
+        return self.wind()